@@ -1,9 +1,9 @@
-from typing import List, Dict
+from typing import List, Dict, Union
 
 from agents.load_matcher import load_matcher_agent
 from agents.route_optimizer import route_optimizer_agent
 from agents.financial_analyzer import financial_analyzer_agent
-from models.domain import Coordinate
+from models.records import LoadTable, Point
 
 
 class CoordinatorAgent:
@@ -19,9 +19,9 @@ class CoordinatorAgent:
     
     def get_load_recommendations(
         self,
-        driver_current: Coordinate,
-        driver_destination: Coordinate,
-        available_loads: List[Dict]
+        driver_current: Point,
+        driver_destination: Point,
+        available_loads: Union[LoadTable, List[Dict]]
     ) -> List[Dict]:
         """
         Orchestrate all agents to get ranked load recommendations
@@ -29,38 +29,28 @@ class CoordinatorAgent:
         Args:
             driver_current: Driver's current location
             driver_destination: Driver's intended destination
-            available_loads: List of available loads from ChromaDB
+            available_loads: LoadTable, or list of available load records
             
         Returns:
             List of load opportunities ranked by profitability
         """
         try:
             # Step 1: Load Matcher - Find compatible loads
-            matched_loads = self.load_matcher.match_loads(
+            matched_loads, deviations = self.load_matcher.match_table(
                 driver_current, driver_destination, available_loads
             )
             
-            if not matched_loads:
+            if not len(matched_loads):
                 return []
             
-            # Step 2: Route Optimizer - Calculate route metrics for each load
-            route_metrics = {}
-            for load in matched_loads:
-                vendor_pickup = Coordinate(**load["pickup_location"])
-                vendor_destination = Coordinate(**load["destination"])
-                
-                metrics = self.route_optimizer.calculate_route_metrics(
-                    driver_current,
-                    driver_destination,
-                    vendor_pickup,
-                    vendor_destination
-                )
-                
-                route_metrics[load["load_id"]] = metrics
+            # Step 2: Route Optimizer - Calculate route metrics for all loads at once
+            route_metrics = self.route_optimizer.calculate_route_metrics_batch(
+                driver_current, driver_destination, matched_loads
+            )
             
             # Step 3: Financial Analyzer - Analyze profitability and rank
-            ranked_opportunities = self.financial_analyzer.analyze_profitability(
-                matched_loads, route_metrics
+            ranked_opportunities = self.financial_analyzer.analyze_profitability_batch(
+                matched_loads, deviations, route_metrics
             )
             
             return ranked_opportunities
@@ -72,9 +62,9 @@ class CoordinatorAgent:
     
     def _fallback_matching(
         self,
-        driver_current: Coordinate,
-        driver_destination: Coordinate,
-        available_loads: List[Dict]
+        driver_current: Point,
+        driver_destination: Point,
+        available_loads: Union[LoadTable, List[Dict]]
     ) -> List[Dict]:
         """
         Fallback to simple distance-based matching if agent coordination fails
@@ -2,7 +2,10 @@ from crewai import Agent, Task
 from crewai.tools import tool
 from typing import Dict, List
 
+import numpy as np
+
 from agents.base import create_agent
+from models.records import LoadTable
 from services.math_engine import math_engine
 
 
@@ -94,6 +97,49 @@ class FinancialAnalyzerAgent:
             load["rank"] = idx
         
         return analyzed_loads
+    
+    def analyze_profitability_batch(
+        self,
+        loads: LoadTable,
+        deviations: np.ndarray,
+        route_metrics: Dict
+    ) -> List[Dict]:
+        """
+        analyze_profitability for a LoadTable and batch route metrics
+        
+        Args:
+            loads: Matched loads
+            deviations: Deviation in km of each load
+            route_metrics: Output of RouteOptimizerAgent.calculate_route_metrics_batch
+            
+        Returns:
+            Profitable load opportunities with profitability analysis, ranked by score
+        """
+        profitability = math_engine.calculate_profitability_batch(
+            route_metrics["extra_distance_km"],
+            route_metrics["extra_time_hours"],
+            loads.price
+        )
+        
+        # Only include profitable loads, best score first (ties keep match order)
+        profitable = np.flatnonzero(profitability["net_profit"] > 0)
+        order = profitable[np.argsort(-profitability["profitability_score"][profitable], kind="stable")]
+        
+        analyzed_loads = []
+        for rank, i in enumerate(order, 1):
+            analyzed_loads.append({
+                **loads.row(i).to_match(float(deviations[i])),
+                "calculation": {
+                    "extra_distance_km": float(route_metrics["extra_distance_km"][i]),
+                    "extra_time_hours": float(route_metrics["extra_time_hours"][i]),
+                    "fuel_cost": float(profitability["fuel_cost"][i]),
+                    "time_cost": float(profitability["time_cost"][i]),
+                    "net_profit": float(profitability["net_profit"][i]),
+                    "profitability_score": float(profitability["profitability_score"][i])
+                },
+                "rank": rank
+            })
+        return analyzed_loads
 
 
 # Global instance
@@ -1,9 +1,11 @@
 from crewai import Agent, Task
 from crewai.tools import tool
-from typing import List, Dict
+from typing import List, Dict, Tuple, Union
+
+import numpy as np
 
 from agents.base import create_agent
-from models.domain import Coordinate
+from models.records import LoadTable, Point, lat_lng
 from services.math_engine import math_engine
 from config import settings
 
@@ -18,9 +20,9 @@ def calculate_route_deviation_tool(
     vendor_lng: float
 ) -> float:
     """Calculate how far the vendor pickup location deviates from driver's direct route"""
-    driver_loc = Coordinate(lat=driver_lat, lng=driver_lng)
-    driver_dest = Coordinate(lat=driver_dest_lat, lng=driver_dest_lng)
-    vendor_loc = Coordinate(lat=vendor_lat, lng=vendor_lng)
+    driver_loc = (driver_lat, driver_lng)
+    driver_dest = (driver_dest_lat, driver_dest_lng)
+    vendor_loc = (vendor_lat, vendor_lng)
     
     # Calculate direct distance
     direct_distance = math_engine.calculate_distance(driver_loc, driver_dest)
@@ -52,8 +54,8 @@ class LoadMatcherAgent:
     
     def create_matching_task(
         self,
-        driver_current: Coordinate,
-        driver_destination: Coordinate,
+        driver_current: Point,
+        driver_destination: Point,
         available_loads: List[Dict]
     ) -> Task:
         """
@@ -67,11 +69,13 @@ class LoadMatcherAgent:
         Returns:
             CrewAI Task for load matching
         """
+        current_lat, current_lng = lat_lng(driver_current)
+        destination_lat, destination_lng = lat_lng(driver_destination)
         task_description = f"""
         Analyze the driver's route and find compatible loads:
         
-        Driver Current Location: {driver_current.lat}, {driver_current.lng}
-        Driver Destination: {driver_destination.lat}, {driver_destination.lng}
+        Driver Current Location: {current_lat}, {current_lng}
+        Driver Destination: {destination_lat}, {destination_lng}
         
         Available Loads: {len(available_loads)} loads to analyze
         
@@ -91,9 +95,9 @@ class LoadMatcherAgent:
     
     def match_loads(
         self,
-        driver_current: Coordinate,
-        driver_destination: Coordinate,
-        available_loads: List[Dict]
+        driver_current: Point,
+        driver_destination: Point,
+        available_loads: Union[LoadTable, List[Dict]]
     ) -> List[Dict]:
         """
         Match available loads with driver's route
@@ -101,43 +105,39 @@ class LoadMatcherAgent:
         Args:
             driver_current: Driver's current location
             driver_destination: Driver's destination
-            available_loads: List of available loads from ChromaDB
+            available_loads: LoadTable, or list of available load records
             
         Returns:
             List of matched loads with deviation metrics
         """
-        matched_loads = []
+        matched, deviations = self.match_table(driver_current, driver_destination, available_loads)
+        return [matched.row(i).to_match(float(deviations[i])) for i in range(len(matched))]
+    
+    def match_table(
+        self,
+        driver_current: Point,
+        driver_destination: Point,
+        available_loads: Union[LoadTable, List[Dict]]
+    ) -> Tuple[LoadTable, np.ndarray]:
+        """
+        Match available loads with driver's route, keeping the columnar form
         
-        for load in available_loads:
-            vendor_pickup = Coordinate(
-                lat=float(load['pickup_lat']),
-                lng=float(load['pickup_lng'])
-            )
-            
-            # Calculate deviation (distance to vendor pickup)
-            deviation = math_engine.calculate_distance(driver_current, vendor_pickup)
-            
-            # Filter by max deviation
-            if deviation <= settings.max_route_deviation_km:
-                matched_loads.append({
-                    "load_id": str(load['load_id']),
-                    "vendor_id": str(load['vendor_id']),
-                    "weight_kg": float(load['weight_kg']),
-                    "pickup_location": {
-                        "lat": float(load['pickup_lat']),
-                        "lng": float(load['pickup_lng']),
-                        "address": load['pickup_address']
-                    },
-                    "destination": {
-                        "lat": float(load['destination_lat']),
-                        "lng": float(load['destination_lng']),
-                        "address": load['destination_address']
-                    },
-                    "price_offered": float(load['price_offered']),
-                    "deviation_km": deviation
-                })
+        Returns:
+            (matched loads, their deviations in km)
+        """
+        if not isinstance(available_loads, LoadTable):
+            available_loads = LoadTable.from_records(available_loads)
+        
+        # Deviation is the extra distance of the whole detour (current -> pickup ->
+        # delivery -> destination) over the direct route, for every load at once
+        route_metrics = math_engine.calculate_route_metrics_batch(
+            driver_current, driver_destination, available_loads
+        )
+        deviations = route_metrics["extra_distance_km"]
         
-        return matched_loads
+        # Filter by max deviation
+        within = np.flatnonzero(deviations <= settings.max_route_deviation_km)
+        return available_loads.take(within), deviations[within]
 
 
 # Global instance
@@ -3,16 +3,14 @@ from crewai.tools import tool
 from typing import Dict
 
 from agents.base import create_agent
-from models.domain import Coordinate
+from models.records import LoadTable, Point
 from services.math_engine import math_engine
 
 
 @tool("calculate_route_distance")
 def calculate_route_distance_tool(origin: Dict, destination: Dict) -> float:
     """Calculate distance between two points"""
-    origin_coord = Coordinate(**origin)
-    dest_coord = Coordinate(**destination)
-    return math_engine.calculate_distance(origin_coord, dest_coord)
+    return math_engine.calculate_distance(origin, destination)
 
 
 @tool("calculate_route_time")
@@ -38,10 +36,10 @@ class RouteOptimizerAgent:
     
     def calculate_route_metrics(
         self,
-        driver_current: Coordinate,
-        driver_destination: Coordinate,
-        vendor_pickup: Coordinate,
-        vendor_destination: Coordinate
+        driver_current: Point,
+        driver_destination: Point,
+        vendor_pickup: Point,
+        vendor_destination: Point
     ) -> Dict:
         """
         Calculate complete route metrics for a load opportunity
@@ -82,6 +80,20 @@ class RouteOptimizerAgent:
             "vendor_delivery_distance_km": dist_vendor_delivery,
             "delivery_to_home_km": dist_delivery_to_home
         }
+    
+    def calculate_route_metrics_batch(
+        self,
+        driver_current: Point,
+        driver_destination: Point,
+        loads: LoadTable
+    ) -> Dict:
+        """
+        Route metrics for every load of a LoadTable in one vectorized pass
+        
+        Returns:
+            Dictionary keyed like calculate_route_metrics, with one array element per load
+        """
+        return math_engine.calculate_route_metrics_batch(driver_current, driver_destination, loads)
 
 
 # Global instance
@@ -3,19 +3,24 @@ Manual Allocation API Endpoints
 Owner can manually allocate vehicles to loads
 """
 
-from fastapi import APIRouter, HTTPException, status, Query
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Query, Response
+from typing import List, Optional
 from uuid import UUID
 
 from models.domain import (
     OwnerStatistics, VehicleInfo, LoadInfo, AllocationRequest, 
     AllocationRecord, DriverAllocatedLoadsSummary, NavigationState,
-    LocationUpdate, Notification
+    LocationUpdate, RecordedLocationUpdate, Notification
 )
 from services.allocation_service import allocation_service
 from services.driver_loads_service import driver_loads_service
 from services.navigation_service import navigation_service
+from services.archive_scheduler import archive_scheduler
+from services.math_engine import math_engine
+from config import settings
 from db_chromadb import db
+from storage.base import ConflictError
+from storage.changefeed import ChangeFeedGap
 
 router = APIRouter(prefix="/api", tags=["allocations"])
 
@@ -58,8 +63,10 @@ def seed_demo_data():
             (26.9124, 75.7873),  # Jaipur
             (22.5726, 88.3639)   # Kolkata
         ]
-        for i, (lat, lng) in enumerate(locations):
-            db.add_location_update(trucks[i]['truck_id'], lat, lng, 10.0)
+        db.add_location_updates([
+            {"vehicle_id": trucks[i]['truck_id'], "latitude": lat, "longitude": lng, "accuracy": 10.0}
+            for i, (lat, lng) in enumerate(locations)
+        ])
         
         # Create Vendors
         vendors = []
@@ -84,19 +91,21 @@ def seed_demo_data():
             (2, 4500, 12.9716, 77.5946, "Whitefield, Bangalore", 17.3850, 78.4867, "Hyderabad, Telangana", 16000),
         ]
         
-        for vendor_idx, weight, p_lat, p_lng, p_addr, d_lat, d_lng, d_addr, price in loads_data:
-            db.create_load(
-                vendor_id=vendors[vendor_idx]['vendor_id'],
-                weight_kg=weight,
-                pickup_lat=p_lat,
-                pickup_lng=p_lng,
-                pickup_address=p_addr,
-                destination_lat=d_lat,
-                destination_lng=d_lng,
-                destination_address=d_addr,
-                price_offered=price,
-                currency="INR"
-            )
+        db.create_loads([
+            {
+                "vendor_id": vendors[vendor_idx]['vendor_id'],
+                "weight_kg": weight,
+                "pickup_lat": p_lat,
+                "pickup_lng": p_lng,
+                "pickup_address": p_addr,
+                "destination_lat": d_lat,
+                "destination_lng": d_lng,
+                "destination_address": d_addr,
+                "price_offered": price,
+                "currency": "INR"
+            }
+            for vendor_idx, weight, p_lat, p_lng, p_addr, d_lat, d_lng, d_addr, price in loads_data
+        ])
         
         return {
             "success": True,
@@ -127,6 +136,63 @@ def clear_all_data():
         )
 
 
+@router.get("/admin/cache-stats")
+def get_cache_stats():
+    """Get entity cache hit/miss counters, hot store write-behind state, group commit batching and distance cache hit rates"""
+    return {
+        **db.cache.stats(),
+        "hotStore": db.hot.stats(),
+        "groupCommit": db.writer.stats(),
+        "distanceCache": math_engine.cache_stats()
+    }
+
+
+@router.get("/admin/change-feed")
+def get_change_feed(
+    since: int = Query(0, ge=0, description="Last sequence number already processed"),
+    limit: int = Query(settings.default_page_size, ge=1, le=settings.max_page_size, description="Max events")
+):
+    """Get change events after a sequence number"""
+    try:
+        events = db.changes.since(since, limit=limit)
+    except ChangeFeedGap as e:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=str(e)
+        )
+    return {
+        "sequence": db.changes.sequence,
+        "events": [
+            {
+                "sequence": event.sequence,
+                "collection": event.collection,
+                "operation": event.operation,
+                "recordId": event.record_id
+            }
+            for event in events
+        ]
+    }
+
+
+@router.post("/admin/archive")
+def run_archive():
+    """Archive delivered loads, completed trips and read notifications past the retention window"""
+    try:
+        archived = archive_scheduler.force_run()
+        return {"success": True, "archived": archived}
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to archive records: {str(e)}"
+        )
+
+
+@router.get("/admin/archive")
+def get_archive_status():
+    """Get archival job status and archived record counts"""
+    return archive_scheduler.get_status()
+
+
 # ==================== VEHICLE REGISTRATION ====================
 
 @router.post("/vehicles/register")
@@ -195,11 +261,28 @@ def get_owner_statistics(owner_id: str = Query(..., description="Owner ID")):
 
 
 @router.get("/allocations/available-vehicles", response_model=List[VehicleInfo])
-def get_available_vehicles(owner_id: str = Query(..., description="Owner ID")):
-    """Get all available vehicles for allocation"""
+def get_available_vehicles(
+    response: Response,
+    owner_id: str = Query(..., description="Owner ID"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.max_page_size, description="Page size; omit limit and cursor for the full list"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page")
+):
+    """Get available vehicles for allocation, all of them or one page at a time"""
     try:
-        vehicles = allocation_service.get_available_vehicles(owner_id)
+        if limit is None and cursor is None:
+            vehicles, next_cursor = allocation_service.get_available_vehicles(owner_id), None
+        else:
+            vehicles, next_cursor = allocation_service.get_available_vehicles_page(
+                owner_id, limit or settings.default_page_size, cursor
+            )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return [VehicleInfo(**v) for v in vehicles]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -208,11 +291,27 @@ def get_available_vehicles(owner_id: str = Query(..., description="Owner ID")):
 
 
 @router.get("/allocations/unallocated-loads", response_model=List[LoadInfo])
-def get_unallocated_loads():
-    """Get all unallocated loads"""
+def get_unallocated_loads(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=settings.max_page_size, description="Page size; omit limit and cursor for the full list"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page")
+):
+    """Get unallocated loads, all of them or one page at a time"""
     try:
-        loads = allocation_service.get_unallocated_loads()
+        if limit is None and cursor is None:
+            loads, next_cursor = allocation_service.get_unallocated_loads(), None
+        else:
+            loads, next_cursor = allocation_service.get_unallocated_loads_page(
+                limit or settings.default_page_size, cursor
+            )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return [LoadInfo(**l) for l in loads]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -268,6 +367,11 @@ def create_allocation(request: AllocationRequest):
             completedAt=allocation.get('completed_at') or None,
             cancelledAt=allocation.get('cancelled_at') or None
         )
+    except ConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -286,6 +390,11 @@ def cancel_allocation(allocation_id: str):
     try:
         allocation_service.cancel_allocation(allocation_id)
         return {"success": True, "message": "Allocation cancelled"}
+    except ConflictError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -389,6 +498,39 @@ def update_location(update: LocationUpdate):
         )
 
 
+@router.post("/navigation/location-updates")
+def update_locations(updates: List[RecordedLocationUpdate]):
+    """
+    Upload a batch of GPS readings
+    
+    Each reading has vehicleId, latitude, longitude, accuracy and an optional
+    recordedAt (ISO8601). Readings with out-of-range coordinates are reported
+    by index; the rest are stored.
+    """
+    try:
+        rows = [
+            {
+                "vehicle_id": update.vehicleId,
+                "latitude": update.latitude,
+                "longitude": update.longitude,
+                "accuracy": update.accuracy,
+                "recorded_at": update.recordedAt
+            }
+            for update in updates
+        ]
+        result = db.add_location_updates(rows)
+        return {
+            "success": True,
+            "createdCount": len(result['created']),
+            "errors": result['errors']
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to update locations: {str(e)}"
+        )
+
+
 @router.get("/navigation/current-location")
 def get_current_location(vehicle_id: str = Query(..., description="Vehicle ID")):
     """Get current location for a vehicle"""
@@ -409,6 +551,27 @@ def get_current_location(vehicle_id: str = Query(..., description="Vehicle ID"))
         )
 
 
+@router.get("/navigation/track")
+def get_vehicle_track(
+    vehicle_id: str = Query(..., description="Vehicle ID"),
+    start: Optional[str] = Query(None, description="Start time (ISO8601, inclusive)"),
+    end: Optional[str] = Query(None, description="End time (ISO8601, exclusive)")
+):
+    """Get recorded GPS track for a vehicle"""
+    try:
+        return navigation_service.get_track(vehicle_id, start, end)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid time range: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get vehicle track: {str(e)}"
+        )
+
+
 @router.get("/navigation/route", response_model=NavigationState)
 def get_navigation_route(
     currentLat: float = Query(..., description="Current latitude"),
@@ -457,11 +620,42 @@ def waypoint_reached(
 # ==================== NOTIFICATION ENDPOINTS ====================
 
 @router.get("/notifications", response_model=List[Notification])
-def get_notifications(driver_id: str = Query(..., description="Driver ID")):
-    """Get all notifications for a driver"""
+def get_notifications(
+    response: Response,
+    driver_id: str = Query(..., description="Driver ID"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.max_page_size, description="Page size; omit limit and cursor for the full list"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page")
+):
+    """Get notifications for a driver, oldest first, all of them or one page at a time"""
     try:
-        notifications = db.get_driver_notifications(driver_id)
-        return [Notification(**n) for n in notifications]
+        if limit is None and cursor is None:
+            notifications, next_cursor = db.get_driver_notifications(driver_id), None
+        else:
+            notifications, next_cursor = db.page(
+                "notifications", where={"driver_id": driver_id},
+                limit=limit or settings.default_page_size, cursor=cursor
+            )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return [
+            Notification(
+                id=n['notification_id'],
+                driverId=n['driver_id'],
+                type=n['type'],
+                title=n['title'],
+                message=n['message'],
+                loadId=n.get('load_id') or None,
+                waypointType=n.get('waypoint_type') or None,
+                isRead=n.get('is_read', False),
+                createdAt=n['created_at']
+            )
+            for n in notifications
+        ]
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
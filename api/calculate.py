@@ -2,9 +2,12 @@ from fastapi import APIRouter, HTTPException, status
 from pydantic import BaseModel
 from uuid import UUID
 
+from config import settings
 from db_chromadb import db
 from models.domain import Coordinate, ProfitabilityCalculation, LoadOpportunity
+from models.records import LatLng
 from agents.coordinator import coordinator_agent
+from services.math_engine import math_engine
 
 router = APIRouter(prefix="/api/v1/calculate", tags=["calculations"])
 
@@ -71,17 +74,15 @@ def get_load_opportunities(trip_id: UUID):
         )
     
     # Get driver's current location and destination
-    driver_current = Coordinate(
-        lat=trip['origin_lat'],
-        lng=trip['origin_lng']
-    )
-    driver_destination = Coordinate(
-        lat=trip['destination_lat'],
-        lng=trip['destination_lng']
-    )
+    driver_current = LatLng(trip['origin_lat'], trip['origin_lng'])
+    driver_destination = LatLng(trip['destination_lat'], trip['destination_lng'])
     
-    # Get available loads
-    available_loads = db.get_available_loads()
+    # Available loads inside the route corridor the deviation limit allows, from the spatial index
+    available_loads = db.loads_in_corridor(
+        driver_current.lat, driver_current.lng,
+        driver_destination.lat, driver_destination.lng,
+        math_engine.corridor_length_km(driver_current, driver_destination, settings.max_route_deviation_km)
+    )
     
     # Use coordinator agent to get recommendations
     opportunities = coordinator_agent.get_load_recommendations(
@@ -158,11 +158,7 @@ async def create_expense(expense: ExpenseCreate):
     try:
         print(f"DEBUG: Attempting to store expense {expense_id}")
         print(f"DEBUG: Expense record: {expense_record}")
-        db.expenses.add(
-            ids=[expense_id],
-            documents=[f"{expense.category}: {expense.description}"],
-            metadatas=[expense_record]
-        )
+        db.create_expense(expense_record)
         print(f"DEBUG: Successfully stored expense {expense_id}")
     except Exception as e:
         print(f"ERROR: Database error storing expense: {str(e)}")
@@ -196,25 +192,11 @@ async def get_daily_expenses(
     Requirements: 9.2, 9.5, 9.6
     """
     try:
-        # Query all expenses
-        result = db.expenses.get()
-        
-        if not result['ids']:
-            return DailyExpenseSummary(
-                date=date,
-                total_expenses=0.0,
-                expense_breakdown={cat: 0.0 for cat in VALID_CATEGORIES},
-                expenses=[]
-            )
-        
-        # Filter by date and driver
-        expenses_list = []
-        for metadata in result['metadatas']:
-            expense_date = metadata['timestamp'][:10]  # Extract YYYY-MM-DD
-            
-            if expense_date == date:
-                if driver_id is None or metadata['driver_id'] == driver_id:
-                    expenses_list.append(metadata)
+        # Query expenses for the date (and driver)
+        where = {"timestamp": {"$prefix": date}}
+        if driver_id is not None:
+            where["driver_id"] = driver_id
+        expenses_list = db.find("expenses", where=where)
         
         # Calculate totals and breakdown
         total_expenses = sum(e['amount'] for e in expenses_list)
@@ -283,11 +265,7 @@ async def generate_report(request: ReportGenerateRequest):
             "version": 1
         }
         
-        db.reports.add(
-            ids=[report_id],
-            documents=[f"Report for {request.driver_id} on {report_date}"],
-            metadatas=[report_record]
-        )
+        db.create_report(report_record)
         
         return DailyReport(
             report_id=report_id,
@@ -317,29 +295,24 @@ async def get_daily_report(
     Requirements: 9.3, 9.5, 9.6
     """
     try:
-        # Query reports
-        result = db.reports.get()
+        # Query the matching report
+        where = {"date": date}
+        if driver_id is not None:
+            where["driver_id"] = driver_id
+        reports = db.find("reports", where=where, limit=1)
         
-        if not result['ids']:
-            raise HTTPException(
-                status_code=404,
-                detail=f"No report found for date {date}"
+        if reports:
+            metadata = reports[0]
+            return DailyReport(
+                report_id=metadata['report_id'],
+                driver_id=metadata['driver_id'],
+                date=metadata['date'],
+                generated_at=metadata['generated_at'],
+                trips=[TripDetail(**trip) for trip in json.loads(metadata['trips'])],
+                financial_summary=FinancialMetrics(**json.loads(metadata['financial_summary'])),
+                ai_insights=AIInsights(**json.loads(metadata['ai_insights']))
             )
         
-        # Find matching report
-        for metadata in result['metadatas']:
-            if metadata['date'] == date:
-                if driver_id is None or metadata['driver_id'] == driver_id:
-                    return DailyReport(
-                        report_id=metadata['report_id'],
-                        driver_id=metadata['driver_id'],
-                        date=metadata['date'],
-                        generated_at=metadata['generated_at'],
-                        trips=[TripDetail(**trip) for trip in json.loads(metadata['trips'])],
-                        financial_summary=FinancialMetrics(**json.loads(metadata['financial_summary'])),
-                        ai_insights=AIInsights(**json.loads(metadata['ai_insights']))
-                    )
-        
         raise HTTPException(
             status_code=404,
             detail=f"No report found for date {date}"
@@ -365,16 +338,14 @@ async def get_report_pdf(report_id: str):
         from services.pdf_generator import PDFGenerator
         
         # Get report from database
-        result = db.reports.get(ids=[report_id])
+        report_data = db.get_report(report_id)
         
-        if not result['ids']:
+        if not report_data:
             raise HTTPException(
                 status_code=404,
                 detail=f"Report not found: {report_id}"
             )
         
-        report_data = result['metadatas'][0]
-        
         # Generate PDF
         pdf_generator = PDFGenerator()
         pdf_bytes = pdf_generator.generate_pdf_report(report_data)
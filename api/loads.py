@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, status, Query, Response
 from uuid import UUID
-from typing import List
+from typing import List, Optional
 from datetime import datetime
 
+from config import settings
 from db_chromadb import db
 from models.domain import LoadCreate, LoadResponse, Coordinate
+from storage.base import ConflictError
 
 router = APIRouter(prefix="/api/v1/loads", tags=["loads"])
 
@@ -70,10 +72,75 @@ def create_load(load_data: LoadCreate):
     )
 
 
+@router.post("/bulk", status_code=status.HTTP_201_CREATED)
+def create_loads(loads: List[LoadCreate]):
+    """
+    Create many load postings in one write
+    
+    Rows with an unknown vendor or invalid values are reported in **errors**
+    by their index in the request; all other rows are created.
+    """
+    vendor_ids = {str(load_data.vendor_id) for load_data in loads}
+    known_vendors = {vendor_id for vendor_id in vendor_ids if db.get_vendor(vendor_id)}
+    
+    rows = []
+    row_indexes = []
+    errors = []
+    for index, load_data in enumerate(loads):
+        if str(load_data.vendor_id) not in known_vendors:
+            errors.append({"index": index, "error": f"Vendor with ID {load_data.vendor_id} not found"})
+            continue
+        row_indexes.append(index)
+        rows.append({
+            "vendor_id": str(load_data.vendor_id),
+            "weight_kg": load_data.weight_kg,
+            "pickup_lat": load_data.pickup_location.lat,
+            "pickup_lng": load_data.pickup_location.lng,
+            "pickup_address": load_data.pickup_location.address,
+            "destination_lat": load_data.destination.lat,
+            "destination_lng": load_data.destination.lng,
+            "destination_address": load_data.destination.address,
+            "price_offered": load_data.price_offered,
+            "currency": load_data.currency
+        })
+    
+    result = db.create_loads(rows)
+    errors.extend(
+        {"index": row_indexes[error['index']], "error": error['error']}
+        for error in result['errors']
+    )
+    errors.sort(key=lambda error: error['index'])
+    
+    return {"created": result['created'], "errors": errors}
+
+
 @router.get("/available", response_model=List[LoadResponse])
-def get_available_loads():
-    """Get all available loads"""
-    loads = db.get_available_loads()
+def get_available_loads(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=settings.max_page_size, description="Page size; omit limit and cursor for the full list"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page")
+):
+    """
+    Get available loads, oldest posting first
+    
+    Without limit or cursor every available load is returned. With them, pass
+    the **X-Next-Cursor** response header back as **cursor** to fetch the next
+    page; the header is absent on the last page.
+    """
+    try:
+        if limit is None and cursor is None:
+            loads, next_cursor = db.get_available_loads(), None
+        else:
+            loads, next_cursor = db.page(
+                "loads", where={"status": "available"}, limit=limit or settings.default_page_size, cursor=cursor
+            )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
     return [
         LoadResponse(
@@ -167,9 +234,15 @@ def accept_load(load_id: UUID, trip_id: UUID):
             detail=f"Trip with ID {trip_id} not found"
         )
     
-    # Update load status to assigned (if not already)
+    # Update load status to assigned (if not already); another request may win the race
     if load['status'] != "assigned":
-        db.accept_load(str(load_id), str(trip_id), trip['driver_id'])
+        try:
+            db.accept_load(str(load_id), str(trip_id), trip['driver_id'])
+        except ConflictError as e:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Load cannot be accepted (current status: {e.actual})"
+            )
     
     # TODO: Create LoadAssignment record and provide navigation
     
@@ -4,6 +4,7 @@ Report Scheduler API endpoints
 
 from fastapi import APIRouter, HTTPException
 from services.report_scheduler import report_scheduler
+from services.scheduler_lock import SchedulerLockedError
 
 router = APIRouter(prefix="/api/v1/report-scheduler", tags=["report-scheduler"])
 
@@ -21,6 +22,11 @@ async def start_scheduler():
             "status": "started",
             "message": "Report scheduler started. Reports will be generated daily at 8 PM"
         }
+    except SchedulerLockedError as e:
+        raise HTTPException(
+            status_code=409,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -8,6 +8,7 @@ from pydantic import BaseModel
 from typing import Dict
 
 from services.auto_scheduler import auto_scheduler
+from services.scheduler_lock import SchedulerLockedError
 
 router = APIRouter(prefix="/api/v1/scheduler", tags=["scheduler"])
 
@@ -42,6 +43,11 @@ def start_scheduler():
             "interval_seconds": auto_scheduler.interval_seconds,
             "status": "running"
         }
+    except SchedulerLockedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
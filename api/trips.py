@@ -116,33 +116,31 @@ def get_assigned_load(trip_id: UUID):
         )
     
     # Find load assigned to this trip
-    all_loads = db.loads.get()
+    load_meta = db.get_load_for_trip(str(trip_id))
     
-    if all_loads['ids']:
-        for load_meta in all_loads['metadatas']:
-            if load_meta.get('assigned_trip_id') == str(trip_id):
-                return {
-                    "has_assigned_load": True,
-                    "load": {
-                        "load_id": load_meta['load_id'],
-                        "vendor_id": load_meta['vendor_id'],
-                        "weight_kg": load_meta['weight_kg'],
-                        "pickup_location": {
-                            "lat": load_meta['pickup_lat'],
-                            "lng": load_meta['pickup_lng'],
-                            "address": load_meta['pickup_address']
-                        },
-                        "destination": {
-                            "lat": load_meta['destination_lat'],
-                            "lng": load_meta['destination_lng'],
-                            "address": load_meta['destination_address']
-                        },
-                        "price_offered": load_meta['price_offered'],
-                        "currency": load_meta['currency'],
-                        "status": load_meta['status'],
-                        "assigned_at": load_meta.get('assigned_at', '')
-                    }
-                }
+    if load_meta:
+        return {
+            "has_assigned_load": True,
+            "load": {
+                "load_id": load_meta['load_id'],
+                "vendor_id": load_meta['vendor_id'],
+                "weight_kg": load_meta['weight_kg'],
+                "pickup_location": {
+                    "lat": load_meta['pickup_lat'],
+                    "lng": load_meta['pickup_lng'],
+                    "address": load_meta['pickup_address']
+                },
+                "destination": {
+                    "lat": load_meta['destination_lat'],
+                    "lng": load_meta['destination_lng'],
+                    "address": load_meta['destination_address']
+                },
+                "price_offered": load_meta['price_offered'],
+                "currency": load_meta['currency'],
+                "status": load_meta['status'],
+                "assigned_at": load_meta.get('assigned_at', '')
+            }
+        }
     
     return {
         "has_assigned_load": False,
@@ -197,14 +195,7 @@ def confirm_pickup(trip_id: UUID):
         )
     
     # Find the load assigned to this trip
-    all_loads = db.loads.get()
-    assigned_load = None
-    
-    if all_loads['ids']:
-        for load_meta in all_loads['metadatas']:
-            if load_meta.get('assigned_trip_id') == str(trip_id):
-                assigned_load = load_meta
-                break
+    assigned_load = db.get_load_for_trip(str(trip_id))
     
     # Update load status to picked_up
     if assigned_load:
@@ -241,14 +232,7 @@ def confirm_delivery(trip_id: UUID):
         )
     
     # Find the load assigned to this trip
-    all_loads = db.loads.get()
-    assigned_load = None
-    
-    if all_loads['ids']:
-        for load_meta in all_loads['metadatas']:
-            if load_meta.get('assigned_trip_id') == str(trip_id):
-                assigned_load = load_meta
-                break
+    assigned_load = db.get_load_for_trip(str(trip_id))
     
     # Update load status to delivered
     if assigned_load:
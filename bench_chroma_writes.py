@@ -0,0 +1,75 @@
+"""
+Benchmark for what plain-record writes cost in ChromaDB's vector segment
+
+Chroma indexes a vector for every record it stores, so plain collections
+write a placeholder instead of an embedding. This times one-record writes
+through ChromaDatabase's store primitive and, separately, the time spent in
+the HNSW vector segment, for the id-derived placeholder, a constant zero
+placeholder, and full-size 384-dimension vectors (the default embedding
+model's size; computing the embeddings is not included).
+
+    python bench_chroma_writes.py
+"""
+
+import random
+import tempfile
+import time
+
+from chromadb.segment.impl.vector.local_persistent_hnsw import PersistentLocalHnswSegment
+
+from db_chromadb import ChromaDatabase
+
+RECORDS = 5000
+FULL_DIMENSION = 384
+
+_write_records = PersistentLocalHnswSegment._write_records
+_vector_seconds = [0.0]
+
+
+def _timed_write_records(self, records):
+    start = time.perf_counter()
+    try:
+        return _write_records(self, records)
+    finally:
+        _vector_seconds[0] += time.perf_counter() - start
+
+
+def _run(vectors=None):
+    """Milliseconds per record written, in total and in the vector segment"""
+    directory = tempfile.mkdtemp()
+    database = ChromaDatabase(
+        persist_directory=f"{directory}/chroma", track_directory=f"{directory}/tracks",
+        archive_directory=f"{directory}/archive", hot_collections=()
+    )
+    if vectors is not None:
+        database._placeholder_embeddings = lambda collection, ids: [vectors() for _ in ids]
+    
+    _vector_seconds[0] = 0.0
+    start = time.perf_counter()
+    for i in range(RECORDS):
+        record_id = f"notification-{i}"
+        database._store_add("notifications", [record_id], [{
+            "notification_id": record_id, "driver_id": f"driver-{i % 50}", "is_read": False
+        }], [""])
+    total = time.perf_counter() - start
+    database.close()
+    return total / RECORDS * 1e3, _vector_seconds[0] / RECORDS * 1e3
+
+
+def main():
+    PersistentLocalHnswSegment._write_records = _timed_write_records
+    rng = random.Random(1)
+    cases = [
+        ("id-derived placeholder (1 dim)", None),
+        ("constant zero placeholder (1 dim)", lambda: [0.0]),
+        (f"full-size vectors ({FULL_DIMENSION} dims)", lambda: [rng.random() for _ in range(FULL_DIMENSION)]),
+    ]
+    
+    print(f"{'case':<40}{'ms/write':>10}{'ms in HNSW':>12}")
+    for name, vectors in cases:
+        total, vector = _run(vectors)
+        print(f"{name:<40}{total:>10.3f}{vector:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
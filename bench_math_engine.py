@@ -0,0 +1,51 @@
+"""
+Microbenchmarks for the per-call overhead of the math engine's point types
+
+Compares building validated Pydantic Coordinates for every distance call with
+the plain float, tuple and LatLng paths the internal code uses. Distances are
+memoized, so the timings are dominated by what happens around the lookup.
+
+    python bench_math_engine.py
+"""
+
+import timeit
+
+from models.domain import Coordinate
+from models.records import LatLng
+from services.math_engine import calculate_distance, math_engine
+
+DELHI = (28.6139, 77.2090)
+MUMBAI = (19.0760, 72.8777)
+ROUNDS = 200000
+
+
+def _per_call_ns(statement) -> float:
+    """Best of five runs, in nanoseconds per call"""
+    return min(timeit.repeat(statement, number=ROUNDS, repeat=5)) / ROUNDS * 1e9
+
+
+def main():
+    (lat1, lng1), (lat2, lng2) = DELHI, MUMBAI
+    coordinate_a, coordinate_b = Coordinate(lat=lat1, lng=lng1), Coordinate(lat=lat2, lng=lng2)
+    point_a, point_b = LatLng(lat1, lng1), LatLng(lat2, lng2)
+    
+    cases = [
+        ("Coordinate(lat, lng) construction", lambda: Coordinate(lat=lat1, lng=lng1)),
+        ("LatLng(lat, lng) construction", lambda: LatLng(lat1, lng1)),
+        ("distance, two new Coordinates per call", lambda: math_engine.calculate_distance(
+            Coordinate(lat=lat1, lng=lng1), Coordinate(lat=lat2, lng=lng2))),
+        ("distance, two new LatLngs per call", lambda: math_engine.calculate_distance(
+            LatLng(lat1, lng1), LatLng(lat2, lng2))),
+        ("distance, existing Coordinates", lambda: math_engine.calculate_distance(coordinate_a, coordinate_b)),
+        ("distance, existing LatLngs", lambda: math_engine.calculate_distance(point_a, point_b)),
+        ("distance, (lat, lng) tuples", lambda: math_engine.calculate_distance(DELHI, MUMBAI)),
+        ("calculate_distance(lat1, lng1, lat2, lng2)", lambda: calculate_distance(lat1, lng1, lat2, lng2)),
+    ]
+    
+    print(f"{'case':<45}{'ns/call':>10}")
+    for name, statement in cases:
+        print(f"{name:<45}{_per_call_ns(statement):>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,8 +6,73 @@ import os
 class Settings(BaseSettings):
     """Application configuration settings"""
     
+    # Storage backend: "chroma" (embedded ChromaDB) or "sqlite"
+    storage_backend: str = "chroma"
+    sqlite_database_path: str = os.getenv("SQLITE_DATABASE_PATH", "./sqlite_data/deadheading.db")
+    
+    # Storage server socket; when set, API workers forward database calls to
+    # `python -m storage.server` instead of opening the data files themselves
+    storage_server_socket: str = os.getenv("STORAGE_SERVER_SOCKET", "")
+    storage_server_pool_size: int = 8
+    storage_server_timeout: float = 30.0
+    # Lock file electing the one worker that runs background schedulers
+    scheduler_lock_path: str = os.getenv("SCHEDULER_LOCK_PATH", "./scheduler.lock")
+    
     # ChromaDB (embedded, no setup needed!)
     chroma_persist_directory: str = os.getenv("CHROMA_PERSIST_DIRECTORY", "./chroma_data")
+    # Comma-separated collections whose documents get semantic embeddings.
+    # All other collections are stored as plain records (no embedding model).
+    chroma_semantic_collections: str = ""
+    # Max records held by the by-id entity cache (0 disables it)
+    entity_cache_size: int = 1024
+    # Recent change events kept for replay by change feed consumers
+    change_feed_size: int = 10000
+    # Working-set collections held in memory with write-behind persistence ("" disables)
+    hot_collections: str = "trucks,drivers,loads,trips,allocations"
+    hot_store_flush_interval: float = 1.0
+    hot_store_flush_size: int = 500
+    # Persist every hot-store write before returning (otherwise only money-related ones)
+    hot_store_sync_writes: bool = False
+    # Most concurrent writes committed in one backend transaction
+    group_commit_max_batch: int = 256
+    # Cell edge, in degrees, of the grid index over available-load pickup and destination points
+    geo_index_cell_degrees: float = 1.0
+    
+    # Road network for distances (.npz built by `python -m services.road_network`, or an .osm
+    # extract); "" estimates road distance as haversine * 1.3
+    road_network_path: str = os.getenv("ROAD_NETWORK_PATH", "")
+    # Points farther than this from any road node fall back to the estimate
+    road_network_max_snap_km: float = 5.0
+    # Memoized road distances, keyed on coordinates rounded to distance_cache_precision
+    # decimal places (6 ≈ 0.1 m); sizes are entry counts, 0 disables
+    distance_cache_size: int = 100000
+    distance_cache_precision: int = 6
+    # Memoized pickup -> delivery distance of each load
+    load_leg_cache_size: int = 20000
+    # Opt-in hub table in front of the road network: road km between market yards and
+    # delivery cities are measured once, and a query between road nodes within hub_snap_km
+    # of a hub is answered from the table when its error bound (measured on the network)
+    # is within distance_accuracy_tolerance of the distance. Unused without a road network;
+    # 0 disables.
+    hub_snap_km: float = 0.0
+    # .npz file the hub table is stored in ("" measures it at startup)
+    hub_table_path: str = os.getenv("HUB_TABLE_PATH", "")
+    
+    # GPS track store (columnar time series, one partition per vehicle per day). Tracks
+    # move to the archive after archive_after_days and are deleted, from the track store
+    # or the archive, after track_retention_days (run by the archival job)
+    track_store_directory: str = os.getenv("TRACK_STORE_DIRECTORY", "./track_data")
+    track_retention_days: int = 90
+    
+    # Cold archive for terminal-state records (delivered loads, completed trips, read notifications)
+    archive_directory: str = os.getenv("ARCHIVE_DIRECTORY", "./archive_data")
+    archive_after_days: int = 30
+    # Hours between background archival runs (0 disables the job)
+    archive_interval_hours: float = 24.0
+    
+    # List endpoint pagination, used when a request passes limit or cursor
+    default_page_size: int = 100
+    max_page_size: int = 500
     
     # Redis (optional)
     redis_url: str = "redis://localhost:6379/0"
@@ -5,18 +5,62 @@ Stores all data locally in ./chroma_data directory
 
 import chromadb
 from chromadb.config import Settings
-import uuid
-from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Iterable, Tuple
 import json
+import threading
+import zlib
 
+from config import settings
+from storage.base import BaseDatabase
+from storage.client import RemoteDatabase
+from storage.indexes import SecondaryIndex
+from storage.query import compile_where, matches, sort_records, page_records
+from storage.sqlite_backend import SQLiteDatabase
 
-class ChromaDatabase:
+
+# Metadata fields with maintained equality indexes, per collection
+INDEXED_FIELDS = {
+    "loads": ("status", "assigned_trip_id", "vendor_id"),
+    "trucks": ("owner_id",),
+    "trips": ("status",),
+    "drivers": ("truck_id",),
+    "allocations": ("status", "vehicle_id", "load_id"),
+    "notifications": ("driver_id",),
+    "expenses": ("driver_id",),
+}
+
+
+class ChromaDatabase(BaseDatabase):
     """Embedded ChromaDB for storing all application data"""
     
-    def __init__(self, persist_directory="./chroma_data"):
-        """Initialize ChromaDB client"""
-        self.client = chromadb.PersistentClient(path=persist_directory)
+    def __init__(self, persist_directory: str = None, semantic_collections: Iterable[str] = None,
+                 track_directory: str = None, hot_collections: Iterable[str] = None,
+                 archive_directory: str = None):
+        """
+        Initialize ChromaDB client
+        
+        Args:
+            persist_directory: Data directory (defaults to settings.chroma_persist_directory)
+            semantic_collections: Collections whose documents are embedded for
+                semantic search (defaults to settings.chroma_semantic_collections).
+                All other collections are plain record stores.
+            track_directory: GPS track store directory (defaults to settings.track_store_directory)
+            hot_collections: Collections held in memory with write-behind persistence
+                (defaults to settings.hot_collections)
+            archive_directory: Cold archive directory (defaults to settings.archive_directory)
+        """
+        super().__init__(track_directory, hot_collections, archive_directory)
+        self.persist_directory = persist_directory or settings.chroma_persist_directory
+        if semantic_collections is None:
+            semantic_collections = [
+                name.strip() for name in settings.chroma_semantic_collections.split(",")
+                if name.strip()
+            ]
+        self.semantic_collections = set(semantic_collections)
+        self._placeholder_dimensions = {}
+        self._collections = {}
+        
+        self.client = chromadb.PersistentClient(path=self.persist_directory)
         
         # Create collections for each entity type
         self.owners = self._get_or_create_collection("owners")
@@ -36,471 +80,253 @@ class ChromaDatabase:
         self.location_history = self._get_or_create_collection("location_history")
         self.notifications = self._get_or_create_collection("notifications")
         
+        # Current position per vehicle (record id = vehicle_id)
+        self.vehicle_positions = self._get_or_create_collection("vehicle_positions")
+        
+        # Secondary indexes for status and foreign-key lookups
+        self.indexes = SecondaryIndex(INDEXED_FIELDS)
+        self._build_indexes()
+        self._backfill_vehicle_positions()
+        self._migrate_location_history()
+        self._load_hot_set()
+    
     def _get_or_create_collection(self, name: str):
         """Get or create a collection"""
-        try:
-            return self.client.get_collection(name)
-        except:
-            return self.client.create_collection(name)
+        self._collections[name] = self._open_collection(name)
+        return self._collections[name]
     
-    # ==================== OWNERS ====================
-    
-    def create_owner(self, name: str, email: str) -> Dict:
-        """Create a new owner"""
-        owner_id = str(uuid.uuid4())
-        owner = {
-            "owner_id": owner_id,
-            "name": name,
-            "email": email,
-            "created_at": datetime.utcnow().isoformat()
-        }
+    def _open_collection(self, name: str):
+        if name in self.semantic_collections:
+            try:
+                return self.client.get_collection(name)
+            except:
+                return self.client.create_collection(name)
         
-        self.owners.add(
-            ids=[owner_id],
-            documents=[name],  # For search
-            metadatas=[owner]
-        )
-        return owner
-    
-    def get_owner(self, owner_id: str) -> Optional[Dict]:
-        """Get owner by ID"""
+        # Plain record collections never load the embedding model
         try:
-            result = self.owners.get(ids=[owner_id])
-            if result['ids']:
-                return result['metadatas'][0]
+            return self.client.get_collection(name, embedding_function=None)
         except:
-            pass
-        return None
+            return self.client.create_collection(name, embedding_function=None)
     
-    # ==================== DRIVERS ====================
+    def _collection(self, name: str):
+        """Look up a collection by name"""
+        if name not in self._collections:
+            raise ValueError(f"Unknown collection: {name}")
+        return self._collections[name]
     
-    def create_driver(self, name: str, phone: str, truck_id: str, hourly_rate: float = 25.0) -> Dict:
-        """Create a new driver"""
-        driver_id = str(uuid.uuid4())
-        driver = {
-            "driver_id": driver_id,
-            "name": name,
-            "phone": phone,
-            "truck_id": truck_id,
-            "hourly_rate": hourly_rate,
-            "created_at": datetime.utcnow().isoformat()
-        }
+    def _placeholder_embeddings(self, collection, ids: List[str]) -> List[List[float]]:
+        """
+        Cheap vectors stored for plain records instead of real embeddings.
         
-        self.drivers.add(
-            ids=[driver_id],
-            documents=[name],
-            metadatas=[driver]
-        )
-        return driver
-    
-    def get_driver(self, driver_id: str) -> Optional[Dict]:
-        """Get driver by ID"""
-        try:
-            result = self.drivers.get(ids=[driver_id])
-            if result['ids']:
-                return result['metadatas'][0]
-        except:
-            pass
-        return None
-    
-    # ==================== VENDORS ====================
-    
-    def create_vendor(self, name: str, email: str, phone: str, location_lat: float, location_lng: float) -> Dict:
-        """Create a new vendor"""
-        vendor_id = str(uuid.uuid4())
-        vendor = {
-            "vendor_id": vendor_id,
-            "name": name,
-            "email": email,
-            "phone": phone,
-            "location_lat": location_lat,
-            "location_lng": location_lng,
-            "created_at": datetime.utcnow().isoformat()
-        }
+        Plain records cannot be kept out of the vector segment: every Chroma
+        write goes through one embeddings queue, and the collection's HNSW
+        segment is opened and fed from it on every add or upsert, with a vector
+        required per record. What is left to cut is the cost of indexing them.
+        A one-dimensional vector costs nothing to compute and little to index,
+        and deriving it from the record id keeps the vectors distinct, since
+        identical vectors all tie in the HNSW neighbour search and are slower
+        to insert. bench_chroma_writes.py measures the vector segment's share
+        of a write.
         
-        self.vendors.add(
-            ids=[vendor_id],
-            documents=[name],
-            metadatas=[vendor]
-        )
-        return vendor
-    
-    def get_vendor(self, vendor_id: str) -> Optional[Dict]:
-        """Get vendor by ID"""
-        try:
-            result = self.vendors.get(ids=[vendor_id])
-            if result['ids']:
-                return result['metadatas'][0]
-        except:
-            pass
-        return None
-    
-    # ==================== TRUCKS ====================
-    
-    def create_truck(self, owner_id: str, license_plate: str, fuel_consumption_rate: float = 0.35) -> Dict:
-        """Create a new truck"""
-        truck_id = str(uuid.uuid4())
-        truck = {
-            "truck_id": truck_id,
-            "owner_id": owner_id,
-            "license_plate": license_plate,
-            "fuel_consumption_rate": fuel_consumption_rate,
-            "status": "idle",
-            "created_at": datetime.utcnow().isoformat()
-        }
+        Collections created by older versions already hold full-size embeddings,
+        so the placeholder matches whatever dimension the collection has.
+        """
+        dimension = self._placeholder_dimensions.get(collection.name)
+        if dimension is None:
+            dimension = 1
+            try:
+                existing = collection.peek(1)
+                if existing['embeddings']:
+                    dimension = len(existing['embeddings'][0])
+            except:
+                pass
+            self._placeholder_dimensions[collection.name] = dimension
+        padding = [0.0] * (dimension - 1)
+        return [[float(zlib.crc32(record_id.encode()))] + padding for record_id in ids]
+    
+    # ==================== BACKEND PRIMITIVES ====================
+    
+    def _store_add(self, collection: str, ids: List[str], records: List[Dict], documents: List[str]):
+        """Insert records, embedding documents only for semantic collections"""
+        store = self._collection(collection)
+        if collection in self.semantic_collections:
+            store.add(ids=ids, documents=documents, metadatas=records)
+        else:
+            store.add(ids=ids, embeddings=self._placeholder_embeddings(store, ids), metadatas=records)
+    
+    def _store_update(self, collection: str, ids: List[str], records: List[Dict], documents: List[str] = None):
+        """Update records, re-embedding documents only for semantic collections"""
+        store = self._collection(collection)
+        if documents is not None and collection in self.semantic_collections:
+            store.update(ids=ids, documents=documents, metadatas=records)
+        else:
+            store.update(ids=ids, metadatas=records)
+    
+    def _store_upsert(self, collection: str, ids: List[str], records: List[Dict], documents: List[str]):
+        """Insert or replace records, embedding documents only for semantic collections"""
+        store = self._collection(collection)
+        if collection in self.semantic_collections:
+            store.upsert(ids=ids, documents=documents, metadatas=records)
+        else:
+            store.upsert(ids=ids, embeddings=self._placeholder_embeddings(store, ids), metadatas=records)
+    
+    def _store_get(self, collection: str, ids: List[str]) -> List[Dict]:
+        result = self._collection(collection).get(ids=ids, include=["metadatas"])
+        return result['metadatas'] if result['ids'] else []
+    
+    def _store_select(self, collection: str, conditions: List[Tuple], order_by=None,
+                      limit: int = None, offset: int = 0) -> List[Dict]:
+        plan = self._plan(collection, conditions)
+        if plan is None:
+            return []
+        store, query, residual = plan
         
-        self.trucks.add(
-            ids=[truck_id],
-            documents=[license_plate],
-            metadatas=[truck]
-        )
-        return truck
-    
-    def get_truck(self, truck_id: str) -> Optional[Dict]:
-        """Get truck by ID"""
-        try:
-            result = self.trucks.get(ids=[truck_id])
-            if result['ids']:
-                return result['metadatas'][0]
-        except:
-            pass
-        return None
-    
-    # ==================== TRIPS ====================
-    
-    def create_trip(self, driver_id: str, truck_id: str, origin_lat: float, origin_lng: float,
-                   origin_address: str, destination_lat: float, destination_lng: float,
-                   destination_address: str, outbound_load: str) -> Dict:
-        """Create a new trip"""
-        trip_id = str(uuid.uuid4())
-        trip = {
-            "trip_id": trip_id,
-            "driver_id": driver_id,
-            "truck_id": truck_id,
-            "origin_lat": origin_lat,
-            "origin_lng": origin_lng,
-            "origin_address": origin_address,
-            "destination_lat": destination_lat,
-            "destination_lng": destination_lng,
-            "destination_address": destination_address,
-            "outbound_load": outbound_load,
-            "is_deadheading": False,
-            "status": "active",
-            "created_at": datetime.utcnow().isoformat(),
-            "completed_at": ""  # Empty string instead of None
-        }
+        paged_in_store = not residual and not order_by
+        if paged_in_store:
+            if limit is not None:
+                query["limit"] = limit
+            if offset:
+                query["offset"] = offset
         
-        self.trips.add(
-            ids=[trip_id],
-            documents=[f"{origin_address} to {destination_address}"],
-            metadatas=[trip]
-        )
-        return trip
-    
-    def get_trip(self, trip_id: str) -> Optional[Dict]:
-        """Get trip by ID"""
-        try:
-            result = self.trips.get(ids=[trip_id])
-            if result['ids']:
-                return result['metadatas'][0]
-        except:
-            pass
-        return None
-    
-    def update_trip(self, trip_id: str, updates: Dict) -> Optional[Dict]:
-        """Update trip"""
-        trip = self.get_trip(trip_id)
-        if trip:
-            trip.update(updates)
-            self.trips.update(
-                ids=[trip_id],
-                documents=[f"{trip['origin_address']} to {trip['destination_address']}"],
-                metadatas=[trip]
-            )
-            return trip
-        return None
-    
-    def mark_deadheading(self, trip_id: str) -> Optional[Dict]:
-        """Mark trip as deadheading"""
-        return self.update_trip(trip_id, {"is_deadheading": True})
-    
-    # ==================== LOADS ====================
-    
-    def create_load(self, vendor_id: str, weight_kg: float, pickup_lat: float, pickup_lng: float,
-                   pickup_address: str, destination_lat: float, destination_lng: float,
-                   destination_address: str, price_offered: float, currency: str = "INR") -> Dict:
-        """Create a new load"""
-        load_id = str(uuid.uuid4())
-        load = {
-            "load_id": load_id,
-            "vendor_id": vendor_id,
-            "weight_kg": weight_kg,
-            "pickup_lat": pickup_lat,
-            "pickup_lng": pickup_lng,
-            "pickup_address": pickup_address,
-            "destination_lat": destination_lat,
-            "destination_lng": destination_lng,
-            "destination_address": destination_address,
-            "price_offered": price_offered,
-            "currency": currency,
-            "status": "available",
-            "assigned_driver_id": "",  # Empty string instead of None
-            "assigned_trip_id": "",  # Empty string instead of None
-            "created_at": datetime.utcnow().isoformat(),
-            "assigned_at": "",
-            "picked_up_at": "",
-            "delivered_at": ""
-        }
+        result = store.get(**query)
+        records = result['metadatas'] if result['ids'] else []
+        if paged_in_store:
+            return records
         
-        self.loads.add(
-            ids=[load_id],
-            documents=[f"{pickup_address} to {destination_address}"],
-            metadatas=[load]
-        )
-        return load
-    
-    def get_load(self, load_id: str) -> Optional[Dict]:
-        """Get load by ID"""
-        try:
-            result = self.loads.get(ids=[load_id])
-            if result['ids']:
-                return result['metadatas'][0]
-        except:
-            pass
-        return None
-    
-    def get_available_loads(self) -> List[Dict]:
-        """Get all available loads"""
-        try:
-            result = self.loads.get()
-            if result['ids']:
-                return [meta for meta in result['metadatas'] if meta.get('status') == 'available']
-        except:
-            pass
-        return []
-    
-    def update_load(self, load_id: str, updates: Dict) -> Optional[Dict]:
-        """Update load"""
-        load = self.get_load(load_id)
-        if load:
-            load.update(updates)
-            self.loads.update(
-                ids=[load_id],
-                documents=[f"{load['pickup_address']} to {load['destination_address']}"],
-                metadatas=[load]
-            )
-            return load
-        return None
-    
-    def accept_load(self, load_id: str, trip_id: str, driver_id: str) -> Optional[Dict]:
-        """Accept a load"""
-        return self.update_load(load_id, {
-            "status": "assigned",
-            "assigned_trip_id": trip_id,
-            "assigned_driver_id": driver_id,
-            "assigned_at": datetime.utcnow().isoformat()
-        })
-    
-    # ==================== ALLOCATIONS ====================
-    
-    def create_allocation(self, vehicle_id: str, load_id: str, owner_id: str) -> Dict:
-        """Create a new manual allocation"""
-        allocation_id = str(uuid.uuid4())
-        allocation = {
-            "allocation_id": allocation_id,
-            "vehicle_id": vehicle_id,
-            "load_id": load_id,
-            "owner_id": owner_id,
-            "status": "active",
-            "allocated_at": datetime.utcnow().isoformat(),
-            "completed_at": "",
-            "cancelled_at": "",
-            "created_at": datetime.utcnow().isoformat()
-        }
-        
-        self.allocations.add(
-            ids=[allocation_id],
-            documents=[f"Allocation {vehicle_id} to {load_id}"],
-            metadatas=[allocation]
-        )
-        return allocation
-    
-    def get_allocation(self, allocation_id: str) -> Optional[Dict]:
-        """Get allocation by ID"""
-        try:
-            result = self.allocations.get(ids=[allocation_id])
-            if result['ids']:
-                return result['metadatas'][0]
-        except:
-            pass
-        return None
-    
-    def get_active_allocations(self) -> List[Dict]:
-        """Get all active allocations"""
-        try:
-            result = self.allocations.get()
-            if result['ids']:
-                return [meta for meta in result['metadatas'] if meta.get('status') == 'active']
-        except:
-            pass
-        return []
-    
-    def get_driver_allocations(self, driver_id: str) -> List[Dict]:
-        """Get all allocations for a driver"""
-        try:
-            result = self.allocations.get()
-            if result['ids']:
-                allocations = []
-                for meta in result['metadatas']:
-                    # Get truck for this allocation
-                    truck = self.get_truck(meta.get('vehicle_id', ''))
-                    if truck:
-                        # Get driver for this truck
-                        driver = self.get_driver(driver_id)
-                        if driver and driver.get('truck_id') == truck.get('truck_id'):
-                            allocations.append(meta)
-                return allocations
-        except:
-            pass
-        return []
-    
-    def update_allocation(self, allocation_id: str, updates: Dict) -> Optional[Dict]:
-        """Update allocation"""
-        allocation = self.get_allocation(allocation_id)
-        if allocation:
-            allocation.update(updates)
-            self.allocations.update(
-                ids=[allocation_id],
-                documents=[f"Allocation {allocation['vehicle_id']} to {allocation['load_id']}"],
-                metadatas=[allocation]
-            )
-            return allocation
-        return None
-    
-    def cancel_allocation(self, allocation_id: str) -> Optional[Dict]:
-        """Cancel an allocation"""
-        return self.update_allocation(allocation_id, {
-            "status": "cancelled",
-            "cancelled_at": datetime.utcnow().isoformat()
-        })
-    
-    # ==================== LOCATION HISTORY ====================
-    
-    def add_location_update(self, vehicle_id: str, latitude: float, longitude: float, accuracy: float) -> Dict:
-        """Add a location update for a vehicle"""
-        location_id = str(uuid.uuid4())
-        location = {
-            "location_id": location_id,
-            "vehicle_id": vehicle_id,
-            "latitude": latitude,
-            "longitude": longitude,
-            "accuracy": accuracy,
-            "recorded_at": datetime.utcnow().isoformat(),
-            "created_at": datetime.utcnow().isoformat()
-        }
+        records = sort_records([r for r in records if matches(r, residual)], order_by)
+        end = offset + limit if limit is not None else None
+        return records[offset:end]
+    
+    def _store_page(self, collection: str, conditions: List[Tuple], field: str, descending: bool,
+                    after: Optional[Tuple], limit: int) -> List[Tuple[Tuple, Dict]]:
+        """Keys every matching row, then heap-selects only the requested window"""
+        plan = self._plan(collection, conditions)
+        if plan is None:
+            return []
+        store, query, residual = plan
+        result = store.get(**query)
         
-        self.location_history.add(
-            ids=[location_id],
-            documents=[f"Location {vehicle_id}"],
-            metadatas=[location]
+        rows = (
+            (record_id, record) for record_id, record in zip(result['ids'], result['metadatas'])
+            if matches(record, residual)
         )
-        return location
-    
-    def get_latest_location(self, vehicle_id: str) -> Optional[Dict]:
-        """Get the latest location for a vehicle"""
-        try:
-            result = self.location_history.get()
-            if result['ids']:
-                vehicle_locations = [meta for meta in result['metadatas'] 
-                                   if meta.get('vehicle_id') == vehicle_id]
-                if vehicle_locations:
-                    # Sort by recorded_at and return latest
-                    vehicle_locations.sort(key=lambda x: x.get('recorded_at', ''), reverse=True)
-                    return vehicle_locations[0]
-        except:
-            pass
-        return None
-    
-    # ==================== NOTIFICATIONS ====================
-    
-    def create_notification(self, driver_id: str, notification_type: str, title: str, 
-                          message: str, load_id: str = "", waypoint_type: str = "") -> Dict:
-        """Create a notification for a driver"""
-        notification_id = str(uuid.uuid4())
-        notification = {
-            "notification_id": notification_id,
-            "driver_id": driver_id,
-            "type": notification_type,
-            "title": title,
-            "message": message,
-            "load_id": load_id,
-            "waypoint_type": waypoint_type,
-            "is_read": False,
-            "created_at": datetime.utcnow().isoformat()
-        }
-        
-        self.notifications.add(
-            ids=[notification_id],
-            documents=[title],
-            metadatas=[notification]
-        )
-        return notification
-    
-    def get_driver_notifications(self, driver_id: str) -> List[Dict]:
-        """Get all notifications for a driver"""
-        try:
-            result = self.notifications.get()
-            if result['ids']:
-                return [meta for meta in result['metadatas'] 
-                       if meta.get('driver_id') == driver_id]
-        except:
-            pass
-        return []
-    
-    def get_unread_count(self, driver_id: str) -> int:
-        """Get count of unread notifications for a driver"""
-        notifications = self.get_driver_notifications(driver_id)
-        return len([n for n in notifications if not n.get('is_read', False)])
-    
-    def mark_notification_read(self, notification_id: str) -> Optional[Dict]:
-        """Mark a notification as read"""
-        notification = self.get_notification(notification_id)
-        if notification:
-            notification['is_read'] = True
-            self.notifications.update(
-                ids=[notification_id],
-                documents=[notification['title']],
-                metadatas=[notification]
-            )
-            return notification
-        return None
-    
-    def get_notification(self, notification_id: str) -> Optional[Dict]:
-        """Get notification by ID"""
-        try:
-            result = self.notifications.get(ids=[notification_id])
-            if result['ids']:
-                return result['metadatas'][0]
-        except:
-            pass
-        return None
-    
-    # ==================== UTILITY ====================
-    
-    def clear_all_data(self):
-        """Clear all data (for testing)"""
-        collections = [self.owners, self.drivers, self.vendors, self.trucks, 
-                      self.trips, self.loads, self.load_assignments,
-                      self.allocations, self.location_history, self.notifications]
-        for collection in collections:
+        return page_records(rows, field, descending, after, limit)
+    
+    def _store_count(self, collection: str, conditions: List[Tuple]) -> int:
+        if not conditions:
+            return self._collection(collection).count()
+        if len(conditions) == 1:
+            field, operator, value = conditions[0]
+            if operator == "$eq" and self.indexes.covers(collection, field):
+                return self.indexes.count(collection, field, value)
+        return len(self._store_select(collection, conditions))
+    
+    def _store_clear(self, collections: Tuple[str, ...]):
+        for name in collections:
             try:
-                self.client.delete_collection(collection.name)
+                self.client.delete_collection(name)
             except:
                 pass
+            self._placeholder_dimensions.pop(name, None)
+            setattr(self, name, self._get_or_create_collection(name))
+            if name in INDEXED_FIELDS:
+                self.indexes.rebuild(name, [], [])
+    
+    def _store_delete(self, collection: str, ids: List[str]):
+        self._collection(collection).delete(ids=ids)
+        for record_id in ids:
+            self.indexes.remove(collection, record_id)
+    
+    def _trips_with_loads(self, trip_ids: List[str]) -> set:
+        """The assigned_trip_id postings are the maintained trip -> load mapping"""
+        if self.hot.holds("loads"):
+            # Store postings only follow flushed writes
+            return super()._trips_with_loads(trip_ids)
+        return {trip_id for trip_id in trip_ids if self.indexes.count("loads", "assigned_trip_id", trip_id)}
+    
+    def _plan(self, collection_name: str, conditions: List[Tuple]):
+        """
+        Turn normalized conditions into a ChromaDB get() query plus residual Python predicates
+        
+        Returns:
+            (collection, query kwargs, residual conditions), or None when an
+            index lookup already proves nothing matches
+        """
+        collection = self._collection(collection_name)
         
-        # Recreate collections
-        self.__init__()
+        # Narrow to an index posting list when an indexed field is matched exactly
+        ids = None
+        for position, (field, operator, value) in enumerate(conditions):
+            if operator == "$eq" and self.indexes.covers(collection_name, field):
+                ids = self.indexes.lookup(collection_name, field, value)
+                conditions = conditions[:position] + conditions[position + 1:]
+                break
+        if ids is not None and not ids:
+            return None
+        
+        # Equality and numeric range filters run inside ChromaDB; string prefixes
+        # and sorting need the narrowed rows in Python
+        chroma_where, residual = compile_where(conditions)
+        
+        query = {"include": ["metadatas"]}
+        if ids is not None:
+            query["ids"] = ids
+        if chroma_where:
+            query["where"] = chroma_where
+        return collection, query, residual
+    
+    # ==================== SECONDARY INDEXES ====================
+    
+    def _after_write(self, collection: str, ids: List[str], metadatas: List[Dict]):
+        """Bring the secondary indexes and entity cache in step with a write"""
+        for record_id, metadata in zip(ids, metadatas):
+            self.indexes.put(collection, record_id, metadata)
+        super()._after_write(collection, ids, metadatas)
+    
+    def _build_indexes(self):
+        """Load indexed fields of every indexed collection (one scan at startup)"""
+        for name in INDEXED_FIELDS:
+            collection = self._collection(name)
+            try:
+                result = collection.get(include=["metadatas"])
+                self.indexes.rebuild(name, result['ids'], result['metadatas'])
+            except:
+                self.indexes.rebuild(name, [], [])
+
+
+def create_database(backend: str = None, local: bool = False) -> BaseDatabase:
+    """
+    Create the database for a storage backend
+    
+    Args:
+        backend: "chroma" or "sqlite" (defaults to settings.storage_backend)
+        local: Open the store in this process even when settings.storage_server_socket
+            is set (the storage server itself does this)
+    """
+    if settings.storage_server_socket and not local:
+        return RemoteDatabase()
+    backend = (backend or settings.storage_backend).lower()
+    if backend == "chroma":
+        return ChromaDatabase()
+    if backend == "sqlite":
+        return SQLiteDatabase()
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+_db_lock = threading.Lock()
 
 
-# Global database instance
-db = ChromaDatabase()
+def __getattr__(name: str):
+    """
+    Global database instance, opened on first use
+    
+    `from db_chromadb import db` opens it; importing only create_database (as
+    the storage server does) leaves it unopened, so a process never holds two
+    databases on the same files.
+    """
+    if name != "db":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _db_lock:
+        if "db" not in globals():
+            globals()["db"] = create_database()
+    return globals()["db"]
@@ -2,6 +2,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from config import settings
 from api import trips, loads, calculate, vendors, demo, scheduler, financial_reports, report_scheduler, allocations
+from db_chromadb import db
+from services.archive_scheduler import archive_scheduler
+from services.scheduler_lock import SchedulerLockedError
 
 app = FastAPI(
     title="Deadheading Optimization System",
@@ -16,6 +19,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include routers
@@ -45,6 +49,24 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.on_event("startup")
+def start_archival():
+    """Start background archival of terminal-state records (in one worker only)"""
+    if settings.archive_interval_hours > 0:
+        try:
+            archive_scheduler.start()
+        except SchedulerLockedError:
+            pass
+
+
+@app.on_event("shutdown")
+def flush_database():
+    """Persist queued hot-store writes before the process exits"""
+    if archive_scheduler.is_running:
+        archive_scheduler.stop()
+    db.close()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
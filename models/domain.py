@@ -208,6 +208,11 @@ class LocationUpdate(BaseModel):
     accuracy: float
 
 
+class RecordedLocationUpdate(LocationUpdate):
+    """Location update from driver with the time it was taken, for batch uploads"""
+    recordedAt: Optional[datetime] = None
+
+
 class Notification(BaseModel):
     """Notification for driver"""
     id: str
@@ -0,0 +1,227 @@
+"""
+Compact internal records for the matching pipeline
+Slotted entity records and a struct-of-arrays LoadTable; API responses keep
+using the Pydantic models in models.domain
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+# Load status <-> small integer code stored in LoadTable.status
+LOAD_STATUSES = ("available", "assigned", "picked_up", "delivered", "cancelled")
+STATUS_CODES = {status: code for code, status in enumerate(LOAD_STATUSES)}
+UNKNOWN_STATUS = -1
+
+
+class LatLng:
+    """
+    A location for internal geometry.
+    
+    Plain slots and no validation, so building one costs about as much as a
+    tuple; coordinates arriving through the API are validated once as
+    models.domain.Coordinate. Unpacks as (lat, lng).
+    """
+    __slots__ = ("lat", "lng", "address")
+    
+    def __init__(self, lat: float, lng: float, address: Optional[str] = None):
+        self.lat = lat
+        self.lng = lng
+        self.address = address
+    
+    def __iter__(self):
+        yield self.lat
+        yield self.lng
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, LatLng):
+            return NotImplemented
+        return (self.lat, self.lng, self.address) == (other.lat, other.lng, other.address)
+    
+    def __repr__(self) -> str:
+        return f"LatLng({self.lat}, {self.lng})" if self.address is None else f"LatLng({self.lat}, {self.lng}, {self.address!r})"
+
+
+# A location accepted by the geometry APIs: a LatLng, a (lat, lng) pair, a dict
+# with lat and lng keys, or any object with lat and lng attributes (e.g. a Coordinate)
+Point = Union[LatLng, Tuple[float, float], Dict]
+
+
+def lat_lng(point: Point) -> Tuple[float, float]:
+    """(lat, lng) of any Point"""
+    if isinstance(point, tuple):
+        return float(point[0]), float(point[1])
+    if isinstance(point, dict):
+        return float(point["lat"]), float(point["lng"])
+    if hasattr(point, "lat"):
+        return float(point.lat), float(point.lng)
+    return float(point[0]), float(point[1])
+
+
+class LoadRecord:
+    """One load, as read by the matching pipeline"""
+    __slots__ = (
+        "load_id", "vendor_id", "weight_kg",
+        "pickup_lat", "pickup_lng", "pickup_address",
+        "destination_lat", "destination_lng", "destination_address",
+        "price_offered", "status",
+    )
+    
+    def __init__(self, load_id: str, vendor_id: str, weight_kg: float,
+                 pickup_lat: float, pickup_lng: float, pickup_address: str,
+                 destination_lat: float, destination_lng: float, destination_address: str,
+                 price_offered: float, status: str = "available"):
+        self.load_id = load_id
+        self.vendor_id = vendor_id
+        self.weight_kg = weight_kg
+        self.pickup_lat = pickup_lat
+        self.pickup_lng = pickup_lng
+        self.pickup_address = pickup_address
+        self.destination_lat = destination_lat
+        self.destination_lng = destination_lng
+        self.destination_address = destination_address
+        self.price_offered = price_offered
+        self.status = status
+    
+    @classmethod
+    def from_metadata(cls, load: Dict) -> "LoadRecord":
+        """Build from a stored load record"""
+        return cls(
+            str(load['load_id']), str(load['vendor_id']), float(load['weight_kg']),
+            float(load['pickup_lat']), float(load['pickup_lng']), load.get('pickup_address', ''),
+            float(load['destination_lat']), float(load['destination_lng']), load.get('destination_address', ''),
+            float(load['price_offered']), load.get('status', 'available')
+        )
+    
+    def to_match(self, deviation_km: float) -> Dict:
+        """Matched-load dict handed to route and financial analysis"""
+        return {
+            "load_id": self.load_id,
+            "vendor_id": self.vendor_id,
+            "weight_kg": self.weight_kg,
+            "pickup_location": {
+                "lat": self.pickup_lat,
+                "lng": self.pickup_lng,
+                "address": self.pickup_address
+            },
+            "destination": {
+                "lat": self.destination_lat,
+                "lng": self.destination_lng,
+                "address": self.destination_address
+            },
+            "price_offered": self.price_offered,
+            "deviation_km": deviation_km
+        }
+
+
+class TruckRecord:
+    """One truck, as read by allocation and scheduling"""
+    __slots__ = ("truck_id", "owner_id", "license_plate", "fuel_consumption_rate", "status")
+    
+    def __init__(self, truck_id: str, owner_id: str, license_plate: str,
+                 fuel_consumption_rate: float = 0.35, status: str = "idle"):
+        self.truck_id = truck_id
+        self.owner_id = owner_id
+        self.license_plate = license_plate
+        self.fuel_consumption_rate = fuel_consumption_rate
+        self.status = status
+    
+    @classmethod
+    def from_metadata(cls, truck: Dict) -> "TruckRecord":
+        """Build from a stored truck record"""
+        return cls(
+            truck['truck_id'], truck.get('owner_id', ''), truck.get('license_plate', 'Unknown'),
+            float(truck.get('fuel_consumption_rate', 0.35)), truck.get('status', 'idle')
+        )
+
+
+class LoadTable:
+    """
+    Struct-of-arrays batch of loads.
+    
+    Row i of every array describes the load ids[i]. Coordinates, prices and
+    weights are float64 arrays and status is an int8 code (see STATUS_CODES),
+    so per-load arithmetic runs vectorized over the whole batch.
+    """
+    __slots__ = (
+        "ids", "vendor_ids", "pickup_addresses", "destination_addresses",
+        "pickup_lat", "pickup_lng", "destination_lat", "destination_lng",
+        "price", "weight", "status",
+    )
+    
+    def __init__(self, ids: List[str], vendor_ids: List[str],
+                 pickup_addresses: List[str], destination_addresses: List[str],
+                 pickup_lat: np.ndarray, pickup_lng: np.ndarray,
+                 destination_lat: np.ndarray, destination_lng: np.ndarray,
+                 price: np.ndarray, weight: np.ndarray, status: np.ndarray):
+        self.ids = ids
+        self.vendor_ids = vendor_ids
+        self.pickup_addresses = pickup_addresses
+        self.destination_addresses = destination_addresses
+        self.pickup_lat = pickup_lat
+        self.pickup_lng = pickup_lng
+        self.destination_lat = destination_lat
+        self.destination_lng = destination_lng
+        self.price = price
+        self.weight = weight
+        self.status = status
+    
+    @classmethod
+    def from_records(cls, loads: Iterable[Union[Dict, LoadRecord]]) -> "LoadTable":
+        """Build from stored load dicts or LoadRecords"""
+        records = [
+            load if isinstance(load, LoadRecord) else LoadRecord.from_metadata(load)
+            for load in loads
+        ]
+        
+        def column(name: str, dtype=np.float64) -> np.ndarray:
+            return np.fromiter((getattr(r, name) for r in records), dtype=dtype, count=len(records))
+        
+        return cls(
+            ids=[r.load_id for r in records],
+            vendor_ids=[r.vendor_id for r in records],
+            pickup_addresses=[r.pickup_address for r in records],
+            destination_addresses=[r.destination_address for r in records],
+            pickup_lat=column("pickup_lat"),
+            pickup_lng=column("pickup_lng"),
+            destination_lat=column("destination_lat"),
+            destination_lng=column("destination_lng"),
+            price=column("price_offered"),
+            weight=column("weight_kg"),
+            status=np.fromiter(
+                (STATUS_CODES.get(r.status, UNKNOWN_STATUS) for r in records),
+                dtype=np.int8, count=len(records)
+            )
+        )
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def take(self, rows) -> "LoadTable":
+        """Subset by a boolean mask or an array of row numbers, keeping row order"""
+        rows = np.flatnonzero(rows) if np.asarray(rows).dtype == bool else np.asarray(rows, dtype=np.intp)
+        return LoadTable(
+            ids=[self.ids[i] for i in rows],
+            vendor_ids=[self.vendor_ids[i] for i in rows],
+            pickup_addresses=[self.pickup_addresses[i] for i in rows],
+            destination_addresses=[self.destination_addresses[i] for i in rows],
+            pickup_lat=self.pickup_lat[rows],
+            pickup_lng=self.pickup_lng[rows],
+            destination_lat=self.destination_lat[rows],
+            destination_lng=self.destination_lng[rows],
+            price=self.price[rows],
+            weight=self.weight[rows],
+            status=self.status[rows]
+        )
+    
+    def row(self, index: int) -> LoadRecord:
+        """One row as a LoadRecord"""
+        code = int(self.status[index])
+        return LoadRecord(
+            self.ids[index], self.vendor_ids[index], float(self.weight[index]),
+            float(self.pickup_lat[index]), float(self.pickup_lng[index]), self.pickup_addresses[index],
+            float(self.destination_lat[index]), float(self.destination_lng[index]),
+            self.destination_addresses[index], float(self.price[index]),
+            LOAD_STATUSES[code] if code != UNKNOWN_STATUS else "unknown"
+        )
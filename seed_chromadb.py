@@ -119,54 +119,56 @@ def seed_data():
     
     # Create Available Loads
     print("\n📦 Creating Available Loads...")
-    load1 = db.create_load(
-        vendor_id=vendor1["vendor_id"],
-        weight_kg=5000,
-        pickup_lat=28.6517,
-        pickup_lng=77.2219,
-        pickup_address="Connaught Place, Delhi",
-        destination_lat=28.6900,
-        destination_lng=77.1500,
-        destination_address="Pitampura, Delhi",
-        price_offered=5000,
-        currency="INR"
-    )
-    load2 = db.create_load(
-        vendor_id=vendor2["vendor_id"],
-        weight_kg=7000,
-        pickup_lat=28.4595,
-        pickup_lng=77.0266,
-        pickup_address="Gurgaon, India",
-        destination_lat=28.7041,
-        destination_lng=77.1025,
-        destination_address="Rohini, Delhi",
-        price_offered=8000,
-        currency="INR"
-    )
-    load3 = db.create_load(
-        vendor_id=vendor3["vendor_id"],
-        weight_kg=3000,
-        pickup_lat=28.5355,
-        pickup_lng=77.3910,
-        pickup_address="Noida, India",
-        destination_lat=28.6139,
-        destination_lng=77.2090,
-        destination_address="Delhi, India",
-        price_offered=4000,
-        currency="INR"
-    )
-    load4 = db.create_load(
-        vendor_id=vendor1["vendor_id"],
-        weight_kg=6000,
-        pickup_lat=18.6298,
-        pickup_lng=73.7997,
-        pickup_address="Lonavala, India",
-        destination_lat=19.0760,
-        destination_lng=72.8777,
-        destination_address="Mumbai, India",
-        price_offered=7000,
-        currency="INR"
-    )
+    db.create_loads([
+        {
+            "vendor_id": vendor1["vendor_id"],
+            "weight_kg": 5000,
+            "pickup_lat": 28.6517,
+            "pickup_lng": 77.2219,
+            "pickup_address": "Connaught Place, Delhi",
+            "destination_lat": 28.6900,
+            "destination_lng": 77.1500,
+            "destination_address": "Pitampura, Delhi",
+            "price_offered": 5000,
+            "currency": "INR"
+        },
+        {
+            "vendor_id": vendor2["vendor_id"],
+            "weight_kg": 7000,
+            "pickup_lat": 28.4595,
+            "pickup_lng": 77.0266,
+            "pickup_address": "Gurgaon, India",
+            "destination_lat": 28.7041,
+            "destination_lng": 77.1025,
+            "destination_address": "Rohini, Delhi",
+            "price_offered": 8000,
+            "currency": "INR"
+        },
+        {
+            "vendor_id": vendor3["vendor_id"],
+            "weight_kg": 3000,
+            "pickup_lat": 28.5355,
+            "pickup_lng": 77.3910,
+            "pickup_address": "Noida, India",
+            "destination_lat": 28.6139,
+            "destination_lng": 77.2090,
+            "destination_address": "Delhi, India",
+            "price_offered": 4000,
+            "currency": "INR"
+        },
+        {
+            "vendor_id": vendor1["vendor_id"],
+            "weight_kg": 6000,
+            "pickup_lat": 18.6298,
+            "pickup_lng": 73.7997,
+            "pickup_address": "Lonavala, India",
+            "destination_lat": 19.0760,
+            "destination_lng": 72.8777,
+            "destination_address": "Mumbai, India",
+            "price_offered": 7000,
+            "currency": "INR"
+        }
+    ])
     print(f"✅ Created 4 available loads")
     
     print("\n" + "="*60)
@@ -61,8 +61,11 @@ def seed_demo_data():
         (22.5726, 88.3639, "Kolkata")     # Kolkata
     ]
     
+    db.add_location_updates([
+        {"vehicle_id": trucks[i]['truck_id'], "latitude": lat, "longitude": lng, "accuracy": 10.0}
+        for i, (lat, lng, city) in enumerate(locations)
+    ])
     for i, (lat, lng, city) in enumerate(locations):
-        db.add_location_update(trucks[i]['truck_id'], lat, lng, 10.0)
         print(f"   ✓ Location added: {truck_plates[i]} at {city}")
     
     # 5. Create Vendors
@@ -93,19 +96,23 @@ def seed_demo_data():
         (2, 4500, 12.9716, 77.5946, "Whitefield, Bangalore", 17.3850, 78.4867, "Hyderabad, Telangana", 16000),
     ]
     
-    for vendor_idx, weight, p_lat, p_lng, p_addr, d_lat, d_lng, d_addr, price in loads_data:
-        load = db.create_load(
-            vendor_id=vendors[vendor_idx]['vendor_id'],
-            weight_kg=weight,
-            pickup_lat=p_lat,
-            pickup_lng=p_lng,
-            pickup_address=p_addr,
-            destination_lat=d_lat,
-            destination_lng=d_lng,
-            destination_address=d_addr,
-            price_offered=price,
-            currency="INR"
-        )
+    result = db.create_loads([
+        {
+            "vendor_id": vendors[vendor_idx]['vendor_id'],
+            "weight_kg": weight,
+            "pickup_lat": p_lat,
+            "pickup_lng": p_lng,
+            "pickup_address": p_addr,
+            "destination_lat": d_lat,
+            "destination_lng": d_lng,
+            "destination_address": d_addr,
+            "price_offered": price,
+            "currency": "INR"
+        }
+        for vendor_idx, weight, p_lat, p_lng, p_addr, d_lat, d_lng, d_addr, price in loads_data
+    ])
+    for load in result['created']:
+        p_addr, d_addr, price = load['pickup_address'], load['destination_address'], load['price_offered']
         print(f"   ✓ Load created: {p_addr.split(',')[0]} → {d_addr.split(',')[0]} (₹{price:,})")
     
     print("\n" + "=" * 60)
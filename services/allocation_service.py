@@ -8,7 +8,8 @@ from datetime import datetime
 import math
 
 from db_chromadb import db
-from services.math_engine import calculate_distance
+from models.records import TruckRecord
+from services.math_engine import calculate_distance, math_engine
 
 
 class AllocationService:
@@ -16,54 +17,85 @@ class AllocationService:
     
     MAX_ALLOCATION_DISTANCE_KM = 500  # Maximum distance for allocation
     
+    # Collections whose changes invalidate owner statistics
+    STATISTICS_INPUTS = ("trucks", "loads", "allocations")
+    
+    def __init__(self):
+        # owner_id -> (change feed sequence, statistics computed at it)
+        self._statistics = {}
+    
     def get_owner_statistics(self, owner_id: str) -> Dict:
-        """Calculate owner dashboard statistics"""
-        # Get all trucks for this owner
-        all_trucks = self._get_all_trucks()
-        owner_trucks = [t for t in all_trucks if t.get('owner_id') == owner_id]
+        """Calculate owner dashboard statistics, reused until a truck, load or allocation changes"""
+        cached = self._statistics.get(owner_id)
+        if cached and not db.changes.changed_since(cached[0], self.STATISTICS_INPUTS):
+            return dict(cached[1], lastUpdated=datetime.utcnow().isoformat())
+        sequence = db.changes.sequence
         
-        # Get all loads
-        all_loads_result = db.loads.get()
-        all_loads = all_loads_result['metadatas'] if all_loads_result['ids'] else []
-        
-        # Get all allocations
-        all_allocations_result = db.allocations.get()
-        all_allocations = all_allocations_result['metadatas'] if all_allocations_result['ids'] else []
+        # Get all trucks for this owner
+        owner_trucks = db.get_owner_trucks(owner_id)
         
-        # Calculate statistics
+        # Calculate statistics (load and allocation counts come from the status indexes)
         total_active_vehicles = len([t for t in owner_trucks if t.get('status') != 'inactive'])
-        total_pending_loads = len([l for l in all_loads if l.get('status') == 'available'])
-        total_allocated_loads = len([a for a in all_allocations if a.get('status') == 'active'])
-        total_completed_loads = len([l for l in all_loads if l.get('status') == 'delivered'])
+        total_pending_loads = db.count_by_field("loads", "status", "available")
+        total_allocated_loads = db.count_by_field("allocations", "status", "active")
+        total_completed_loads = db.count_by_field("loads", "status", "delivered")
         
         allocation_rate = (total_allocated_loads / total_pending_loads * 100) if total_pending_loads > 0 else 0
         
         # Calculate vehicle utilization (simplified)
         vehicle_utilization = (total_allocated_loads / total_active_vehicles * 100) if total_active_vehicles > 0 else 0
         
-        return {
+        statistics = {
             "totalActiveVehicles": total_active_vehicles,
             "totalPendingLoads": total_pending_loads,
             "totalAllocatedLoads": total_allocated_loads,
             "totalCompletedLoads": total_completed_loads,
             "allocationRate": round(allocation_rate, 2),
-            "averageVehicleUtilization": round(min(vehicle_utilization, 100), 2),
-            "lastUpdated": datetime.utcnow().isoformat()
+            "averageVehicleUtilization": round(min(vehicle_utilization, 100), 2)
         }
+        self._statistics[owner_id] = (sequence, statistics)
+        
+        # Nothing has changed since the figures were computed, so they are current as of now
+        return dict(statistics, lastUpdated=datetime.utcnow().isoformat())
     
     def get_available_vehicles(self, owner_id: str) -> List[Dict]:
         """Get all available vehicles for allocation"""
-        all_trucks = self._get_all_trucks()
-        owner_trucks = [t for t in all_trucks if t.get('owner_id') == owner_id]
+        owner_trucks = db.get_owner_trucks(owner_id)
+        
+        # Skip trucks that are already allocated or deadheading
+        available_trucks = [
+            truck for truck in owner_trucks
+            if truck.get('status') not in ['allocated', 'deadheading']
+        ]
+        return self._vehicle_infos(available_trucks)
+    
+    def get_available_vehicles_page(self, owner_id: str, limit: int,
+                                    cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Get one page of available vehicles, oldest registration first
+        
+        Returns:
+            (vehicles, next_cursor); next_cursor is None on the last page
+        """
+        trucks, next_cursor = db.page(
+            "trucks",
+            where={"owner_id": owner_id, "status": {"$nin": ["allocated", "deadheading"]}},
+            limit=limit,
+            cursor=cursor
+        )
+        return self._vehicle_infos(trucks), next_cursor
+    
+    def _vehicle_infos(self, trucks: List[Dict]) -> List[Dict]:
+        """Build vehicle info rows with current position and distance to the nearest load"""
+        trucks = [TruckRecord.from_metadata(truck) for truck in trucks]
+        
+        # Current positions for the whole batch in one lookup
+        locations = db.get_latest_locations([t.truck_id for t in trucks])
         
         available_vehicles = []
-        for truck in owner_trucks:
-            # Skip if truck is already allocated or deadheading
-            if truck.get('status') in ['allocated', 'deadheading']:
-                continue
-            
+        for truck in trucks:
             # Get latest location
-            location = db.get_latest_location(truck['truck_id'])
+            location = locations.get(truck.truck_id)
             if not location:
                 # Default location if no GPS data
                 location = {
@@ -79,14 +111,14 @@ class AllocationService:
             )
             
             available_vehicles.append({
-                "id": truck['truck_id'],
-                "name": truck.get('license_plate', 'Unknown'),
+                "id": truck.truck_id,
+                "name": truck.license_plate,
                 "currentLocation": {
                     "latitude": location['latitude'],
                     "longitude": location['longitude'],
                     "address": "Current Location"
                 },
-                "status": truck.get('status', 'idle'),
+                "status": truck.status,
                 "distanceToNearestLoad": round(nearest_distance, 2)
             })
         
@@ -94,31 +126,37 @@ class AllocationService:
     
     def get_unallocated_loads(self) -> List[Dict]:
         """Get all unallocated loads"""
-        available_loads = db.get_available_loads()
-        
-        unallocated = []
-        for load in available_loads:
-            # Skip if load is deadheading or already allocated
-            if load.get('status') not in ['available']:
-                continue
-            
-            unallocated.append({
-                "id": load['load_id'],
-                "pickupLocation": {
-                    "lat": load['pickup_lat'],
-                    "lng": load['pickup_lng'],
-                    "address": load.get('pickup_address', 'Pickup Location')
-                },
-                "destination": {
-                    "lat": load['destination_lat'],
-                    "lng": load['destination_lng'],
-                    "address": load.get('destination_address', 'Destination')
-                },
-                "status": load['status'],
-                "specialInstructions": load.get('special_instructions', None)
-            })
-        
-        return unallocated
+        return [self._load_info(load) for load in db.get_available_loads()]
+    
+    def get_unallocated_loads_page(self, limit: int,
+                                   cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Get one page of unallocated loads, oldest posting first
+        
+        Returns:
+            (loads, next_cursor); next_cursor is None on the last page
+        """
+        loads, next_cursor = db.page("loads", where={"status": "available"}, limit=limit, cursor=cursor)
+        return [self._load_info(load) for load in loads], next_cursor
+    
+    @staticmethod
+    def _load_info(load: Dict) -> Dict:
+        """Build a load info row"""
+        return {
+            "id": load['load_id'],
+            "pickupLocation": {
+                "lat": load['pickup_lat'],
+                "lng": load['pickup_lng'],
+                "address": load.get('pickup_address', 'Pickup Location')
+            },
+            "destination": {
+                "lat": load['destination_lat'],
+                "lng": load['destination_lng'],
+                "address": load.get('destination_address', 'Destination')
+            },
+            "status": load['status'],
+            "specialInstructions": load.get('special_instructions', None)
+        }
     
     def get_compatible_loads(self, vehicle_id: str) -> List[Dict]:
         """Get loads compatible with a vehicle, sorted by distance"""
@@ -127,8 +165,13 @@ class AllocationService:
         if not location:
             return []
         
-        # Get all unallocated loads
-        loads = self.get_unallocated_loads()
+        # Unallocated loads whose pickup can be within range, from the spatial index
+        candidates = db.loads_within(
+            location['latitude'],
+            location['longitude'],
+            math_engine.search_radius_km(self.MAX_ALLOCATION_DISTANCE_KM)
+        )
+        loads = [self._load_info(load) for load in candidates]
         
         # Calculate distance to each load and filter
         compatible = []
@@ -211,24 +254,28 @@ class AllocationService:
     
     def create_allocation(self, vehicle_id: str, load_id: str, owner_id: str) -> Dict:
         """Create a new allocation"""
-        # Validate
+        # Validate against the truck status read before validation
+        truck = db.get_truck(vehicle_id)
         is_valid, message = self.validate_allocation(vehicle_id, load_id)
         if not is_valid:
             raise ValueError(message)
         
-        # Create allocation
-        allocation = db.create_allocation(vehicle_id, load_id, owner_id)
-        
-        # Update truck status
-        truck = db.get_truck(vehicle_id)
-        if truck:
-            db.trucks.update(
-                ids=[vehicle_id],
-                metadatas=[{**truck, 'status': 'allocated'}]
-            )
+        # Claim the load first; raises ConflictError if another allocation took it
+        db.update_load(load_id, {'status': 'allocated'}, expected={'status': 'available'})
         
-        # Update load status
-        db.update_load(load_id, {'status': 'allocated'})
+        allocation = None
+        try:
+            # Create allocation
+            allocation = db.create_allocation(vehicle_id, load_id, owner_id)
+            
+            # Claim the truck; raises ConflictError if its status changed since validation
+            db.update_truck(vehicle_id, {'status': 'allocated'}, expected={'status': truck.get('status')})
+        except Exception:
+            # Release the claims so the load and truck can be allocated again
+            if allocation:
+                db.cancel_allocation(allocation['allocation_id'])
+            db.update_load(load_id, {'status': 'available'}, expected={'status': 'allocated'})
+            raise
         
         # Get driver for this truck
         driver = self._get_driver_for_truck(vehicle_id)
@@ -252,58 +299,38 @@ class AllocationService:
         if not allocation:
             raise ValueError("Allocation not found")
         
-        # Cancel allocation
+        # Cancel allocation; raises ConflictError if it is no longer active
         db.cancel_allocation(allocation_id)
         
         # Revert truck status
-        truck = db.get_truck(allocation['vehicle_id'])
-        if truck:
-            db.trucks.update(
-                ids=[allocation['vehicle_id']],
-                metadatas=[{**truck, 'status': 'idle'}]
-            )
+        db.update_truck(allocation['vehicle_id'], {'status': 'idle'})
         
         # Revert load status
         db.update_load(allocation['load_id'], {'status': 'available'})
         
         return allocation
     
-    def _get_all_trucks(self) -> List[Dict]:
-        """Get all trucks from database"""
-        try:
-            result = db.trucks.get()
-            return result['metadatas'] if result['ids'] else []
-        except:
-            return []
-    
     def _get_driver_for_truck(self, truck_id: str) -> Optional[Dict]:
         """Get driver assigned to a truck"""
-        try:
-            result = db.drivers.get()
-            if result['ids']:
-                for driver in result['metadatas']:
-                    if driver.get('truck_id') == truck_id:
-                        return driver
-        except:
-            pass
-        return None
+        return db.get_driver_for_truck(truck_id)
     
     def _calculate_distance_to_nearest_load(self, lat: float, lng: float) -> float:
-        """Calculate distance to nearest available load"""
-        loads = db.get_available_loads()
-        if not loads:
+        """Calculate road distance to nearest available load"""
+        # Road detours differ per pair, so the nearest pickup by straight line
+        # only bounds the answer; any load closer by road is within the search
+        # radius of that bound
+        nearest = db.nearest_loads(lat, lng, k=1)
+        if not nearest:
             return 0.0
-        
-        min_distance = float('inf')
-        for load in loads:
-            distance = calculate_distance(
-                lat, lng,
-                load['pickup_lat'],
-                load['pickup_lng']
-            )
-            min_distance = min(min_distance, distance)
-        
-        return min_distance if min_distance != float('inf') else 0.0
+        bound = calculate_distance(lat, lng, nearest[0]['pickup_lat'], nearest[0]['pickup_lng'])
+        
+        candidates = db.loads_within(lat, lng, math_engine.search_radius_km(bound))
+        if not candidates:
+            return bound
+        distances = math_engine.distances_from(
+            (lat, lng), ([load['pickup_lat'] for load in candidates], [load['pickup_lng'] for load in candidates])
+        )
+        return min(bound, float(distances.min()))
 
 
 # Global service instance
@@ -0,0 +1,91 @@
+"""
+Archive Scheduler Service
+Periodically moves terminal-state records out of the live collections and
+expires and compacts GPS tracks
+"""
+
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from datetime import datetime
+import logging
+from typing import Dict, Optional
+from config import settings
+from db_chromadb import db
+from services.scheduler_lock import scheduler_lock, SchedulerLockedError
+
+# Setup logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class ArchiveScheduler:
+    """Scheduler for background archival of delivered loads, completed trips and read notifications"""
+    
+    def __init__(self):
+        self.scheduler = BackgroundScheduler()
+        self.is_running = False
+        self.last_run: Optional[str] = None
+        self.last_result: Dict[str, int] = {}
+    
+    def start(self):
+        """Start the scheduler"""
+        if self.is_running:
+            logger.warning("Archive scheduler is already running")
+            return
+        if not scheduler_lock.acquire():
+            raise SchedulerLockedError(f"Schedulers run in another worker (pid {scheduler_lock.holder()})")
+        
+        self.scheduler.add_job(
+            self._archive,
+            IntervalTrigger(hours=settings.archive_interval_hours),
+            id='archive_terminal_records',
+            name='Archive terminal-state records',
+            replace_existing=True
+        )
+        
+        self.scheduler.start()
+        self.is_running = True
+        logger.info(f"Archive scheduler started. Running every {settings.archive_interval_hours} hours")
+    
+    def stop(self):
+        """Stop the scheduler"""
+        if not self.is_running:
+            logger.warning("Archive scheduler is not running")
+            return
+        
+        self.scheduler.shutdown()
+        self.is_running = False
+        logger.info("Archive scheduler stopped")
+    
+    def _archive(self) -> Dict[str, int]:
+        """Archive records past settings.archive_after_days, then apply GPS track retention and compaction"""
+        try:
+            result = db.archive_terminal_records()
+            result.update({name: count for name, count in db.apply_track_retention().items() if count})
+            self.last_run = datetime.utcnow().isoformat()
+            self.last_result = result
+            logger.info(f"Archival completed: {result or 'nothing to archive'}")
+            return result
+        
+        except Exception as e:
+            logger.error(f"Error in archival run: {str(e)}")
+            return {}
+    
+    def force_run(self) -> Dict[str, int]:
+        """Force immediate archival"""
+        return self._archive()
+    
+    def get_status(self) -> dict:
+        """Get scheduler status"""
+        job = self.scheduler.get_job('archive_terminal_records') if self.is_running else None
+        return {
+            "is_running": self.is_running,
+            "next_run_time": str(job.next_run_time) if job else None,
+            "last_run": self.last_run,
+            "last_result": self.last_result,
+            "archive": db.archive.stats()
+        }
+
+
+# Global scheduler instance
+archive_scheduler = ArchiveScheduler()
@@ -8,10 +8,13 @@ import time
 import threading
 from datetime import datetime
 from typing import List, Dict, Optional
+from config import settings
 from db_chromadb import db
 from services.math_engine import math_engine
 from agents.coordinator import coordinator_agent
-from models.domain import Coordinate
+from models.records import LatLng, LoadTable
+from services.scheduler_lock import scheduler_lock, SchedulerLockedError
+from storage.base import ConflictError
 
 
 class AutoScheduler:
@@ -34,14 +37,19 @@ class AutoScheduler:
             "total_matches": 0,
             "total_assignments": 0,
             "last_run_time": None,
-            "last_run_matches": 0
+            "last_run_matches": 0,
+            "skipped_runs": 0
         }
+        # Change feed sequence the last cycle read its inputs at
+        self._input_sequence = None
     
     def start(self):
         """Start the auto-scheduler background thread"""
         if self.running:
             print("⚠️  Auto-scheduler already running")
             return
+        if not scheduler_lock.acquire():
+            raise SchedulerLockedError(f"Schedulers run in another worker (pid {scheduler_lock.holder()})")
         
         self.running = True
         self.thread = threading.Thread(target=self._run_loop, daemon=True)
@@ -68,8 +76,17 @@ class AutoScheduler:
             # Sleep for interval
             time.sleep(self.interval_seconds)
     
-    def _run_scheduling_cycle(self):
-        """Run one scheduling cycle"""
+    def _run_scheduling_cycle(self, force: bool = False):
+        """Run one scheduling cycle; skipped when no trip or load changed since the last one"""
+        unchanged = (
+            self._input_sequence is not None
+            and not db.changes.changed_since(self._input_sequence, ("trips", "loads"))
+        )
+        if unchanged and not force:
+            self.stats["skipped_runs"] += 1
+            return
+        self._input_sequence = db.changes.sequence
+        
         print(f"\n{'='*60}")
         print(f"🤖 AUTO-SCHEDULER CYCLE - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*60}")
@@ -85,11 +102,11 @@ class AutoScheduler:
             print("   No active trips to schedule")
             return
         
-        # Step 2: Get available loads
-        available_loads = db.get_available_loads()
-        print(f"📦 Found {len(available_loads)} available loads")
+        # Step 2: Count available loads (each trip reads its nearby ones from the spatial index)
+        available_count = db.count_by_field("loads", "status", "available")
+        print(f"📦 Found {available_count} available loads")
         
-        if not available_loads:
+        if not available_count:
             print("   No available loads to assign")
             return
         
@@ -103,7 +120,7 @@ class AutoScheduler:
             print(f"   Route: {trip['origin_address'][:30]} → {trip['destination_address'][:30]}")
             
             # Find optimal load for this driver
-            optimal_load = self._find_optimal_load(trip, available_loads)
+            optimal_load = self._find_optimal_load(trip)
             
             if optimal_load:
                 matches_found += 1
@@ -116,9 +133,6 @@ class AutoScheduler:
                 if success:
                     assignments_made += 1
                     print(f"      ✅ Auto-assigned to driver")
-                    
-                    # Remove assigned load from available list
-                    available_loads = [l for l in available_loads if l['load_id'] != optimal_load['load_id']]
                 else:
                     print(f"      ❌ Assignment failed")
             else:
@@ -141,60 +155,33 @@ class AutoScheduler:
     def _get_active_trips(self) -> List[Dict]:
         """Get all active trips that need load matching"""
         try:
-            all_trips = db.trips.get()
-            
-            if not all_trips['ids']:
-                return []
-            
-            # Filter for active trips without assigned loads
-            active_trips = []
-            for trip_meta in all_trips['metadatas']:
-                # Check if trip is active and not completed
-                if trip_meta.get('status') == 'active':
-                    # Check if trip doesn't have a load assigned yet
-                    trip_id = trip_meta['trip_id']
-                    
-                    # Check if any load is assigned to this trip
-                    all_loads = db.loads.get()
-                    has_load = False
-                    
-                    if all_loads['ids']:
-                        for load_meta in all_loads['metadatas']:
-                            if load_meta.get('assigned_trip_id') == trip_id:
-                                has_load = True
-                                break
-                    
-                    if not has_load:
-                        active_trips.append(trip_meta)
-            
-            return active_trips
+            return db.trips_without_loads("active")
         except Exception as e:
             print(f"Error getting active trips: {e}")
             return []
     
-    def _find_optimal_load(self, trip: Dict, available_loads: List[Dict]) -> Optional[Dict]:
+    def _find_optimal_load(self, trip: Dict) -> Optional[Dict]:
         """
         Find the most optimal load for a trip using Math Engine and AI Agents
         
         Args:
             trip: Trip dictionary
-            available_loads: List of available loads
             
         Returns:
             Optimal load with profitability data, or None
         """
         try:
             # Create coordinates
-            driver_current = Coordinate(
-                lat=trip['origin_lat'],
-                lng=trip['origin_lng'],
-                address=trip['origin_address']
-            )
-            driver_destination = Coordinate(
-                lat=trip['destination_lat'],
-                lng=trip['destination_lng'],
-                address=trip['destination_address']
-            )
+            driver_current = LatLng(trip['origin_lat'], trip['origin_lng'], trip['origin_address'])
+            driver_destination = LatLng(trip['destination_lat'], trip['destination_lng'], trip['destination_address'])
+            
+            # Available loads inside the route corridor the deviation limit allows;
+            # loads assigned earlier in this cycle have already left the spatial index
+            available_loads = LoadTable.from_records(db.loads_in_corridor(
+                driver_current.lat, driver_current.lng,
+                driver_destination.lat, driver_destination.lng,
+                math_engine.corridor_length_km(driver_current, driver_destination, settings.max_route_deviation_km)
+            ))
             
             # Use AI Coordinator to get ranked recommendations
             print(f"   🤖 Using AI Agents for load matching...")
@@ -212,30 +199,18 @@ class AutoScheduler:
             print(f"   🧮 Calculating profitability with Math Engine...")
             loads_with_profit = []
             
-            for load in recommendations[:5]:  # Top 5 recommendations
-                vendor_pickup = Coordinate(
-                    lat=load['pickup_location']['lat'],
-                    lng=load['pickup_location']['lng'],
-                    address=load['pickup_location']['address']
-                )
-                vendor_destination = Coordinate(
-                    lat=load['destination']['lat'],
-                    lng=load['destination']['lng'],
-                    address=load['destination']['address']
-                )
-                
-                # Use Math Engine for precise calculations
-                profitability = math_engine.calculate_full_profitability(
-                    driver_current=driver_current,
-                    driver_destination=driver_destination,
-                    vendor_pickup=vendor_pickup,
-                    vendor_destination=vendor_destination,
-                    vendor_offering=load['price_offered']
-                )
-                
+            # Use Math Engine for precise calculations, top 5 recommendations in one pass
+            top = recommendations[:5]
+            rows = {load_id: i for i, load_id in enumerate(available_loads.ids)}
+            candidates = available_loads.take([rows[load['load_id']] for load in top])
+            profitability = math_engine.calculate_full_profitability_batch(
+                driver_current, driver_destination, candidates
+            )
+            
+            for i, load in enumerate(top):
                 # Only consider profitable loads
-                if profitability['net_profit'] > 0:
-                    load['profitability'] = profitability
+                if profitability['net_profit'][i] > 0:
+                    load['profitability'] = {name: float(values[i]) for name, values in profitability.items()}
                     loads_with_profit.append(load)
             
             if not loads_with_profit:
@@ -277,6 +252,9 @@ class AutoScheduler:
             )
             
             return True
+        except ConflictError as e:
+            print(f"   ⚠️  Load {load['load_id']} was taken concurrently: {e}")
+            return False
         except Exception as e:
             print(f"   ❌ Error assigning load: {e}")
             return False
@@ -292,7 +270,7 @@ class AutoScheduler:
     def force_run(self):
         """Force an immediate scheduling cycle (for testing)"""
         print("🔄 Forcing immediate scheduling cycle...")
-        self._run_scheduling_cycle()
+        self._run_scheduling_cycle(force=True)
 
 
 # Global instance
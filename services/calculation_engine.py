@@ -44,6 +44,23 @@ class CalculationEngine:
         # Default to other
         return "other"
     
+    @staticmethod
+    def _completed_trips(driver_id: str, date_str: str) -> List[Dict]:
+        """Trips of a driver completed on a specific day (including archived ones)"""
+        return db.find("trips", where={
+            "driver_id": driver_id,
+            "status": "completed",
+            "completed_at": {"$prefix": date_str}
+        }, include_archived=True)
+    
+    @staticmethod
+    def _daily_expenses(driver_id: str, date_str: str) -> List[Dict]:
+        """Expenses of a driver recorded on a specific day"""
+        return db.find("expenses", where={
+            "driver_id": driver_id,
+            "timestamp": {"$prefix": date_str}
+        })
+    
     @staticmethod
     def calculate_daily_earnings(driver_id: str, date_str: str) -> float:
         """
@@ -52,29 +69,13 @@ class CalculationEngine:
         Requirements: 3.1, 3.6
         """
         try:
-            result = db.trips.get()
-            
-            if not result['ids']:
-                return 0.0
-            
             total_earnings = 0.0
             
-            for metadata in result['metadatas']:
-                # Check if trip belongs to driver
-                if metadata.get('driver_id') != driver_id:
-                    continue
-                
-                # Check if trip is completed
-                if metadata.get('status') != 'completed':
-                    continue
-                
-                # Check if trip was completed on the specified date
-                completed_at = metadata.get('completed_at', '')
-                if completed_at and completed_at.startswith(date_str):
-                    # Get earnings from trip or associated load
-                    earnings = metadata.get('earnings', 0.0)
-                    if earnings:
-                        total_earnings += float(earnings)
+            for metadata in CalculationEngine._completed_trips(driver_id, date_str):
+                # Get earnings from trip or associated load
+                earnings = metadata.get('earnings', 0.0)
+                if earnings:
+                    total_earnings += float(earnings)
             
             return total_earnings
         
@@ -90,23 +91,11 @@ class CalculationEngine:
         Requirements: 3.2
         """
         try:
-            result = db.expenses.get()
-            
-            if not result['ids']:
-                return 0.0
-            
             total_expenses = 0.0
             
-            for metadata in result['metadatas']:
-                # Check if expense belongs to driver
-                if metadata.get('driver_id') != driver_id:
-                    continue
-                
-                # Check if expense was recorded on the specified date
-                timestamp = metadata.get('timestamp', '')
-                if timestamp and timestamp.startswith(date_str):
-                    amount = metadata.get('amount', 0.0)
-                    total_expenses += float(amount)
+            for metadata in CalculationEngine._daily_expenses(driver_id, date_str):
+                amount = metadata.get('amount', 0.0)
+                total_expenses += float(amount)
             
             return total_expenses
         
@@ -141,26 +130,14 @@ class CalculationEngine:
         }
         
         try:
-            result = db.expenses.get()
-            
-            if not result['ids']:
-                return breakdown
-            
-            for metadata in result['metadatas']:
-                # Check if expense belongs to driver
-                if metadata.get('driver_id') != driver_id:
-                    continue
+            for metadata in CalculationEngine._daily_expenses(driver_id, date_str):
+                category = metadata.get('category', 'other')
+                amount = metadata.get('amount', 0.0)
                 
-                # Check if expense was recorded on the specified date
-                timestamp = metadata.get('timestamp', '')
-                if timestamp and timestamp.startswith(date_str):
-                    category = metadata.get('category', 'other')
-                    amount = metadata.get('amount', 0.0)
-                    
-                    if category in breakdown:
-                        breakdown[category] += float(amount)
-                    else:
-                        breakdown['other'] += float(amount)
+                if category in breakdown:
+                    breakdown[category] += float(amount)
+                else:
+                    breakdown['other'] += float(amount)
             
             return breakdown
         
@@ -176,32 +153,16 @@ class CalculationEngine:
         Requirements: 4.2
         """
         try:
-            result = db.trips.get()
-            
-            if not result['ids']:
-                return []
-            
             trips = []
             
-            for metadata in result['metadatas']:
-                # Check if trip belongs to driver
-                if metadata.get('driver_id') != driver_id:
-                    continue
-                
-                # Check if trip is completed
-                if metadata.get('status') != 'completed':
-                    continue
-                
-                # Check if trip was completed on the specified date
-                completed_at = metadata.get('completed_at', '')
-                if completed_at and completed_at.startswith(date_str):
-                    trips.append({
-                        "trip_id": metadata.get('trip_id', ''),
-                        "origin": metadata.get('origin_address', ''),
-                        "destination": metadata.get('destination_address', ''),
-                        "load_details": metadata.get('outbound_load', ''),
-                        "earnings": float(metadata.get('earnings', 0.0))
-                    })
+            for metadata in CalculationEngine._completed_trips(driver_id, date_str):
+                trips.append({
+                    "trip_id": metadata.get('trip_id', ''),
+                    "origin": metadata.get('origin_address', ''),
+                    "destination": metadata.get('destination_address', ''),
+                    "load_details": metadata.get('outbound_load', ''),
+                    "earnings": float(metadata.get('earnings', 0.0))
+                })
             
             return trips
         
@@ -17,9 +17,9 @@ class DriverLoadsService:
     
     def get_allocated_loads(self, driver_id: str) -> Dict:
         """Get all allocated loads for a driver"""
-        # Get driver
-        driver = db.get_driver(driver_id)
-        if not driver:
+        # Driver, truck, active allocations, their loads and the truck position in one query
+        summary = db.get_driver_allocated_loads(driver_id)
+        if not summary:
             return {
                 "totalLoads": 0,
                 "totalDistance": 0,
@@ -27,40 +27,19 @@ class DriverLoadsService:
                 "loads": []
             }
         
-        # Get truck for driver
-        truck_id = driver.get('truck_id')
-        if not truck_id:
-            return {
-                "totalLoads": 0,
-                "totalDistance": 0,
-                "totalTime": 0,
-                "loads": []
+        # Get current vehicle location
+        location = summary['location']
+        if not location:
+            location = {
+                'latitude': 28.6139,
+                'longitude': 77.2090
             }
         
-        # Get allocations for this truck
-        allocations = db.get_driver_allocations(driver_id)
-        
         loads = []
         total_distance = 0
         total_time = 0
         
-        for allocation in allocations:
-            if allocation.get('status') != 'active':
-                continue
-            
-            # Get load details
-            load = db.get_load(allocation['load_id'])
-            if not load:
-                continue
-            
-            # Get current vehicle location
-            location = db.get_latest_location(truck_id)
-            if not location:
-                location = {
-                    'latitude': 28.6139,
-                    'longitude': 77.2090
-                }
-            
+        for allocation, load in summary['allocations']:
             # Calculate distance and time to pickup
             distance_to_pickup = calculate_distance(
                 location['latitude'],
@@ -164,9 +143,9 @@ class DriverLoadsService:
         })
         
         # Find and complete allocation
-        allocations = db.get_active_allocations()
+        allocations = db.get_by_field("allocations", "load_id", load_id)
         for allocation in allocations:
-            if allocation.get('load_id') == load_id:
+            if allocation.get('status') == 'active':
                 db.update_allocation(allocation['allocation_id'], {
                     'status': 'completed',
                     'completed_at': datetime.utcnow().isoformat()
@@ -175,12 +154,7 @@ class DriverLoadsService:
                 # Update truck status back to idle
                 truck_id = allocation.get('vehicle_id')
                 if truck_id:
-                    truck = db.get_truck(truck_id)
-                    if truck:
-                        db.trucks.update(
-                            ids=[truck_id],
-                            metadatas=[{**truck, 'status': 'idle'}]
-                        )
+                    db.update_truck(truck_id, {'status': 'idle'})
                 break
         
         return {"success": True, "message": "Load marked as completed"}
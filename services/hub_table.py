@@ -0,0 +1,217 @@
+"""
+Hub Distance Table
+Precomputed road distances between known market yards and city delivery
+points, answered in front of the road network
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Bump when the file layout changes; older files are rebuilt
+HUB_TABLE_VERSION = 2
+
+# Road nodes whose road km to or from their hub exceeds this many times
+# snap_km (the other side of a river, a one-way loop) are left unassigned
+MAX_LEG_DETOUR = 3.0
+
+
+class HubDistanceTable:
+    """
+    Road km between every pair of hubs, measured on a road network.
+    
+    The network answers a query as straight snapping leg + node-to-node km +
+    snapping leg, and each node-to-node query costs two hierarchy searches.
+    Most loads start at a handful of mandis and APMC yards and end in a
+    handful of cities, so the km between those hubs' road nodes are measured
+    once. Every road node within snap_km of a hub is assigned to its nearest
+    hub, and the road km from the hub's node to it and back are measured
+    too; the larger of the two is that node's leg error.
+    
+    A query between two points that snap to assigned nodes is answered as
+    snapping leg + hub-to-hub km + snapping leg, at the cost of two grid
+    lookups. Shortest road km obey the triangle inequality, so the answer is
+    off by at most the sum of the two nodes' leg errors; it is exact when
+    both points snap to a hub's own node. Queries whose bound exceeds
+    max_relative_error of the distance, and queries with an end on an
+    unassigned node, are not answered (NaN) and are left to the network.
+    """
+    
+    def __init__(self, network, names: List[str], lats: np.ndarray, lngs: np.ndarray,
+                 nodes: np.ndarray, km: np.ndarray, member_nodes: np.ndarray, member_hubs: np.ndarray,
+                 member_errors: np.ndarray, source: str = "", max_relative_error: float = 0.05):
+        """
+        Use build or load rather than calling this directly.
+        
+        Args:
+            network: RoadNetwork the table was measured on and snaps points with
+            names: Hub names
+            lats, lngs: Hub coordinates
+            nodes: Road node of each hub, -1 where the hub is off the network
+            km: (hubs, hubs) road km from each hub's node to each hub's node
+            member_nodes, member_hubs: Each assigned road node and the hub it belongs to
+            member_errors: Leg error of each assigned road node
+            source: What the distances were measured on; a stored table is
+                only reused for the same source
+            max_relative_error: Largest error bound accepted, as a fraction of the distance
+        """
+        self.network = network
+        self.names = list(names)
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+        self.nodes = np.asarray(nodes, dtype=np.int64)
+        self.km = np.asarray(km, dtype=np.float64)
+        self.member_nodes = np.asarray(member_nodes, dtype=np.int64)
+        self.member_hubs = np.asarray(member_hubs, dtype=np.int64)
+        self.member_errors = np.asarray(member_errors, dtype=np.float64)
+        self.source = source
+        self.max_relative_error = max_relative_error
+        
+        # road node -> (hub index, leg error km)
+        self._members: Dict[int, Tuple[int, float]] = {
+            node: (hub, error) for node, hub, error in zip(
+                self.member_nodes.tolist(), self.member_hubs.tolist(), self.member_errors.tolist()
+            )
+        }
+        # Largest amount an answer can fall short of the road km
+        self.max_error_km = 2 * float(self.member_errors.max()) if len(self.member_errors) else 0.0
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    # ==================== BUILDING ====================
+    
+    @classmethod
+    def build(cls, hubs: List[Dict], network, snap_km: float = 0.5, source: str = "",
+              **options) -> "HubDistanceTable":
+        """
+        Measure the table
+        
+        Args:
+            hubs: Dicts with name, lat and lng
+            network: RoadNetwork to measure on
+            snap_km: Straight-line km around a hub within which road nodes are assigned to it
+            source: Recorded with the table (see __init__)
+            options: max_relative_error
+        """
+        lats = np.array([hub["lat"] for hub in hubs], dtype=np.float64)
+        lngs = np.array([hub["lng"] for hub in hubs], dtype=np.float64)
+        snapped = [network.snap(lat, lng) for lat, lng in zip(lats, lngs)]
+        nodes = np.array([found[0] if found else -1 for found in snapped], dtype=np.int64)
+        on_network = np.flatnonzero(nodes >= 0)
+        
+        km = np.full((len(hubs), len(hubs)), np.nan)
+        km[np.ix_(on_network, on_network)] = network.node_matrix(nodes[on_network].tolist(), nodes[on_network].tolist())
+        
+        # Each road node near a hub goes to the nearest one
+        nearest: Dict[int, Tuple[float, int]] = {}
+        for hub in on_network:
+            for node, straight_km in network.nodes_within(lats[hub], lngs[hub], snap_km):
+                if straight_km < nearest.get(node, (np.inf, -1))[0]:
+                    nearest[node] = (straight_km, int(hub))
+        
+        member_nodes, member_hubs, member_errors = [], [], []
+        for hub in on_network:
+            members = [node for node, (_, owner) in nearest.items() if owner == hub]
+            if not members:
+                continue
+            outward = network.node_matrix([int(nodes[hub])], members)[0]
+            inward = network.node_matrix(members, [int(nodes[hub])])[:, 0]
+            errors = np.fmax(outward, inward)
+            kept = np.flatnonzero(~np.isnan(outward) & ~np.isnan(inward) & (errors <= MAX_LEG_DETOUR * snap_km))
+            member_nodes.extend(members[i] for i in kept)
+            member_hubs.extend([int(hub)] * len(kept))
+            member_errors.extend(errors[kept].tolist())
+        
+        return cls(network, [hub["name"] for hub in hubs], lats, lngs, nodes, km,
+                   member_nodes, member_hubs, member_errors, source, **options)
+    
+    def save(self, path: str):
+        """Write the table to a .npz file"""
+        np.savez_compressed(
+            path, version=HUB_TABLE_VERSION, names=np.array(self.names), source=np.array(self.source),
+            lats=self.lats, lngs=self.lngs, nodes=self.nodes, km=self.km, member_nodes=self.member_nodes,
+            member_hubs=self.member_hubs, member_errors=self.member_errors
+        )
+    
+    @classmethod
+    def load(cls, path: str, network, **options) -> "HubDistanceTable":
+        """Read a table written by save(), for the network it was measured on"""
+        with np.load(path) as data:
+            if int(data["version"]) != HUB_TABLE_VERSION:
+                raise ValueError(f"Hub table {path} has version {int(data['version'])}, expected {HUB_TABLE_VERSION}")
+            return cls(network, data["names"].tolist(), data["lats"], data["lngs"], data["nodes"], data["km"],
+                       data["member_nodes"], data["member_hubs"], data["member_errors"],
+                       str(data["source"]), **options)
+    
+    def matches(self, hubs: List[Dict], source: str) -> bool:
+        """Whether the table covers exactly these hubs, measured with this source"""
+        return (
+            self.source == source
+            and self.names == [hub["name"] for hub in hubs]
+            and np.array_equal(self.lats, [hub["lat"] for hub in hubs])
+            and np.array_equal(self.lngs, [hub["lng"] for hub in hubs])
+        )
+    
+    # ==================== QUERIES ====================
+    
+    def locate(self, lats: np.ndarray, lngs: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Hub of each point's road node
+        
+        Returns:
+            (hub index or -1 where the node is unassigned, snapping leg km, leg error km)
+        """
+        hubs = np.full(len(lats), -1, dtype=np.int64)
+        legs = np.zeros(len(lats))
+        errors = np.zeros(len(lats))
+        for i, (lat, lng) in enumerate(zip(lats, lngs)):
+            snapped = self.network.snap(lat, lng)
+            member = self._members.get(snapped[0]) if snapped else None
+            if member is not None:
+                hubs[i], errors[i] = member
+                legs[i] = snapped[1]
+        return hubs, legs, errors
+    
+    def matrix(self, origin_lats: np.ndarray, origin_lngs: np.ndarray,
+               destination_lats: np.ndarray, destination_lngs: np.ndarray) -> np.ndarray:
+        """(n, m) unrounded table km between every origin and every destination, NaN where not answered"""
+        origins, origin_legs, origin_errors = self.locate(origin_lats, origin_lngs)
+        destinations, destination_legs, destination_errors = self.locate(destination_lats, destination_lngs)
+        km = origin_legs[:, None] + self.km[origins[:, None], destinations[None, :]] + destination_legs[None, :]
+        bound = origin_errors[:, None] + destination_errors[None, :]
+        answered = (origins >= 0)[:, None] & (destinations >= 0)[None, :] & (bound <= self.max_relative_error * km)
+        return np.where(answered, km, np.nan)
+    
+    def pairwise(self, lats1: np.ndarray, lngs1: np.ndarray,
+                 lats2: np.ndarray, lngs2: np.ndarray) -> np.ndarray:
+        """Unrounded table km from each origin to the destination at the same position, NaN where not answered"""
+        origins, origin_legs, origin_errors = self.locate(lats1, lngs1)
+        destinations, destination_legs, destination_errors = self.locate(lats2, lngs2)
+        km = origin_legs + self.km[origins, destinations] + destination_legs
+        bound = origin_errors + destination_errors
+        answered = (origins >= 0) & (destinations >= 0) & (bound <= self.max_relative_error * km)
+        return np.where(answered, km, np.nan)
+    
+    def distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> Optional[float]:
+        """Unrounded table km between two points, or None if not answered"""
+        km = self.pairwise(np.array([lat1]), np.array([lng1]), np.array([lat2]), np.array([lng2]))[0]
+        return None if np.isnan(km) else float(km)
+    
+    def lookup(self, lat1: float, lng1: float, lat2: float, lng2: float) -> Optional[Dict]:
+        """
+        Table answer between two points with its error bound
+        
+        Returns:
+            Dict with from_hub, to_hub, distance_km and error_bound_km, or None
+            if either point is not on a road node assigned to a hub
+        """
+        (origin, destination), legs, errors = self.locate(np.array([lat1, lat2]), np.array([lng1, lng2]))
+        if origin < 0 or destination < 0:
+            return None
+        return {
+            "from_hub": self.names[origin],
+            "to_hub": self.names[destination],
+            "distance_km": float(legs[0] + self.km[origin, destination] + legs[1]),
+            "error_bound_km": float(errors.sum())
+        }
@@ -1,7 +1,54 @@
 import math
-from typing import Tuple
-from models.domain import Coordinate
+import os
+from typing import Dict, Tuple, Union
+
+import numpy as np
+from models.records import Point, lat_lng
 from config import settings
+from storage.cache import LRUCache
+
+
+# Points accepted by the vectorized distance functions: an (n, 2) array of
+# [lat, lng] rows, a (lats, lngs) pair of arrays, or a LoadTable (pickup points)
+Points = Union[np.ndarray, Tuple[np.ndarray, np.ndarray], "LoadTable"]
+
+# Distances within this many hundredths of a rounding midpoint are recomputed
+# with the scalar formula, so ulp-level differences between NumPy and math
+# cannot round the other way
+_MIDPOINT_MARGIN = 1e-6
+
+# Matrix elements computed per block; keeps the temporaries in cache
+_BLOCK_ELEMENTS = 1 << 17
+
+
+def _round_exact(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    Elementwise round(x, ndigits) with Python's exact semantics
+    
+    rint(x * 10**n) / 10**n agrees with round() everywhere except within an
+    ulp of a midpoint, so those few elements are rounded by round() itself.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scale = 10.0 ** ndigits
+    scaled = values * scale
+    rounded = np.rint(scaled) / scale
+    margin = 1e-9 + np.abs(scaled) * 1e-12
+    near = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) <= margin)
+    if near.size:
+        flat_values, flat_rounded = values.reshape(-1), rounded.reshape(-1)
+        for index in near:
+            flat_rounded[index] = round(float(flat_values[index]), ndigits)
+    return rounded
+
+
+def _as_points(points) -> Tuple[np.ndarray, np.ndarray]:
+    """Split points into float64 latitude and longitude arrays"""
+    if hasattr(points, "pickup_lat"):
+        return points.pickup_lat, points.pickup_lng
+    if isinstance(points, tuple) and len(points) == 2:
+        return np.asarray(points[0], dtype=np.float64), np.asarray(points[1], dtype=np.float64)
+    array = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    return array[:, 0], array[:, 1]
 
 
 class MathEngine:
@@ -19,24 +66,129 @@ class MathEngine:
         self.EARTH_RADIUS_KM = 6371.0
         # Road network adjustment factor (straight line * 1.3 ≈ road distance)
         self.ROAD_ADJUSTMENT_FACTOR = 1.3
+        
+        # Memoized distances shared by every caller: coordinate pairs, and the
+        # pickup -> delivery leg of each load (the same whatever trip it is matched to)
+        self.distance_cache = LRUCache(settings.distance_cache_size, copy=None)
+        self.load_leg_cache = LRUCache(settings.load_leg_cache_size, copy=None)
+        self.distance_cache_precision = settings.distance_cache_precision
+        
+        # Road-graph distances when a network is configured; pairs it cannot
+        # route (and everything without one) use haversine * ROAD_ADJUSTMENT_FACTOR
+        self.distance_provider = None
+        self.hub_table = None
+        provider = None
+        if settings.road_network_path:
+            try:
+                from services.road_network import load_road_network
+                provider = load_road_network(settings.road_network_path, settings.road_network_max_snap_km)
+            except Exception as e:
+                print(f"⚠️  Road network {settings.road_network_path} not loaded, using haversine distances: {e}")
+        self.set_distance_provider(provider)
+    
+    def set_distance_provider(self, provider):
+        """
+        Measure distances with a road-distance provider
+        
+        Args:
+            provider: Object with matrix(origin_lats, origin_lngs, destination_lats,
+                destination_lngs) and pairwise(lats1, lngs1, lats2, lngs2) returning
+                unrounded km (NaN where it cannot route), and a min_detour_factor
+                lower bound on road km per straight-line km; None restores
+                haversine * ROAD_ADJUSTMENT_FACTOR
+        """
+        self.distance_provider = provider
+        self.distance_cache.clear()
+        self.load_leg_cache.clear()
+        self._load_hub_table()
+    
+    def _load_hub_table(self):
+        """
+        Read the stored hub table if it is current, otherwise measure (and store) it
+        
+        The table answers hub-adjacent queries in front of a road network (see
+        HubDistanceTable); haversine estimates are cheaper than a table lookup
+        and never use one.
+        """
+        self.hub_table = None
+        from services.road_network import RoadNetwork
+        if settings.hub_snap_km <= 0 or not isinstance(self.distance_provider, RoadNetwork):
+            return
+        from services.hub_table import HubDistanceTable
+        from services.real_world_data import real_world_data
+        
+        network = self.distance_provider
+        hubs = real_world_data.hubs()
+        source = f"{network.fingerprint()}/{settings.hub_snap_km}"
+        options = {"max_relative_error": self.distance_accuracy_tolerance}
+        path = settings.hub_table_path
+        if path and os.path.exists(path):
+            try:
+                table = HubDistanceTable.load(path, network, **options)
+                if table.matches(hubs, source):
+                    self.hub_table = table
+                    return
+            except Exception as e:
+                print(f"⚠️  Hub table {path} not read, measuring it again: {e}")
+        
+        table = HubDistanceTable.build(hubs, network, settings.hub_snap_km, source, **options)
+        if path:
+            try:
+                table.save(path)
+            except Exception as e:
+                print(f"⚠️  Hub table not saved to {path}: {e}")
+        self.hub_table = table
     
-    def calculate_distance(self, point_a: Coordinate, point_b: Coordinate) -> float:
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters of the distance caches"""
+        return {"distances": self.distance_cache.stats(), "load_legs": self.load_leg_cache.stats()}
+    
+    def calculate_distance(self, point_a: Point, point_b: Point) -> float:
         """
         Calculate road distance between two geographic points in kilometers
         Uses Haversine formula with road network adjustment factor
         
         Args:
-            point_a: Starting coordinate
-            point_b: Ending coordinate
+            point_a: Starting point (LatLng, Coordinate, (lat, lng) or {"lat", "lng"} dict)
+            point_b: Ending point
             
         Returns:
             Distance in kilometers
         """
+        return self._road_distance(*lat_lng(point_a), *lat_lng(point_b))
+    
+    def _road_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+        """Scalar road distance (the reference every vectorized path must reproduce), memoized"""
+        precision = self.distance_cache_precision
+        key = (round(lat1, precision), round(lng1, precision), round(lat2, precision), round(lng2, precision))
+        distance = self.distance_cache.get(key)
+        if distance is None:
+            if self.hub_table is not None:
+                distance = self.hub_table.distance(lat1, lng1, lat2, lng2)
+                if distance is not None:
+                    distance = round(distance, 2)
+            if distance is None:
+                distance = self._measure_road_distance(lat1, lng1, lat2, lng2)
+            self.distance_cache.put(key, distance)
+        return distance
+    
+    def _measure_road_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+        """Scalar road distance without the cache or the hub table"""
+        if self.distance_provider is not None:
+            routed = self.distance_provider.matrix(
+                np.array([lat1]), np.array([lng1]), np.array([lat2]), np.array([lng2])
+            )[0, 0]
+            if not np.isnan(routed):
+                return round(float(routed), 2)
+        return self._haversine_road_distance(lat1, lng1, lat2, lng2)
+    
+    def _haversine_road_distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+        """Road distance estimated as haversine * ROAD_ADJUSTMENT_FACTOR"""
         # Convert latitude and longitude from degrees to radians
-        lat1_rad = math.radians(point_a.lat)
-        lon1_rad = math.radians(point_a.lng)
-        lat2_rad = math.radians(point_b.lat)
-        lon2_rad = math.radians(point_b.lng)
+        lat1_rad = math.radians(lat1)
+        lon1_rad = math.radians(lng1)
+        lat2_rad = math.radians(lat2)
+        lon2_rad = math.radians(lng2)
         
         # Haversine formula
         dlat = lat2_rad - lat1_rad
@@ -54,12 +206,245 @@ class MathEngine:
         
         return round(road_distance, 2)
     
+    def search_radius_km(self, road_distance_km: float) -> float:
+        """
+        Straight-line radius enclosing every point within a road distance
+        
+        For spatial index queries: the radius is padded so that no point whose
+        rounded road distance is exactly road_distance_km falls outside it.
+        """
+        return (road_distance_km + 0.005) / self._min_road_factor() + self._hub_slack_km() + 1e-6
+    
+    def corridor_length_km(self, driver_current, driver_destination, max_detour_km: float) -> float:
+        """
+        Straight-line bound on d(current, P) + d(P, destination) for any stop P
+        of a load whose detour adds at most max_detour_km of road distance
+        
+        For corridor (ellipse) queries on a spatial index. The detour is
+        current -> pickup -> delivery -> destination, so both the pickup and
+        the delivery point satisfy the bound; it is padded for the rounding of
+        the three road distances the detour is measured from and for any of
+        them being a hub table answer.
+        
+        Args:
+            driver_current: Driver's current location (see Point)
+            driver_destination: Driver's intended destination
+            max_detour_km: Largest extra road distance accepted
+        """
+        direct_distance = self._road_distance(*lat_lng(driver_current), *lat_lng(driver_destination))
+        return (direct_distance + max_detour_km + 0.02) / self._min_road_factor() + 3 * self._hub_slack_km() + 1e-6
+    
+    def _hub_slack_km(self) -> float:
+        """
+        Straight-line km a hub table answer can fall short of the road factor bound
+        
+        An answer is at most max_error_km below the road km it stands for.
+        """
+        return 0.0 if self.hub_table is None else self.hub_table.max_error_km / self._min_road_factor()
+    
+    def _min_road_factor(self) -> float:
+        """Lower bound on road km per straight-line km over every pair"""
+        if self.distance_provider is None:
+            return self.ROAD_ADJUSTMENT_FACTOR
+        return min(self.ROAD_ADJUSTMENT_FACTOR, self.distance_provider.min_detour_factor)
+    
+    def distances_from(self, point, points: Points) -> np.ndarray:
+        """
+        Road distance from one point to many points in kilometers
+        
+        Vectorized form of calculate_distance; every element equals the scalar result.
+        
+        Args:
+            point: Origin (see Point)
+            points: Destinations (see Points)
+            
+        Returns:
+            Array of distances in kilometers, one per destination
+        """
+        lat, lng = lat_lng(point)
+        lats, lngs = _as_points(points)
+        return self._road_distances(np.array([lat]), np.array([lng]), lats, lngs)[0]
+    
+    def distance_matrix(self, origins: Points, destinations: Points) -> np.ndarray:
+        """
+        Road distances between every origin and every destination in kilometers
+        
+        Vectorized form of calculate_distance; every element equals the scalar result.
+        
+        Args:
+            origins: Origin points (see Points)
+            destinations: Destination points (see Points)
+            
+        Returns:
+            (len(origins), len(destinations)) array of distances in kilometers
+        """
+        origin_lats, origin_lngs = _as_points(origins)
+        destination_lats, destination_lngs = _as_points(destinations)
+        return self._road_distances(origin_lats, origin_lngs, destination_lats, destination_lngs)
+    
+    def pairwise_distances(self, origins: Points, destinations: Points) -> np.ndarray:
+        """
+        Road distance from each origin to the destination at the same position in kilometers
+        
+        Vectorized form of calculate_distance; every element equals the scalar result.
+        
+        Args:
+            origins: Origin points (see Points)
+            destinations: Destination points, as many as origins
+            
+        Returns:
+            Array of distances in kilometers, one per pair
+        """
+        lats1, lngs1 = _as_points(origins)
+        lats2, lngs2 = _as_points(destinations)
+        if self.hub_table is None:
+            return self._measure_pairwise_distances(lats1, lngs1, lats2, lngs2)
+        
+        distances = _round_exact(self.hub_table.pairwise(lats1, lngs1, lats2, lngs2), 2)
+        missing = np.flatnonzero(np.isnan(distances))
+        if missing.size:
+            distances[missing] = self._measure_pairwise_distances(
+                lats1[missing], lngs1[missing], lats2[missing], lngs2[missing]
+            )
+        return distances
+    
+    def _measure_pairwise_distances(self, lats1: np.ndarray, lngs1: np.ndarray,
+                                    lats2: np.ndarray, lngs2: np.ndarray) -> np.ndarray:
+        """Pairwise road distances without the hub table"""
+        if self.distance_provider is None:
+            return self._haversine_pairwise_distances(lats1, lngs1, lats2, lngs2)
+        
+        distances = _round_exact(self.distance_provider.pairwise(lats1, lngs1, lats2, lngs2), 2)
+        missing = np.flatnonzero(np.isnan(distances))
+        if missing.size:
+            distances[missing] = self._haversine_pairwise_distances(
+                lats1[missing], lngs1[missing], lats2[missing], lngs2[missing]
+            )
+        return distances
+    
+    def load_leg_distances(self, loads: "LoadTable") -> np.ndarray:
+        """
+        Pickup -> delivery road distance of every load, memoized per load id
+        
+        Entries remember the coordinates they were measured for, so a load
+        whose points changed is measured again.
+        """
+        points = list(zip(
+            loads.pickup_lat.tolist(), loads.pickup_lng.tolist(),
+            loads.destination_lat.tolist(), loads.destination_lng.tolist()
+        ))
+        distances = np.empty(len(points))
+        missing = []
+        for i, entry in enumerate(self.load_leg_cache.get_many(loads.ids)):
+            if entry is not None and entry[0] == points[i]:
+                distances[i] = entry[1]
+            else:
+                missing.append(i)
+        
+        if missing:
+            rows = np.array(missing)
+            measured = self.pairwise_distances(
+                (loads.pickup_lat[rows], loads.pickup_lng[rows]),
+                (loads.destination_lat[rows], loads.destination_lng[rows])
+            )
+            distances[rows] = measured
+            self.load_leg_cache.put_many(
+                (loads.ids[i], (points[i], float(distance))) for i, distance in zip(missing, measured)
+            )
+        return distances
+    
+    def _haversine_pairwise_distances(self, lats1: np.ndarray, lngs1: np.ndarray,
+                                      lats2: np.ndarray, lngs2: np.ndarray) -> np.ndarray:
+        """Pairwise form of _haversine_road_distance"""
+        lat1_rad, lon1_rad = np.radians(lats1), np.radians(lngs1)
+        lat2_rad, lon2_rad = np.radians(lats2), np.radians(lngs2)
+        
+        a = (np.sin((lat2_rad - lat1_rad) / 2) ** 2 +
+             np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin((lon2_rad - lon1_rad) / 2) ** 2)
+        scaled = self.EARTH_RADIUS_KM * (2 * np.arcsin(np.sqrt(a))) * self.ROAD_ADJUSTMENT_FACTOR * 100
+        
+        distances = np.rint(scaled) / 100
+        for i in np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < _MIDPOINT_MARGIN):
+            distances[i] = self._haversine_road_distance(lats1[i], lngs1[i], lats2[i], lngs2[i])
+        return distances
+    
+    def _road_distances(self, lats1: np.ndarray, lngs1: np.ndarray,
+                        lats2: np.ndarray, lngs2: np.ndarray) -> np.ndarray:
+        """(n, m) rounded road distances between n origins and m destinations"""
+        if self.hub_table is None:
+            return self._measure_road_distances(lats1, lngs1, lats2, lngs2)
+        
+        distances = _round_exact(self.hub_table.matrix(lats1, lngs1, lats2, lngs2), 2)
+        missing = np.isnan(distances)
+        # Only origins with a pair the table could not answer are measured
+        rows = np.flatnonzero(missing.any(axis=1))
+        if rows.size:
+            measured = self._measure_road_distances(lats1[rows], lngs1[rows], lats2, lngs2)
+            distances[rows] = np.where(missing[rows], measured, distances[rows])
+        return distances
+    
+    def _measure_road_distances(self, lats1: np.ndarray, lngs1: np.ndarray,
+                                lats2: np.ndarray, lngs2: np.ndarray) -> np.ndarray:
+        """(n, m) rounded road distances without the hub table"""
+        if self.distance_provider is None:
+            return self._haversine_road_distances(lats1, lngs1, lats2, lngs2)
+        
+        distances = _round_exact(self.distance_provider.matrix(lats1, lngs1, lats2, lngs2), 2)
+        missing = np.isnan(distances)
+        if missing.any():
+            distances[missing] = self._haversine_road_distances(lats1, lngs1, lats2, lngs2)[missing]
+        return distances
+    
+    def _haversine_road_distances(self, lats1: np.ndarray, lngs1: np.ndarray,
+                                  lats2: np.ndarray, lngs2: np.ndarray) -> np.ndarray:
+        """
+        Matrix form of _haversine_road_distance
+        
+        sin(dlat / 2) is expanded as sin(a/2)cos(b/2) - cos(a/2)sin(b/2) (and
+        likewise for longitude), so the only per-element transcendentals are
+        sqrt and arcsin; the trigonometry runs once per point.
+        """
+        lat1_rad, lon1_rad = np.radians(lats1), np.radians(lngs1)
+        lat2_rad, lon2_rad = np.radians(lats2), np.radians(lngs2)
+        sin_lat1, cos_lat1 = np.sin(lat1_rad / 2), np.cos(lat1_rad / 2)
+        sin_lon1, cos_lon1 = np.sin(lon1_rad / 2), np.cos(lon1_rad / 2)
+        sin_lat2, cos_lat2 = np.sin(lat2_rad / 2), np.cos(lat2_rad / 2)
+        sin_lon2, cos_lon2 = np.sin(lon2_rad / 2), np.cos(lon2_rad / 2)
+        cos1, cos2 = np.cos(lat1_rad), np.cos(lat2_rad)
+        
+        distances = np.empty((len(lats1), len(lats2)))
+        rows = max(1, _BLOCK_ELEMENTS // max(1, len(lats2)))
+        for start in range(0, len(lats1), rows):
+            block = slice(start, start + rows)
+            a = np.multiply.outer(cos_lat1[block], sin_lat2)
+            a -= np.multiply.outer(sin_lat1[block], cos_lat2)
+            a *= a
+            b = np.multiply.outer(cos_lon1[block], sin_lon2)
+            b -= np.multiply.outer(sin_lon1[block], cos_lon2)
+            b *= b
+            b *= np.multiply.outer(cos1[block], cos2)
+            a += b
+            np.sqrt(a, out=a)
+            np.arcsin(a, out=a)
+            a *= 2 * self.EARTH_RADIUS_KM * self.ROAD_ADJUSTMENT_FACTOR * 100
+            
+            # rint(x * 100) / 100 matches round(x, 2) except near a midpoint,
+            # where the scalar path decides
+            rounded = np.rint(a)
+            rounded /= 100
+            a -= np.floor(a)
+            for i, j in zip(*np.nonzero(np.abs(a - 0.5) < _MIDPOINT_MARGIN)):
+                origin = start + i
+                rounded[i, j] = self._haversine_road_distance(lats1[origin], lngs1[origin], lats2[j], lngs2[j])
+            distances[block] = rounded
+        return distances
+    
     def calculate_extra_distance(
         self,
-        driver_current: Coordinate,
-        driver_destination: Coordinate,
-        vendor_pickup: Coordinate,
-        vendor_destination: Coordinate
+        driver_current: Point,
+        driver_destination: Point,
+        vendor_pickup: Point,
+        vendor_destination: Point
     ) -> float:
         """
         Calculate extra distance for taking a load opportunity
@@ -207,10 +592,10 @@ class MathEngine:
     
     def calculate_full_profitability(
         self,
-        driver_current: Coordinate,
-        driver_destination: Coordinate,
-        vendor_pickup: Coordinate,
-        vendor_destination: Coordinate,
+        driver_current: Point,
+        driver_destination: Point,
+        vendor_pickup: Point,
+        vendor_destination: Point,
         vendor_offering: float,
         fuel_consumption_rate: float = None,
         fuel_price_per_liter: float = None,
@@ -248,6 +633,132 @@ class MathEngine:
             "net_profit": net_profit,
             "profitability_score": profitability_score
         }
+    
+    # ==================== BATCH PROFITABILITY ====================
+    
+    def calculate_route_metrics_batch(self, driver_current, driver_destination, loads: "LoadTable") -> Dict:
+        """
+        Route metrics of one trip against every load of a LoadTable
+        
+        Same quantities as RouteOptimizerAgent.calculate_route_metrics, computed
+        as arrays (one element per load) with identical values.
+        
+        Args:
+            driver_current: Driver's current location (see Point)
+            driver_destination: Driver's intended destination
+            loads: Loads to evaluate
+        
+        Returns:
+            Dictionary of arrays keyed like calculate_route_metrics;
+            direct_distance_km and direct_time_hours are scalars
+        """
+        direct_distance = self._road_distance(*lat_lng(driver_current), *lat_lng(driver_destination))
+        direct_time = self.calculate_estimated_time(direct_distance)
+        
+        dist_to_vendor = self.distances_from(driver_current, (loads.pickup_lat, loads.pickup_lng))
+        dist_vendor_delivery = self.load_leg_distances(loads)
+        dist_delivery_to_home = self.distances_from(
+            driver_destination, (loads.destination_lat, loads.destination_lng)
+        )
+        
+        detour_distance = dist_to_vendor + dist_vendor_delivery + dist_delivery_to_home
+        detour_time = _round_exact(detour_distance / self.average_truck_speed, 2)
+        
+        return {
+            "direct_distance_km": direct_distance,
+            "direct_time_hours": direct_time,
+            "detour_distance_km": detour_distance,
+            "detour_time_hours": detour_time,
+            "extra_distance_km": detour_distance - direct_distance,
+            "extra_time_hours": detour_time - direct_time,
+            "distance_to_vendor_km": dist_to_vendor,
+            "vendor_delivery_distance_km": dist_vendor_delivery,
+            "delivery_to_home_km": dist_delivery_to_home
+        }
+    
+    def calculate_profitability_batch(
+        self,
+        extra_distance_km: np.ndarray,
+        extra_time_hours: np.ndarray,
+        vendor_offering: np.ndarray,
+        fuel_consumption_rate=None,
+        fuel_price_per_liter=None,
+        driver_hourly_rate=None
+    ) -> Dict:
+        """
+        Costs, net profit and score for arrays of extra distance and time
+        
+        Elementwise equal to chaining calculate_fuel_cost, calculate_time_cost,
+        calculate_net_profit and calculate_profitability_score. Rates may be
+        scalars or per-element arrays (e.g. one per truck).
+        
+        Returns:
+            Dictionary of arrays: fuel_cost, time_cost, net_profit, profitability_score
+        """
+        if fuel_consumption_rate is None:
+            fuel_consumption_rate = self.fuel_consumption_rate
+        if fuel_price_per_liter is None:
+            fuel_price_per_liter = self.fuel_price
+        if driver_hourly_rate is None:
+            driver_hourly_rate = self.driver_hourly_rate
+        extra_distance_km = np.asarray(extra_distance_km, dtype=np.float64)
+        extra_time_hours = np.asarray(extra_time_hours, dtype=np.float64)
+        
+        fuel_cost = _round_exact(extra_distance_km * fuel_consumption_rate * fuel_price_per_liter, 2)
+        time_cost = _round_exact(extra_time_hours * driver_hourly_rate, 2)
+        net_profit = _round_exact(vendor_offering - fuel_cost - time_cost, 2)
+        
+        moving = extra_time_hours != 0
+        score = np.zeros(np.broadcast(net_profit, extra_time_hours).shape)
+        score[moving] = _round_exact(net_profit[moving] / extra_time_hours[moving], 4)
+        
+        return {
+            "fuel_cost": fuel_cost,
+            "time_cost": time_cost,
+            "net_profit": net_profit,
+            "profitability_score": score
+        }
+    
+    def calculate_full_profitability_batch(
+        self,
+        driver_current,
+        driver_destination,
+        loads: "LoadTable",
+        fuel_consumption_rate=None,
+        fuel_price_per_liter=None,
+        driver_hourly_rate=None
+    ) -> Dict:
+        """
+        calculate_full_profitability for one trip against every load of a LoadTable
+        
+        Args:
+            driver_current: Driver's current location (see Point)
+            driver_destination: Driver's intended destination
+            loads: Loads to evaluate (vendor offering is loads.price)
+            fuel_consumption_rate, fuel_price_per_liter, driver_hourly_rate:
+                Scalars or per-load arrays (defaults to config values)
+        
+        Returns:
+            Dictionary of arrays keyed like calculate_full_profitability
+        """
+        direct = self._road_distance(*lat_lng(driver_current), *lat_lng(driver_destination))
+        detour = (
+            self.distances_from(driver_current, (loads.pickup_lat, loads.pickup_lng))
+            + self.load_leg_distances(loads)
+            + self.distances_from(driver_destination, (loads.destination_lat, loads.destination_lng))
+        )
+        extra_distance = _round_exact(detour - direct, 2)
+        estimated_time = _round_exact(extra_distance / self.average_truck_speed, 2)
+        
+        profitability = self.calculate_profitability_batch(
+            extra_distance, estimated_time, loads.price,
+            fuel_consumption_rate, fuel_price_per_liter, driver_hourly_rate
+        )
+        return {
+            "extra_distance_km": extra_distance,
+            "estimated_time_hours": estimated_time,
+            **profitability
+        }
 
 
 # Global instance
@@ -256,7 +767,4 @@ math_engine = MathEngine()
 # Export convenience function for backward compatibility
 def calculate_distance(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
     """Calculate distance between two points (convenience function)"""
-    from models.domain import Coordinate
-    point_a = Coordinate(lat=lat1, lng=lng1)
-    point_b = Coordinate(lat=lat2, lng=lng2)
-    return math_engine.calculate_distance(point_a, point_b)
+    return math_engine._road_distance(lat1, lng1, lat2, lng2)
@@ -35,6 +35,22 @@ class NavigationService:
             "timestamp": location['recorded_at']
         }
     
+    def get_track(self, vehicle_id: str, start: Optional[str] = None, end: Optional[str] = None) -> Dict:
+        """Get recorded GPS points for a vehicle within a time range"""
+        points = db.get_location_history(vehicle_id, start, end)
+        return {
+            "vehicleId": vehicle_id,
+            "points": [
+                {
+                    "latitude": point['latitude'],
+                    "longitude": point['longitude'],
+                    "accuracy": point['accuracy'],
+                    "timestamp": point['recorded_at']
+                }
+                for point in points
+            ]
+        }
+    
     def calculate_route(self, current_lat: float, current_lng: float,
                        pickup_lat: float, pickup_lng: float,
                        dest_lat: float, dest_lng: float) -> Dict:
@@ -82,6 +82,19 @@ class RealWorldDataGenerator:
             )
         }
     
+    def hubs(self) -> List[Dict]:
+        """Market yards and city delivery points, as dicts with name, city, lat and lng"""
+        hubs = [
+            {"name": yard["name"], "city": city, "lat": yard["lat"], "lng": yard["lng"]}
+            for city, yards in self.market_yards.items()
+            for yard in yards
+        ]
+        hubs.extend(
+            {"name": city, "city": city, "lat": coords["lat"], "lng": coords["lng"]}
+            for city, coords in self.cities.items()
+        )
+        return hubs
+    
     def generate_realistic_load(self) -> Dict:
         """Generate a realistic load with cargo type, weight, and pricing"""
         cargo = random.choice(self.cargo_types)
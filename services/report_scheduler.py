@@ -9,6 +9,7 @@ from datetime import datetime
 import logging
 from typing import List
 from db_chromadb import db
+from services.scheduler_lock import scheduler_lock, SchedulerLockedError
 from services.report_generation import ReportGenerationService
 import uuid
 
@@ -30,6 +31,8 @@ class ReportScheduler:
         if self.is_running:
             logger.warning("Scheduler is already running")
             return
+        if not scheduler_lock.acquire():
+            raise SchedulerLockedError(f"Schedulers run in another worker (pid {scheduler_lock.holder()})")
         
         # Schedule report generation at 8 PM (20:00) every day
         self.scheduler.add_job(
@@ -91,11 +94,7 @@ class ReportScheduler:
                         "version": 1
                     }
                     
-                    db.reports.add(
-                        ids=[report_id],
-                        documents=[f"Report for {driver_id} on {today}"],
-                        metadatas=[report_record]
-                    )
+                    db.create_report(report_record)
                     
                     logger.info(f"Report generated successfully for driver {driver_id}: {report_id}")
                 
@@ -112,12 +111,7 @@ class ReportScheduler:
     def _get_all_drivers(self) -> List[dict]:
         """Get all active drivers from database"""
         try:
-            result = db.drivers.get()
-            
-            if not result['ids']:
-                return []
-            
-            return result['metadatas']
+            return db.find("drivers")
         
         except Exception as e:
             logger.error(f"Error retrieving drivers: {str(e)}")
@@ -0,0 +1,449 @@
+"""
+Road Network
+Shortest road distances over an OpenStreetMap-derived graph, sped up with
+contraction hierarchies
+
+Build a network file once from an OSM extract, then point ROAD_NETWORK_PATH
+at it so MathEngine measures distances on the road graph:
+    
+    python -m services.road_network region.osm road_network.npz
+"""
+
+import argparse
+import hashlib
+import heapq
+import math
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from storage.geoindex import KM_PER_DEGREE, GeoGridIndex, haversine_pairs
+
+# OSM highway values a truck can drive on
+DRIVABLE_HIGHWAYS = frozenset({
+    "motorway", "motorway_link", "trunk", "trunk_link", "primary", "primary_link",
+    "secondary", "secondary_link", "tertiary", "tertiary_link", "unclassified",
+    "residential", "living_street", "service", "road",
+})
+
+# Nodes settled by one witness search before it gives up (and keeps the shortcut)
+WITNESS_SETTLE_LIMIT = 200
+
+# Cell edge of the grid used to snap points to their nearest road node
+SNAP_CELL_DEGREES = 0.005
+
+# Adjacency in compressed rows: (indptr, indices, weights)
+Adjacency = Tuple[List[int], List[int], List[float]]
+
+
+class RoadNetwork:
+    """
+    Directed road graph prepared for fast shortest-path queries.
+    
+    Nodes are ranked by a contraction hierarchy: contracting a node adds
+    shortcut edges between its neighbours wherever it lay on their only
+    shortest path. A query then searches upward in rank from both ends, and
+    the shortest path is the best node where the two searches meet. Each
+    upward search settles only a small fraction of the graph, and many-to-many
+    matrices reuse one search per distinct origin and destination.
+    
+    Points are snapped to their nearest road node; the straight-line snapping
+    legs are added to the graph distance. Pairs that cannot be routed (a point
+    farther than max_snap_km from any road, or no connecting path) are NaN,
+    so callers can fall back to another estimate.
+    """
+    
+    # Road km per straight-line km never drops below this: edges are at least
+    # as long as the great circle between their ends and snapping legs are
+    # straight lines
+    min_detour_factor = 1.0
+    
+    def __init__(self, lats: np.ndarray, lngs: np.ndarray, rank: np.ndarray,
+                 upward: Adjacency, downward: Adjacency, max_snap_km: float = 5.0):
+        """
+        Use from_edges, from_osm or load rather than calling this directly.
+        
+        Args:
+            lats, lngs: Node coordinates
+            rank: Contraction order of each node
+            upward: Edges to higher-ranked nodes, searched from origins
+            downward: Edges from higher-ranked nodes, reversed, searched from destinations
+            max_snap_km: Farthest a point may be from its road node
+        """
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lngs = np.asarray(lngs, dtype=np.float64)
+        self.rank = np.asarray(rank, dtype=np.int64)
+        self.upward = upward
+        self.downward = downward
+        self.max_snap_km = max_snap_km
+        
+        self._nodes = GeoGridIndex(SNAP_CELL_DEGREES)
+        # Every edge is stored in the row of one end and names the other
+        degree = np.diff(upward[0]) + np.diff(downward[0])
+        connected = set(np.flatnonzero(degree).tolist()) | set(upward[1]) | set(downward[1])
+        for node in connected:
+            self._nodes.put(node, float(self.lats[node]), float(self.lngs[node]))
+    
+    def __len__(self) -> int:
+        return len(self.lats)
+    
+    def fingerprint(self) -> str:
+        """Digest of the nodes and edges; data measured on the network is current while it matches"""
+        digest = hashlib.sha1()
+        for array in (self.lats, self.lngs, self.rank, *self.upward, *self.downward):
+            digest.update(np.asarray(array).tobytes())
+        return digest.hexdigest()[:16]
+    
+    # ==================== BUILDING ====================
+    
+    @classmethod
+    def from_edges(cls, lats: Iterable[float], lngs: Iterable[float],
+                   edges: Iterable[Tuple[int, int, float]], max_snap_km: float = 5.0) -> "RoadNetwork":
+        """
+        Build and contract a network
+        
+        Args:
+            lats, lngs: Node coordinates, indexed by node number
+            edges: Directed (from_node, to_node, km) edges; add both directions for two-way roads.
+                Lengths shorter than the great circle between the ends are raised to it.
+            max_snap_km: Farthest a point may be from its road node
+        """
+        lats = np.asarray(list(lats), dtype=np.float64)
+        lngs = np.asarray(list(lngs), dtype=np.float64)
+        edges = list(edges)
+        if edges:
+            sources = np.array([edge[0] for edge in edges])
+            targets = np.array([edge[1] for edge in edges])
+            lengths = np.array([edge[2] for edge in edges], dtype=np.float64)
+            straight = haversine_pairs(lats[sources], lngs[sources], lats[targets], lngs[targets])
+            edges = list(zip(sources.tolist(), targets.tolist(), np.maximum(lengths, straight).tolist()))
+        
+        rank, upward, downward = _contract(len(lats), edges)
+        return cls(lats, lngs, rank, _adjacency(len(lats), upward), _adjacency(len(lats), downward), max_snap_km)
+    
+    @classmethod
+    def from_osm(cls, path: str, max_snap_km: float = 5.0) -> "RoadNetwork":
+        """Build a network from the drivable ways of an OSM XML extract"""
+        import xml.etree.ElementTree as ET
+        
+        coordinates: Dict[int, Tuple[float, float]] = {}
+        ways = []
+        for _, element in ET.iterparse(path, events=("end",)):
+            if element.tag == "node":
+                coordinates[int(element.get("id"))] = (float(element.get("lat")), float(element.get("lon")))
+                element.clear()
+            elif element.tag == "way":
+                tags = {tag.get("k"): tag.get("v") for tag in element.iter("tag")}
+                highway = tags.get("highway")
+                if highway in DRIVABLE_HIGHWAYS:
+                    oneway = tags.get("oneway", "")
+                    if oneway == "-1":
+                        direction = -1
+                    elif oneway in ("yes", "true", "1") or (
+                        oneway != "no" and (highway == "motorway" or tags.get("junction") == "roundabout")
+                    ):
+                        direction = 1
+                    else:
+                        direction = 0
+                    ways.append(([int(nd.get("ref")) for nd in element.iter("nd")], direction))
+                element.clear()
+        
+        numbers: Dict[int, int] = {}
+        edges = []
+        for refs, direction in ways:
+            refs = [ref for ref in refs if ref in coordinates]
+            for a, b in zip(refs, refs[1:]):
+                u = numbers.setdefault(a, len(numbers))
+                v = numbers.setdefault(b, len(numbers))
+                if direction >= 0:
+                    edges.append((u, v, 0.0))
+                if direction <= 0:
+                    edges.append((v, u, 0.0))
+        
+        points = sorted(numbers, key=numbers.get)
+        lats = [coordinates[ref][0] for ref in points]
+        lngs = [coordinates[ref][1] for ref in points]
+        # Zero lengths are raised to the straight segment length by from_edges
+        return cls.from_edges(lats, lngs, edges, max_snap_km)
+    
+    def save(self, path: str):
+        """Write the contracted network to a .npz file"""
+        arrays = {}
+        for name, (indptr, indices, weights) in (("upward", self.upward), ("downward", self.downward)):
+            arrays[f"{name}_indptr"] = np.asarray(indptr, dtype=np.int64)
+            arrays[f"{name}_indices"] = np.asarray(indices, dtype=np.int64)
+            arrays[f"{name}_weights"] = np.asarray(weights, dtype=np.float64)
+        np.savez_compressed(path, lats=self.lats, lngs=self.lngs, rank=self.rank, **arrays)
+    
+    @classmethod
+    def load(cls, path: str, max_snap_km: float = 5.0) -> "RoadNetwork":
+        """Read a network written by save()"""
+        with np.load(path) as data:
+            def adjacency(name: str) -> Adjacency:
+                return (
+                    data[f"{name}_indptr"].tolist(),
+                    data[f"{name}_indices"].tolist(),
+                    data[f"{name}_weights"].tolist()
+                )
+            return cls(data["lats"], data["lngs"], data["rank"],
+                       adjacency("upward"), adjacency("downward"), max_snap_km)
+    
+    # ==================== QUERIES ====================
+    
+    def snap(self, lat: float, lng: float) -> Optional[Tuple[int, float]]:
+        """
+        Nearest road node and the straight-line km to it, or None if beyond max_snap_km
+        
+        Searches a circle that doubles from one grid cell up to max_snap_km, so
+        a point far from every road costs no more than one max_snap_km search.
+        """
+        radius = SNAP_CELL_DEGREES * KM_PER_DEGREE
+        while True:
+            found = self._nodes.within(lat, lng, min(radius, self.max_snap_km))
+            if found:
+                return found[0]
+            if radius >= self.max_snap_km:
+                return None
+            radius *= 2
+    
+    def distance(self, lat1: float, lng1: float, lat2: float, lng2: float) -> Optional[float]:
+        """Road km between two points, or None if they cannot be routed"""
+        km = self.matrix(np.array([lat1]), np.array([lng1]), np.array([lat2]), np.array([lng2]))[0, 0]
+        return None if np.isnan(km) else float(km)
+    
+    def nodes_within(self, lat: float, lng: float, radius_km: float) -> List[Tuple[int, float]]:
+        """Road nodes within a straight-line radius and their km from the point, nearest first"""
+        return self._nodes.within(lat, lng, radius_km)
+    
+    def matrix(self, origin_lats: np.ndarray, origin_lngs: np.ndarray,
+               destination_lats: np.ndarray, destination_lngs: np.ndarray) -> np.ndarray:
+        """(n, m) road km between every origin and every destination, NaN where unroutable"""
+        origins = [self.snap(lat, lng) for lat, lng in zip(origin_lats, origin_lngs)]
+        destinations = [self.snap(lat, lng) for lat, lng in zip(destination_lats, destination_lngs)]
+        best = self._reach({snapped[0] for snapped in origins if snapped},
+                           {snapped[0] for snapped in destinations if snapped})
+        
+        result = np.full((len(origins), len(destinations)), np.nan)
+        for i, origin in enumerate(origins):
+            if origin is None:
+                continue
+            reached = best[origin[0]]
+            for j, destination in enumerate(destinations):
+                if destination is not None and destination[0] in reached:
+                    result[i, j] = origin[1] + reached[destination[0]] + destination[1]
+        return result
+    
+    def node_matrix(self, origins: List[int], destinations: List[int]) -> np.ndarray:
+        """(n, m) road km between road nodes, NaN where no path connects them"""
+        best = self._reach(set(origins), set(destinations))
+        result = np.full((len(origins), len(destinations)), np.nan)
+        for i, origin in enumerate(origins):
+            reached = best[origin]
+            for j, destination in enumerate(destinations):
+                if destination in reached:
+                    result[i, j] = reached[destination]
+        return result
+    
+    def _reach(self, sources: Iterable[int], targets: Iterable[int]) -> Dict[int, Dict[int, float]]:
+        """
+        Shortest km from every source node to every target node it can reach
+        
+        Runs one downward search per target, leaving (target, km) entries in a
+        bucket at every node it settles, and one upward search per source,
+        which scans the buckets it meets.
+        """
+        buckets = defaultdict(list)
+        for target in targets:
+            for node, km in self._search(target, self.downward).items():
+                buckets[node].append((target, km))
+        
+        best: Dict[int, Dict[int, float]] = {}
+        for source in sources:
+            reached = best[source] = {}
+            for node, forward_km in self._search(source, self.upward).items():
+                for target, backward_km in buckets.get(node, ()):
+                    total = forward_km + backward_km
+                    if total < reached.get(target, math.inf):
+                        reached[target] = total
+        return best
+    
+    def pairwise(self, lats1: np.ndarray, lngs1: np.ndarray,
+                 lats2: np.ndarray, lngs2: np.ndarray) -> np.ndarray:
+        """Road km from each origin to the destination at the same position, NaN where unroutable"""
+        upward_spaces: Dict[int, Dict[int, float]] = {}
+        downward_spaces: Dict[int, Dict[int, float]] = {}
+        result = np.full(len(lats1), np.nan)
+        for i in range(len(lats1)):
+            origin = self.snap(lats1[i], lngs1[i])
+            destination = self.snap(lats2[i], lngs2[i])
+            if origin is None or destination is None:
+                continue
+            if origin[0] not in upward_spaces:
+                upward_spaces[origin[0]] = self._search(origin[0], self.upward)
+            if destination[0] not in downward_spaces:
+                downward_spaces[destination[0]] = self._search(destination[0], self.downward)
+            backward = downward_spaces[destination[0]]
+            km = min(
+                (forward_km + backward[node] for node, forward_km in upward_spaces[origin[0]].items()
+                 if node in backward),
+                default=None
+            )
+            if km is not None:
+                result[i] = origin[1] + km + destination[1]
+        return result
+    
+    @staticmethod
+    def _search(node: int, adjacency: Adjacency) -> Dict[int, float]:
+        """Dijkstra over one direction of the hierarchy; km to every node it settles"""
+        indptr, indices, weights = adjacency
+        settled: Dict[int, float] = {}
+        queued = {node: 0.0}
+        heap = [(0.0, node)]
+        while heap:
+            km, current = heapq.heappop(heap)
+            if current in settled:
+                continue
+            settled[current] = km
+            for k in range(indptr[current], indptr[current + 1]):
+                neighbour = indices[k]
+                candidate = km + weights[k]
+                if candidate < queued.get(neighbour, math.inf):
+                    queued[neighbour] = candidate
+                    heapq.heappush(heap, (candidate, neighbour))
+        return settled
+
+
+# ==================== CONTRACTION ====================
+
+def _contract(node_count: int, edges: List[Tuple[int, int, float]]):
+    """
+    Contract every node, least important first
+    
+    Importance is the edge difference (shortcuts added minus edges removed)
+    plus the number of already contracted neighbours, which spreads
+    contraction evenly over the graph. Priorities are refreshed lazily when
+    a node reaches the front of the queue.
+    
+    Returns:
+        (rank per node, upward edges, downward edges); downward edges are
+        stored from the lower-ranked end
+    """
+    out_edges: List[Dict[int, float]] = [{} for _ in range(node_count)]
+    in_edges: List[Dict[int, float]] = [{} for _ in range(node_count)]
+    for u, v, km in edges:
+        if u != v and km < out_edges[u].get(v, math.inf):
+            out_edges[u][v] = km
+            in_edges[v][u] = km
+    
+    deleted_neighbours = [0] * node_count
+    
+    def shortcuts(v: int) -> List[Tuple[int, int, float]]:
+        needed = []
+        for u, into in in_edges[v].items():
+            via = {w: into + out for w, out in out_edges[v].items() if w != u}
+            if not via:
+                continue
+            witness = _witness_search(out_edges, u, v, max(via.values()), via)
+            needed.extend((u, w, km) for w, km in via.items() if witness.get(w, math.inf) > km)
+        return needed
+    
+    def priority(v: int, added: int) -> int:
+        return added - len(in_edges[v]) - len(out_edges[v]) + deleted_neighbours[v]
+    
+    heap = [(priority(v, len(shortcuts(v))), v) for v in range(node_count)]
+    heapq.heapify(heap)
+    
+    rank = np.zeros(node_count, dtype=np.int64)
+    contracted = [False] * node_count
+    upward, downward = [], []
+    order = 0
+    while heap:
+        _, v = heapq.heappop(heap)
+        if contracted[v]:
+            continue
+        added = shortcuts(v)
+        current = priority(v, len(added))
+        if heap and current > heap[0][0]:
+            heapq.heappush(heap, (current, v))
+            continue
+        
+        rank[v] = order
+        order += 1
+        contracted[v] = True
+        for w, km in out_edges[v].items():
+            upward.append((v, w, km))
+            del in_edges[w][v]
+            deleted_neighbours[w] += 1
+        for u, km in in_edges[v].items():
+            downward.append((v, u, km))
+            del out_edges[u][v]
+            deleted_neighbours[u] += 1
+        out_edges[v], in_edges[v] = {}, {}
+        for u, w, km in added:
+            if km < out_edges[u].get(w, math.inf):
+                out_edges[u][w] = km
+                in_edges[w][u] = km
+    
+    return rank, upward, downward
+
+
+def _witness_search(out_edges: List[Dict[int, float]], source: int, skipped: int,
+                    limit: float, targets: Dict[int, float]) -> Dict[int, float]:
+    """Shortest km from source avoiding one node, up to limit (targets reached early end it)"""
+    settled: Dict[int, float] = {}
+    queued = {source: 0.0}
+    heap = [(0.0, source)]
+    remaining = len(targets)
+    while heap and len(settled) < WITNESS_SETTLE_LIMIT:
+        km, current = heapq.heappop(heap)
+        if km > limit:
+            break
+        if current in settled:
+            continue
+        settled[current] = km
+        if current in targets:
+            remaining -= 1
+            if not remaining:
+                break
+        for neighbour, length in out_edges[current].items():
+            if neighbour == skipped:
+                continue
+            candidate = km + length
+            if candidate < queued.get(neighbour, math.inf):
+                queued[neighbour] = candidate
+                heapq.heappush(heap, (candidate, neighbour))
+    return settled
+
+
+def _adjacency(node_count: int, edges: List[Tuple[int, int, float]]) -> Adjacency:
+    """Compressed rows of (from, to, km) edges"""
+    edges = sorted(edges)
+    indptr = [0] * (node_count + 1)
+    for u, _, _ in edges:
+        indptr[u + 1] += 1
+    for node in range(node_count):
+        indptr[node + 1] += indptr[node]
+    return indptr, [edge[1] for edge in edges], [edge[2] for edge in edges]
+
+
+def load_road_network(path: str, max_snap_km: float = 5.0) -> RoadNetwork:
+    """Load a saved network (.npz) or build one from an OSM XML extract"""
+    if path.endswith(".npz"):
+        return RoadNetwork.load(path, max_snap_km)
+    return RoadNetwork.from_osm(path, max_snap_km)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a contracted road network from an OSM XML extract")
+    parser.add_argument("osm_file", help="OpenStreetMap XML extract (.osm)")
+    parser.add_argument("output", help="Network file to write (.npz)")
+    args = parser.parse_args()
+    
+    network = RoadNetwork.from_osm(args.osm_file)
+    network.save(args.output)
+    print(f"Road network with {len(network)} nodes written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
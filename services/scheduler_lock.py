@@ -0,0 +1,61 @@
+"""
+Scheduler Lock
+Makes sure background schedulers run in one process when the API runs
+with several workers
+"""
+
+import fcntl
+import os
+import threading
+from typing import Optional
+
+from config import settings
+
+
+class SchedulerLock:
+    """Exclusive lock file; the process holding it runs the background schedulers"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> bool:
+        """
+        Take the lock without blocking; held until the process exits
+        
+        Returns:
+            True if this process holds the lock
+        """
+        with self._lock:
+            if self._file is not None:
+                return True
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            lock_file = open(self.path, "a+")
+            try:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            lock_file.truncate(0)
+            lock_file.write(str(os.getpid()))
+            lock_file.flush()
+            self._file = lock_file
+            return True
+    
+    def holder(self) -> Optional[int]:
+        """Process id recorded by the current holder"""
+        try:
+            with open(self.path) as f:
+                return int(f.read().strip() or 0) or None
+        except (OSError, ValueError):
+            return None
+
+
+class SchedulerLockedError(RuntimeError):
+    """Raised when another process already runs the schedulers"""
+
+
+# Global lock instance
+scheduler_lock = SchedulerLock(settings.scheduler_lock_path)
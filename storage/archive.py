@@ -0,0 +1,195 @@
+"""
+Cold Archive
+Month-partitioned, gzip-compressed JSONL files for records moved out of the
+live collections, with a tombstone index for lookups by id
+"""
+
+import gzip
+import json
+import os
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from storage.query import matches
+
+TOMBSTONE_FILE = "tombstones.jsonl"
+
+
+class ArchiveStore:
+    """
+    Append-only archive of records, one partition per collection per month.
+    
+    Partitions live at <root>/<collection>/<YYYY-MM>.jsonl.gz and are written
+    as appended gzip members, so archiving never rewrites earlier data. Every
+    archived id is recorded in the tombstone index (collection, id -> partition),
+    which is loaded into memory at startup.
+    """
+    
+    def __init__(self, root: str):
+        """
+        Args:
+            root: Directory holding the archive partitions
+        """
+        self.root = root
+        self._lock = threading.Lock()
+        # (collection, record_id) -> partition month
+        self._tombstones: Dict[Tuple[str, str], str] = {}
+        os.makedirs(self.root, exist_ok=True)
+        self._load_tombstones()
+    
+    def _partition_path(self, collection: str, month: str) -> str:
+        return os.path.join(self.root, collection, f"{month}.jsonl.gz")
+    
+    def _load_tombstones(self):
+        path = os.path.join(self.root, TOMBSTONE_FILE)
+        if not os.path.exists(path):
+            return
+        with open(path) as f:
+            for line in f:
+                try:
+                    collection, record_id, month = json.loads(line)
+                except ValueError:
+                    # A torn last line from an interrupted write
+                    continue
+                self._tombstones[(collection, record_id)] = month
+    
+    # ==================== WRITES ====================
+    
+    def append(self, collection: str, rows: Iterable[Tuple[str, str, Dict]], tombstone: bool = True) -> int:
+        """
+        Archive records
+        
+        Args:
+            collection: Source collection
+            rows: (record_id, month "YYYY-MM", record) triples
+            tombstone: Record the ids for get(); off for bulk rows never looked up by id
+        
+        Returns:
+            Number of records written
+        """
+        by_month: Dict[str, List[Tuple[str, Dict]]] = {}
+        for record_id, month, record in rows:
+            by_month.setdefault(month, []).append((record_id, record))
+        if not by_month:
+            return 0
+        
+        written = 0
+        with self._lock:
+            os.makedirs(os.path.join(self.root, collection), exist_ok=True)
+            tombstones = []
+            for month, records in sorted(by_month.items()):
+                lines = "".join(
+                    json.dumps({"id": record_id, "record": record}, separators=(",", ":")) + "\n"
+                    for record_id, record in records
+                )
+                with gzip.open(self._partition_path(collection, month), "at", encoding="utf-8") as f:
+                    f.write(lines)
+                    f.flush()
+                    os.fsync(f.fileno())
+                if tombstone:
+                    tombstones += [(record_id, month) for record_id, _ in records]
+                written += len(records)
+            
+            # Tombstones are written only after the data they point at is durable
+            if not tombstones:
+                return written
+            with open(os.path.join(self.root, TOMBSTONE_FILE), "a") as f:
+                for record_id, month in tombstones:
+                    f.write(json.dumps([collection, record_id, month]) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            for record_id, month in tombstones:
+                self._tombstones[(collection, record_id)] = month
+        return written
+    
+    def clear(self):
+        """Delete every partition and tombstone"""
+        with self._lock:
+            for name in os.listdir(self.root):
+                path = os.path.join(self.root, name)
+                if os.path.isdir(path):
+                    for partition in os.listdir(path):
+                        os.remove(os.path.join(path, partition))
+                    os.rmdir(path)
+                else:
+                    os.remove(path)
+            self._tombstones = {}
+    
+    def drop_months_before(self, collection: str, month: str) -> int:
+        """
+        Delete a collection's partitions for months before month ("YYYY-MM")
+        
+        For collections archived without tombstones (GPS tracks); tombstoned
+        records in dropped partitions would stay in the on-disk index.
+        
+        Returns:
+            Number of partitions deleted
+        """
+        with self._lock:
+            dropped = [m for m in self.months(collection) if m < month]
+            for m in dropped:
+                os.remove(self._partition_path(collection, m))
+        return len(dropped)
+    
+    # ==================== READS ====================
+    
+    def contains(self, collection: str, record_id: str) -> bool:
+        """Check the tombstone index for an archived record"""
+        return (collection, record_id) in self._tombstones
+    
+    def get(self, collection: str, record_id: str) -> Optional[Dict]:
+        """Get an archived record by id (reads only the partition it lives in)"""
+        month = self._tombstones.get((collection, record_id))
+        if month is None:
+            return None
+        for archived_id, record in self._read_partition(collection, month):
+            if archived_id == record_id:
+                return record
+        return None
+    
+    def months(self, collection: str) -> List[str]:
+        """Partition months of a collection, oldest first"""
+        directory = os.path.join(self.root, collection)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name[:-len(".jsonl.gz")] for name in os.listdir(directory) if name.endswith(".jsonl.gz"))
+    
+    def scan(self, collection: str, conditions: List[Tuple] = None,
+             start_month: str = None, end_month: str = None) -> Iterator[Dict]:
+        """
+        Iterate archived records of a collection matching normalized conditions
+        
+        Args:
+            collection: Collection to read
+            conditions: Normalized filter (see storage.query.normalize_where)
+            start_month, end_month: Inclusive "YYYY-MM" bounds on the partitions read
+        """
+        for month in self.months(collection):
+            if (start_month and month < start_month) or (end_month and month > end_month):
+                continue
+            for _, record in self._read_partition(collection, month):
+                if matches(record, conditions or []):
+                    yield record
+    
+    def _read_partition(self, collection: str, month: str) -> Iterator[Tuple[str, Dict]]:
+        path = self._partition_path(collection, month)
+        if not os.path.exists(path):
+            return
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            try:
+                for line in f:
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        continue
+                    yield row["id"], row["record"]
+            except EOFError:
+                # Truncated trailing member from an interrupted append
+                return
+    
+    def stats(self) -> Dict:
+        """Archived record counts per collection"""
+        counts: Dict[str, int] = {}
+        for collection, _ in self._tombstones:
+            counts[collection] = counts.get(collection, 0) + 1
+        return {"archived": counts, "root": self.root}
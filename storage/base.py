@@ -0,0 +1,1450 @@
+"""
+Storage Base
+Entity-level data access shared by every storage backend. Backends store flat
+metadata records in named collections and implement the _store_* primitives;
+record building, validation, caching and GPS tracks live here.
+"""
+
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Dict, Iterable, Optional, Tuple
+
+from config import settings
+from storage.archive import ArchiveStore
+from storage.cache import LRUCache
+from storage.changefeed import ChangeFeed
+from storage.geoindex import GeoGridIndex
+from storage.groupcommit import GroupCommitWriter, WriteOp
+from storage.hotstore import HotStore
+from storage.query import normalize_where, sort_records, encode_cursor, decode_cursor
+from storage.timeseries import TrackStore, to_epoch_ms, from_epoch_ms
+
+
+# Record collections every backend provides
+COLLECTIONS = (
+    "owners", "drivers", "vendors", "trucks", "trips", "loads", "load_assignments",
+    "expenses", "reports",
+    "allocations", "location_history", "notifications",
+    "vehicle_positions",
+)
+
+# Collections emptied by clear_all_data (financial records are kept)
+CLEARED_COLLECTIONS = (
+    "owners", "drivers", "vendors", "trucks", "trips", "loads", "load_assignments",
+    "allocations", "location_history", "vehicle_positions", "notifications",
+)
+
+# Record id field of each entity collection
+ID_FIELDS = {
+    "owners": "owner_id",
+    "drivers": "driver_id",
+    "vendors": "vendor_id",
+    "trucks": "truck_id",
+    "trips": "trip_id",
+    "loads": "load_id",
+    "allocations": "allocation_id",
+    "notifications": "notification_id",
+    "expenses": "expense_id",
+    "reports": "report_id",
+    "vehicle_positions": "vehicle_id",
+}
+
+# Collections whose by-id reads go through the entity cache
+CACHED_COLLECTIONS = ("trucks", "drivers", "loads", "trips", "vendors")
+
+# Terminal states moved to the cold archive: (collection, filter, timestamp field the age is measured from)
+ARCHIVE_POLICIES = (
+    ("loads", {"status": "delivered"}, "delivered_at"),
+    ("trips", {"status": "completed"}, "completed_at"),
+    ("allocations", {"status": "completed"}, "completed_at"),
+    ("allocations", {"status": "cancelled"}, "cancelled_at"),
+    ("notifications", {"is_read": True}, "created_at"),
+)
+
+# Equality indexes kept by the hot store over the collections it may hold
+HOT_INDEXED_FIELDS = {
+    "loads": ("status", "assigned_trip_id", "vendor_id"),
+    "trucks": ("owner_id", "status"),
+    "drivers": ("truck_id",),
+    "trips": ("status", "driver_id"),
+    "allocations": ("status", "vehicle_id", "load_id"),
+}
+
+# Points of an available load indexed for spatial queries: name -> (lat field, lng field)
+LOAD_POINTS = {
+    "pickup": ("pickup_lat", "pickup_lng"),
+    "destination": ("destination_lat", "destination_lng"),
+}
+
+# Stripes of the per-record locks taken by compare-and-set updates
+RECORD_LOCK_STRIPES = 64
+
+# Row schemas for the bulk write APIs: required fields, optional fields
+LOAD_FIELDS = (
+    ("vendor_id", "weight_kg", "pickup_lat", "pickup_lng", "pickup_address",
+     "destination_lat", "destination_lng", "destination_address", "price_offered"),
+    ("currency",),
+)
+LOCATION_FIELDS = (
+    ("vehicle_id", "latitude", "longitude", "accuracy"),
+    ("recorded_at",),
+)
+NOTIFICATION_FIELDS = (
+    ("driver_id", "notification_type", "title", "message"),
+    ("load_id", "waypoint_type"),
+)
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_row(row, fields, positive=(), coordinates=()) -> Optional[str]:
+    """
+    Validate one bulk write row
+    
+    Args:
+        row: Row dict, keyed like the single-row method's arguments
+        fields: (required, optional) field names
+        positive: Fields that must be numbers greater than zero
+        coordinates: (lat_field, lng_field) pairs that must be valid coordinates
+    
+    Returns:
+        Error message, or None if the row is valid
+    """
+    if not isinstance(row, dict):
+        return "Row must be an object"
+    required, optional = fields
+    missing = [field for field in required if row.get(field) is None or row.get(field) == ""]
+    if missing:
+        return f"Missing required fields: {', '.join(missing)}"
+    unknown = sorted(set(row) - set(required) - set(optional))
+    if unknown:
+        return f"Unknown fields: {', '.join(unknown)}"
+    for field in positive:
+        if not _is_number(row[field]) or row[field] <= 0:
+            return f"{field} must be a positive number"
+    for lat_field, lng_field in coordinates:
+        lat, lng = row[lat_field], row[lng_field]
+        if not _is_number(lat) or not -90 <= lat <= 90:
+            return f"{lat_field} must be a latitude between -90 and 90"
+        if not _is_number(lng) or not -180 <= lng <= 180:
+            return f"{lng_field} must be a longitude between -180 and 180"
+    return None
+
+
+class ConflictError(Exception):
+    """Raised when a compare-and-set update finds the record changed"""
+    
+    def __init__(self, collection: str, record_id: str, field: str, expected, actual):
+        super().__init__(collection, record_id, field, expected, actual)
+        self.collection = collection
+        self.record_id = record_id
+        self.field = field
+        self.expected = expected
+        self.actual = actual
+    
+    def __str__(self) -> str:
+        return (
+            f"{self.collection} record {self.record_id} changed: "
+            f"expected {self.field}={self.expected!r}, found {self.actual!r}"
+        )
+
+
+class BaseDatabase:
+    """Entity-level data access over a record store"""
+    
+    def __init__(self, track_directory: str = None, hot_collections: Iterable[str] = None,
+                 archive_directory: str = None):
+        """
+        Args:
+            track_directory: GPS track store directory (defaults to settings.track_store_directory)
+            hot_collections: Collections held in memory with write-behind persistence
+                (defaults to settings.hot_collections; empty to disable)
+            archive_directory: Cold archive directory (defaults to settings.archive_directory)
+        """
+        self.track_directory = track_directory or settings.track_store_directory
+        
+        # GPS tracks live in a columnar time-series store, not in the record store
+        self.tracks = TrackStore(self.track_directory, retention_days=settings.track_retention_days)
+        
+        # Terminal-state records moved out of the live collections
+        self.archive = ArchiveStore(archive_directory or settings.archive_directory)
+        
+        # Write-through cache for by-id entity reads
+        self.cache = LRUCache(settings.entity_cache_size)
+        
+        # Sequenced feed of every write, for consumers that update incrementally
+        self.changes = ChangeFeed(settings.change_feed_size)
+        
+        # Concurrent store writes share one backend transaction
+        self.writer = GroupCommitWriter(self._store_apply, settings.group_commit_max_batch)
+        
+        # Grid indexes over available-load points, built on first spatial query
+        # and then kept in step with every load write
+        self.load_points = {name: GeoGridIndex(settings.geo_index_cell_degrees) for name in LOAD_POINTS}
+        self._load_points_ready = False
+        self._load_points_lock = threading.Lock()
+        
+        # Serialize read-modify-write updates of the same record
+        self._record_locks = [threading.Lock() for _ in range(RECORD_LOCK_STRIPES)]
+        
+        # Working-set collections served from memory; backends call _load_hot_set()
+        # once their store is open
+        if hot_collections is None:
+            hot_collections = [
+                name.strip() for name in settings.hot_collections.split(",") if name.strip()
+            ]
+        self.hot = HotStore(
+            self._persist_hot,
+            [name for name in hot_collections if name in ID_FIELDS],
+            indexed_fields=HOT_INDEXED_FIELDS,
+            flush_interval=settings.hot_store_flush_interval,
+            flush_size=settings.hot_store_flush_size
+        )
+    
+    # ==================== BACKEND PRIMITIVES ====================
+    
+    def _store_add(self, collection: str, ids: List[str], records: List[Dict], documents: List[str]):
+        """Insert new records"""
+        raise NotImplementedError
+    
+    def _store_update(self, collection: str, ids: List[str], records: List[Dict], documents: List[str] = None):
+        """Replace existing records; unknown ids are ignored"""
+        raise NotImplementedError
+    
+    def _store_upsert(self, collection: str, ids: List[str], records: List[Dict], documents: List[str]):
+        """Insert or replace records"""
+        raise NotImplementedError
+    
+    def _store_get(self, collection: str, ids: List[str]) -> List[Dict]:
+        """Get the records that exist among ids"""
+        raise NotImplementedError
+    
+    def _store_select(self, collection: str, conditions: List[Tuple], order_by=None,
+                      limit: int = None, offset: int = 0) -> List[Dict]:
+        """Get records matching normalized conditions, sorted and sliced as find() describes"""
+        raise NotImplementedError
+    
+    def _store_page(self, collection: str, conditions: List[Tuple], field: str, descending: bool,
+                    after: Optional[Tuple], limit: int) -> List[Tuple[Tuple, Dict]]:
+        """
+        Get up to limit (sort key, record) pairs ordered by storage.query.sort_key,
+        starting after the given key
+        """
+        raise NotImplementedError
+    
+    def _store_count(self, collection: str, conditions: List[Tuple]) -> int:
+        """Count records matching normalized conditions"""
+        raise NotImplementedError
+    
+    def _store_clear(self, collections: Tuple[str, ...]):
+        """Delete every record in the given collections"""
+        raise NotImplementedError
+    
+    def _store_delete(self, collection: str, ids: List[str]):
+        """Delete records by id; unknown ids are ignored"""
+        raise NotImplementedError
+    
+    def _store_compact(self):
+        """Reclaim space left by deletes (backends without compaction do nothing)"""
+        pass
+    
+    def _store_apply(self, writes: List[WriteOp]):
+        """
+        Apply a batch of writes, atomically where the backend has transactions
+        (this default applies them one by one)
+        """
+        primitives = {"add": self._store_add, "update": self._store_update, "upsert": self._store_upsert}
+        for operation, collection, ids, records, documents in writes:
+            primitives[operation](collection, ids, records, documents)
+    
+    # ==================== RECORD HELPERS ====================
+    
+    def _add_records(self, collection: str, ids: List[str], metadatas: List[Dict], documents: List[str],
+                     durable: bool = False):
+        """Insert records (durable: persisted before returning even when held in memory)"""
+        if self.hot.holds(collection):
+            self.hot.write(collection, ids, metadatas, documents, durable or settings.hot_store_sync_writes)
+        else:
+            self.writer.submit("add", collection, ids, metadatas, documents)
+        self._after_write(collection, ids, metadatas)
+        self.changes.publish(collection, "create", ids, metadatas)
+    
+    def _update_records(self, collection: str, ids: List[str], metadatas: List[Dict], documents: List[str] = None,
+                        durable: bool = False):
+        """Update records (durable: persisted before returning even when held in memory)"""
+        if self.hot.holds(collection):
+            self.hot.write(collection, ids, metadatas, documents, durable or settings.hot_store_sync_writes)
+        else:
+            self.writer.submit("update", collection, ids, metadatas, documents)
+        self._after_write(collection, ids, metadatas)
+        self.changes.publish(collection, "update", ids, metadatas)
+    
+    def _upsert_records(self, collection: str, ids: List[str], metadatas: List[Dict], documents: List[str],
+                        durable: bool = False):
+        """Insert or replace records (durable: persisted before returning even when held in memory)"""
+        if self.hot.holds(collection):
+            self.hot.write(collection, ids, metadatas, documents, durable or settings.hot_store_sync_writes)
+        else:
+            self.writer.submit("upsert", collection, ids, metadatas, documents)
+        self._after_write(collection, ids, metadatas)
+        self.changes.publish(collection, "upsert", ids, metadatas)
+    
+    def _delete_records(self, collection: str, ids: List[str]):
+        """Delete records from memory, the store and the entity cache"""
+        if self.hot.holds(collection):
+            self.hot.remove(collection, ids)
+            # Let an in-flight write-behind batch land before deleting underneath it
+            self.hot.flush()
+        self._store_delete(collection, ids)
+        for record_id in ids:
+            self.cache.invalidate((collection, record_id))
+        if collection == "loads":
+            self._index_load_points(ids, [{} for _ in ids])
+        self.changes.publish(collection, "delete", ids)
+    
+    def _compare_and_update(self, collection: str, record_id: str, updates: Dict, document,
+                            expected: Dict = None, durable: bool = False) -> Optional[Dict]:
+        """
+        Atomically apply updates to the current version of a record
+        
+        Args:
+            collection: Collection name
+            record_id: Record to update
+            updates: Fields to set
+            document: Called with the updated record to build its document text
+            expected: Field values the current record must have, e.g.
+                {"version": 3} or {"status": "available"} (a missing version counts as 0)
+            durable: Persist before returning even when held in memory
+        
+        Returns:
+            The updated record (with its version incremented), or None if it does not exist
+        
+        Raises:
+            ConflictError: If an expected field no longer matches
+        """
+        with self._record_locks[hash((collection, record_id)) % RECORD_LOCK_STRIPES]:
+            record = self._get_current(collection, record_id)
+            if record is None:
+                return None
+            for field, value in (expected or {}).items():
+                actual = record.get(field, 0 if field == "version" else None)
+                if actual != value:
+                    raise ConflictError(collection, record_id, field, value, actual)
+            record.update(updates)
+            record["version"] = int(record.get("version", 0)) + 1
+            self._update_records(collection, [record_id], [record], [document(record)], durable=durable)
+            return record
+    
+    def _get_current(self, collection: str, record_id: str) -> Optional[Dict]:
+        """Read a live record from memory or the store, bypassing the entity cache and archive"""
+        try:
+            if self.hot.holds(collection):
+                records = self.hot.get(collection, [record_id])
+            else:
+                records = self._store_get(collection, [record_id])
+        except:
+            return None
+        return records[0] if records else None
+    
+    def _after_write(self, collection: str, ids: List[str], metadatas: List[Dict]):
+        """Bring the entity cache and load point indexes in step with a write"""
+        if collection in CACHED_COLLECTIONS and not self.hot.holds(collection):
+            for record_id, metadata in zip(ids, metadatas):
+                self.cache.put((collection, record_id), metadata)
+        if collection == "loads":
+            self._index_load_points(ids, metadatas)
+    
+    def _get_record(self, collection: str, record_id: str) -> Optional[Dict]:
+        """Get one record by id, served from memory or the entity cache when possible"""
+        if self.hot.holds(collection):
+            records = self.hot.get(collection, [record_id])
+            return records[0] if records else self._get_archived(collection, record_id)
+        cached = collection in CACHED_COLLECTIONS
+        if cached:
+            record = self.cache.get((collection, record_id))
+            if record is not None:
+                return record
+        try:
+            records = self._store_get(collection, [record_id])
+            if records:
+                if cached:
+                    self.cache.put((collection, record_id), records[0])
+                return records[0]
+        except:
+            pass
+        return self._get_archived(collection, record_id)
+    
+    def _get_archived(self, collection: str, record_id: str) -> Optional[Dict]:
+        """Read an archived record when the tombstone index knows the id"""
+        if not self.archive.contains(collection, record_id):
+            return None
+        try:
+            return self.archive.get(collection, record_id)
+        except:
+            return None
+    
+    def _get_many(self, collection: str, ids: List[str]) -> List[Dict]:
+        """Fetch records by id, reading every cache miss in a single round trip"""
+        if not ids:
+            return []
+        if self.hot.holds(collection):
+            return self.hot.get(collection, ids)
+        if collection not in CACHED_COLLECTIONS:
+            try:
+                return self._store_get(collection, ids)
+            except:
+                return []
+        
+        found = {}
+        for record_id in dict.fromkeys(ids):
+            record = self.cache.get((collection, record_id))
+            if record is not None:
+                found[record_id] = record
+        missing = [record_id for record_id in dict.fromkeys(ids) if record_id not in found]
+        if missing:
+            try:
+                for record in self._store_get(collection, missing):
+                    record_id = record[ID_FIELDS[collection]]
+                    self.cache.put((collection, record_id), record)
+                    found[record_id] = record
+            except:
+                pass
+        return [found[record_id] for record_id in dict.fromkeys(ids) if record_id in found]
+    
+    def _select(self, collection: str, conditions: List[Tuple], order_by=None,
+                limit: int = None, offset: int = 0) -> List[Dict]:
+        if self.hot.holds(collection):
+            return self.hot.select(collection, conditions, order_by, limit, offset)
+        return self._store_select(collection, conditions, order_by, limit, offset)
+    
+    def _count(self, collection: str, conditions: List[Tuple]) -> int:
+        if self.hot.holds(collection):
+            return self.hot.count(collection, conditions)
+        return self._store_count(collection, conditions)
+    
+    def get_by_field(self, collection_name: str, field: str, value) -> List[Dict]:
+        """Get records whose field equals value"""
+        return self.find(collection_name, where={field: value})
+    
+    def count_by_field(self, collection_name: str, field: str, value) -> int:
+        """Count records whose field equals value"""
+        try:
+            return self._count(collection_name, [(field, "$eq", value)])
+        except:
+            return 0
+    
+    # ==================== HOT STORE ====================
+    
+    def _load_hot_set(self):
+        """Read the hot collections into memory and start write-behind (called by backends once open)"""
+        for collection in self.hot.collections:
+            records = self._store_select(collection, [])
+            id_field = ID_FIELDS[collection]
+            self.hot.load(collection, [record[id_field] for record in records], records)
+        self.hot.start()
+    
+    def _persist_hot(self, collection: str, ids: List[str], records: List[Dict], documents: List[str]):
+        """Write-behind target: upsert a batch of hot records into the backing store"""
+        self.writer.submit("upsert", collection, ids, records, documents)
+    
+    def flush(self) -> int:
+        """Persist all queued hot-store writes now; returns the number of records written"""
+        return self.hot.flush()
+    
+    def close(self):
+        """Flush queued writes and stop background work"""
+        self.hot.close()
+    
+    # ==================== QUERIES ====================
+    
+    def find(self, collection_name: str, where: Dict = None, order_by=None,
+             limit: int = None, offset: int = 0, include_archived: bool = False) -> List[Dict]:
+        """
+        Query a collection with filtering done by the store
+        
+        Args:
+            collection_name: Collection to query (e.g. "trips")
+            where: {"field": value} for equality or {"field": {"$op": value}} with
+                $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte or $prefix
+            order_by: Field name, "-field" for descending, or a list of them
+            limit: Maximum number of records to return
+            offset: Number of matching records to skip
+            include_archived: Also search the cold archive (for reporting; reads
+                every archive partition of the collection)
+        
+        Returns:
+            List of matching records
+        
+        Raises:
+            ValueError: For an unknown collection or operator
+        """
+        conditions = normalize_where(where)
+        if include_archived:
+            return self._find_with_archive(collection_name, conditions, order_by, limit, offset)
+        try:
+            return self._select(collection_name, conditions, order_by, limit, offset)
+        except ValueError:
+            raise
+        except:
+            return []
+    
+    def _find_with_archive(self, collection_name: str, conditions: List[Tuple], order_by,
+                           limit: int, offset: int) -> List[Dict]:
+        """find() over live and archived records; a live record wins over its archived copy"""
+        try:
+            live = self._select(collection_name, conditions)
+            start_month, end_month = self._archive_months(collection_name, conditions)
+            archived = list(self.archive.scan(collection_name, conditions, start_month, end_month))
+        except ValueError:
+            raise
+        except:
+            return []
+        
+        id_field = ID_FIELDS.get(collection_name)
+        if id_field:
+            live_ids = {record.get(id_field) for record in live}
+            archived = [record for record in archived if record.get(id_field) not in live_ids]
+        records = sort_records(live + archived, order_by)
+        end = offset + limit if limit is not None else None
+        return records[offset:end]
+    
+    @staticmethod
+    def _archive_months(collection_name: str, conditions: List[Tuple]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Partition bounds implied by conditions on the field archive partitions are keyed by
+        
+        Returns:
+            (start_month, end_month), either None when unbounded
+        """
+        age_fields = {field for name, _, field in ARCHIVE_POLICIES if name == collection_name}
+        if len(age_fields) != 1:
+            return None, None
+        age_field = age_fields.pop()
+        start_month = end_month = None
+        for field, operator, value in conditions:
+            if field != age_field or not isinstance(value, str) or len(value) < 7:
+                continue
+            if operator in ("$eq", "$prefix"):
+                start_month = end_month = value[:7]
+            elif operator in ("$gt", "$gte"):
+                start_month = max(start_month or "", value[:7])
+            elif operator in ("$lt", "$lte"):
+                end_month = min(end_month or value[:7], value[:7])
+        return start_month, end_month
+    
+    def page(self, collection_name: str, where: Dict = None, order_by: str = "created_at",
+             limit: int = 50, cursor: str = None) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Keyset pagination over a collection
+        
+        Records are ordered by (order_by, record id), so pages stay stable while
+        records are added or removed between requests.
+        
+        Args:
+            collection_name: Collection to query
+            where: Filter, as for find()
+            order_by: Field name, "-field" for descending
+            limit: Page size
+            cursor: next_cursor returned with the previous page, None for the first page
+        
+        Returns:
+            (records, next_cursor); next_cursor is None on the last page
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        conditions = normalize_where(where)
+        descending = order_by.startswith("-")
+        after = decode_cursor(cursor) if cursor else None
+        
+        try:
+            page = self.hot.page if self.hot.holds(collection_name) else self._store_page
+            window = page(collection_name, conditions, order_by.lstrip("-"), descending, after, limit + 1)
+        except ValueError:
+            raise
+        except:
+            return [], None
+        
+        records = [record for _, record in window[:limit]]
+        next_cursor = encode_cursor(window[limit - 1][0]) if len(window) > limit else None
+        return records, next_cursor
+    
+    # ==================== OWNERS ====================
+    
+    def create_owner(self, name: str, email: str) -> Dict:
+        """Create a new owner"""
+        owner_id = str(uuid.uuid4())
+        owner = {
+            "owner_id": owner_id,
+            "name": name,
+            "email": email,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        
+        self._add_records(
+            "owners",
+            ids=[owner_id],
+            metadatas=[owner],
+            documents=[name]
+        )
+        return owner
+    
+    def get_owner(self, owner_id: str) -> Optional[Dict]:
+        """Get owner by ID"""
+        return self._get_record("owners", owner_id)
+    
+    # ==================== DRIVERS ====================
+    
+    def create_driver(self, name: str, phone: str, truck_id: str, hourly_rate: float = 25.0) -> Dict:
+        """Create a new driver"""
+        driver_id = str(uuid.uuid4())
+        driver = {
+            "driver_id": driver_id,
+            "name": name,
+            "phone": phone,
+            "truck_id": truck_id,
+            "hourly_rate": hourly_rate,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        
+        self._add_records(
+            "drivers",
+            ids=[driver_id],
+            metadatas=[driver],
+            documents=[name]
+        )
+        return driver
+    
+    def get_driver(self, driver_id: str) -> Optional[Dict]:
+        """Get driver by ID"""
+        return self._get_record("drivers", driver_id)
+    
+    def get_driver_for_truck(self, truck_id: str) -> Optional[Dict]:
+        """Get the driver assigned to a truck"""
+        drivers = self.get_by_field("drivers", "truck_id", truck_id)
+        return drivers[0] if drivers else None
+    
+    # ==================== VENDORS ====================
+    
+    def create_vendor(self, name: str, email: str, phone: str, location_lat: float, location_lng: float) -> Dict:
+        """Create a new vendor"""
+        vendor_id = str(uuid.uuid4())
+        vendor = {
+            "vendor_id": vendor_id,
+            "name": name,
+            "email": email,
+            "phone": phone,
+            "location_lat": location_lat,
+            "location_lng": location_lng,
+            "created_at": datetime.utcnow().isoformat()
+        }
+        
+        self._add_records(
+            "vendors",
+            ids=[vendor_id],
+            metadatas=[vendor],
+            documents=[name]
+        )
+        return vendor
+    
+    def get_vendor(self, vendor_id: str) -> Optional[Dict]:
+        """Get vendor by ID"""
+        return self._get_record("vendors", vendor_id)
+    
+    # ==================== TRUCKS ====================
+    
+    def create_truck(self, owner_id: str, license_plate: str, fuel_consumption_rate: float = 0.35) -> Dict:
+        """Create a new truck"""
+        truck_id = str(uuid.uuid4())
+        truck = {
+            "truck_id": truck_id,
+            "owner_id": owner_id,
+            "license_plate": license_plate,
+            "fuel_consumption_rate": fuel_consumption_rate,
+            "status": "idle",
+            "created_at": datetime.utcnow().isoformat()
+        }
+        
+        self._add_records(
+            "trucks",
+            ids=[truck_id],
+            metadatas=[truck],
+            documents=[license_plate]
+        )
+        return truck
+    
+    def get_truck(self, truck_id: str) -> Optional[Dict]:
+        """Get truck by ID"""
+        return self._get_record("trucks", truck_id)
+    
+    def get_owner_trucks(self, owner_id: str) -> List[Dict]:
+        """Get all trucks belonging to an owner"""
+        return self.get_by_field("trucks", "owner_id", owner_id)
+    
+    def update_truck(self, truck_id: str, updates: Dict, expected: Dict = None) -> Optional[Dict]:
+        """Update truck (expected: field values required for the update, see _compare_and_update)"""
+        return self._compare_and_update(
+            "trucks", truck_id, updates,
+            document=lambda truck: truck['license_plate'],
+            expected=expected
+        )
+    
+    # ==================== TRIPS ====================
+    
+    def create_trip(self, driver_id: str, truck_id: str, origin_lat: float, origin_lng: float,
+                   origin_address: str, destination_lat: float, destination_lng: float,
+                   destination_address: str, outbound_load: str) -> Dict:
+        """Create a new trip"""
+        trip_id = str(uuid.uuid4())
+        trip = {
+            "trip_id": trip_id,
+            "driver_id": driver_id,
+            "truck_id": truck_id,
+            "origin_lat": origin_lat,
+            "origin_lng": origin_lng,
+            "origin_address": origin_address,
+            "destination_lat": destination_lat,
+            "destination_lng": destination_lng,
+            "destination_address": destination_address,
+            "outbound_load": outbound_load,
+            "is_deadheading": False,
+            "status": "active",
+            "created_at": datetime.utcnow().isoformat(),
+            "completed_at": "",  # Empty string instead of None
+            "version": 1
+        }
+        
+        self._add_records(
+            "trips",
+            ids=[trip_id],
+            metadatas=[trip],
+            documents=[f"{origin_address} to {destination_address}"]
+        )
+        return trip
+    
+    def get_trip(self, trip_id: str) -> Optional[Dict]:
+        """Get trip by ID"""
+        return self._get_record("trips", trip_id)
+    
+    def update_trip(self, trip_id: str, updates: Dict, expected: Dict = None) -> Optional[Dict]:
+        """Update trip (expected: field values required for the update, see _compare_and_update)"""
+        return self._compare_and_update(
+            "trips", trip_id, updates,
+            document=lambda trip: f"{trip['origin_address']} to {trip['destination_address']}",
+            expected=expected
+        )
+    
+    def mark_deadheading(self, trip_id: str) -> Optional[Dict]:
+        """Mark trip as deadheading"""
+        return self.update_trip(trip_id, {"is_deadheading": True})
+    
+    # ==================== LOADS ====================
+    
+    def create_load(self, vendor_id: str, weight_kg: float, pickup_lat: float, pickup_lng: float,
+                   pickup_address: str, destination_lat: float, destination_lng: float,
+                   destination_address: str, price_offered: float, currency: str = "INR") -> Dict:
+        """Create a new load"""
+        load = self._new_load(
+            vendor_id, weight_kg, pickup_lat, pickup_lng, pickup_address,
+            destination_lat, destination_lng, destination_address, price_offered, currency
+        )
+        
+        self._add_records(
+            "loads",
+            ids=[load['load_id']],
+            metadatas=[load],
+            documents=[f"{pickup_address} to {destination_address}"]
+        )
+        return load
+    
+    def create_loads(self, loads: List[Dict]) -> Dict:
+        """
+        Create many loads in one write
+        
+        Args:
+            loads: Rows keyed like create_load's arguments
+        
+        Returns:
+            {"created": [load, ...], "errors": [{"index": i, "error": message}, ...]}
+            Invalid rows are reported and skipped; valid rows are still written.
+        """
+        created = []
+        errors = []
+        for index, row in enumerate(loads):
+            error = _check_row(
+                row, LOAD_FIELDS,
+                positive=("weight_kg", "price_offered"),
+                coordinates=(("pickup_lat", "pickup_lng"), ("destination_lat", "destination_lng"))
+            )
+            if error:
+                errors.append({"index": index, "error": error})
+            else:
+                created.append(self._new_load(**row))
+        
+        if created:
+            self._add_records(
+                "loads",
+                ids=[load['load_id'] for load in created],
+                metadatas=created,
+                documents=[f"{load['pickup_address']} to {load['destination_address']}" for load in created]
+            )
+        return {"created": created, "errors": errors}
+    
+    @staticmethod
+    def _new_load(vendor_id: str, weight_kg: float, pickup_lat: float, pickup_lng: float,
+                  pickup_address: str, destination_lat: float, destination_lng: float,
+                  destination_address: str, price_offered: float, currency: str = "INR") -> Dict:
+        """Build a new available load record"""
+        return {
+            "load_id": str(uuid.uuid4()),
+            "vendor_id": vendor_id,
+            "weight_kg": weight_kg,
+            "pickup_lat": pickup_lat,
+            "pickup_lng": pickup_lng,
+            "pickup_address": pickup_address,
+            "destination_lat": destination_lat,
+            "destination_lng": destination_lng,
+            "destination_address": destination_address,
+            "price_offered": price_offered,
+            "currency": currency,
+            "status": "available",
+            "assigned_driver_id": "",  # Empty string instead of None
+            "assigned_trip_id": "",  # Empty string instead of None
+            "created_at": datetime.utcnow().isoformat(),
+            "assigned_at": "",
+            "picked_up_at": "",
+            "delivered_at": "",
+            "version": 1
+        }
+    
+    def get_load(self, load_id: str) -> Optional[Dict]:
+        """Get load by ID"""
+        return self._get_record("loads", load_id)
+    
+    def get_available_loads(self) -> List[Dict]:
+        """Get all available loads"""
+        return self.get_by_field("loads", "status", "available")
+    
+    def update_load(self, load_id: str, updates: Dict, durable: bool = False,
+                    expected: Dict = None) -> Optional[Dict]:
+        """
+        Update load (durable: persisted before returning; expected: field values
+        required for the update, see _compare_and_update)
+        """
+        return self._compare_and_update(
+            "loads", load_id, updates,
+            document=lambda load: f"{load['pickup_address']} to {load['destination_address']}",
+            expected=expected,
+            durable=durable
+        )
+    
+    def accept_load(self, load_id: str, trip_id: str, driver_id: str) -> Optional[Dict]:
+        """
+        Accept a load (a priced commitment, so persisted before returning)
+        
+        Raises:
+            ConflictError: If the load is no longer available
+        """
+        return self.update_load(load_id, {
+            "status": "assigned",
+            "assigned_trip_id": trip_id,
+            "assigned_driver_id": driver_id,
+            "assigned_at": datetime.utcnow().isoformat()
+        }, durable=True, expected={"status": "available"})
+    
+    def get_load_for_trip(self, trip_id: str) -> Optional[Dict]:
+        """Get the load assigned to a trip, if any"""
+        if not trip_id:
+            return None
+        loads = self.find("loads", where={"assigned_trip_id": trip_id}, limit=1)
+        return loads[0] if loads else None
+    
+    def trips_without_loads(self, status: str = "active") -> List[Dict]:
+        """Get trips in a status that have no load assigned yet"""
+        try:
+            trips = self.find("trips", where={"status": status})
+            if not trips:
+                return []
+            loaded = self._trips_with_loads([trip['trip_id'] for trip in trips])
+            return [trip for trip in trips if trip['trip_id'] not in loaded]
+        except:
+            return []
+    
+    def _trips_with_loads(self, trip_ids: List[str]) -> set:
+        """Subset of trip ids that have a load assigned (one query for all of them)"""
+        if self.hot.holds("loads"):
+            # The hot store's assigned_trip_id postings are the trip -> load mapping
+            return self.hot.posted_values("loads", "assigned_trip_id", trip_ids)
+        loads = self.find("loads", where={"assigned_trip_id": {"$in": trip_ids}})
+        return {load['assigned_trip_id'] for load in loads}
+    
+    # ==================== LOAD LOCATIONS ====================
+    
+    def loads_within(self, lat: float, lng: float, radius_km: float, point: str = "pickup") -> List[Dict]:
+        """
+        Get available loads whose pickup (or destination) point is within a
+        great-circle radius, nearest first
+        
+        Args:
+            lat: Search centre latitude
+            lng: Search centre longitude
+            radius_km: Straight-line radius in km (not road distance)
+            point: "pickup" or "destination"
+        """
+        found = self._load_point_index(point).within(lat, lng, radius_km)
+        return self._available_loads([load_id for load_id, _ in found])
+    
+    def nearest_loads(self, lat: float, lng: float, k: int = 1, point: str = "pickup") -> List[Dict]:
+        """Get the k available loads whose pickup (or destination) point is closest, nearest first"""
+        found = self._load_point_index(point).nearest(lat, lng, k)
+        return self._available_loads([load_id for load_id, _ in found])
+    
+    def loads_in_box(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float,
+                     point: str = "pickup") -> List[Dict]:
+        """Get available loads whose pickup (or destination) point is inside a lat/lng box"""
+        return self._available_loads(self._load_point_index(point).in_box(min_lat, min_lng, max_lat, max_lng))
+    
+    def loads_in_corridor(self, from_lat: float, from_lng: float, to_lat: float, to_lng: float,
+                          max_length_km: float) -> List[Dict]:
+        """
+        Get available loads whose pickup and destination both lie in a route
+        corridor, shortest path via the pickup first
+        
+        The corridor is the ellipse of points P with
+        d(from, P) + d(P, to) <= max_length_km (straight-line km). A load whose
+        detour from -> pickup -> destination -> to is at most
+        max_length_km - d(from, to) has both of its points inside it.
+        """
+        pickups = self._load_point_index("pickup").within_ellipse(from_lat, from_lng, to_lat, to_lng, max_length_km)
+        if not pickups:
+            return []
+        destinations = self._load_point_index("destination").within_ellipse(
+            from_lat, from_lng, to_lat, to_lng, max_length_km
+        )
+        inside = {load_id for load_id, _ in destinations}
+        return self._available_loads([load_id for load_id, _ in pickups if load_id in inside])
+    
+    def _load_point_index(self, point: str) -> GeoGridIndex:
+        """Grid index of one load point, built from the available loads on first use"""
+        if point not in LOAD_POINTS:
+            raise ValueError(f"Unknown load point: {point} (expected one of {', '.join(LOAD_POINTS)})")
+        with self._load_points_lock:
+            if not self._load_points_ready:
+                loads = self.get_available_loads()
+                self._put_load_points([load['load_id'] for load in loads], loads)
+                self._load_points_ready = True
+        return self.load_points[point]
+    
+    def _index_load_points(self, ids: List[str], records: List[Dict]):
+        """Index loads that are available and drop the rest (once the indexes are built)"""
+        with self._load_points_lock:
+            if self._load_points_ready:
+                self._put_load_points(ids, records)
+    
+    def _put_load_points(self, ids: List[str], records: List[Dict]):
+        for load_id, record in zip(ids, records):
+            for name, (lat_field, lng_field) in LOAD_POINTS.items():
+                lat, lng = record.get(lat_field), record.get(lng_field)
+                if record.get("status") == "available" and _is_number(lat) and _is_number(lng):
+                    self.load_points[name].put(load_id, float(lat), float(lng))
+                else:
+                    self.load_points[name].remove(load_id)
+    
+    def _available_loads(self, load_ids: List[str]) -> List[Dict]:
+        """Fetch loads in the given order, skipping any no longer available"""
+        loads = {load['load_id']: load for load in self._get_many("loads", load_ids)}
+        return [
+            loads[load_id] for load_id in load_ids
+            if load_id in loads and loads[load_id].get("status") == "available"
+        ]
+    
+    # ==================== ALLOCATIONS ====================
+    
+    def create_allocation(self, vehicle_id: str, load_id: str, owner_id: str) -> Dict:
+        """Create a new manual allocation"""
+        allocation_id = str(uuid.uuid4())
+        allocation = {
+            "allocation_id": allocation_id,
+            "vehicle_id": vehicle_id,
+            "load_id": load_id,
+            "owner_id": owner_id,
+            "status": "active",
+            "allocated_at": datetime.utcnow().isoformat(),
+            "completed_at": "",
+            "cancelled_at": "",
+            "created_at": datetime.utcnow().isoformat(),
+            "version": 1
+        }
+        
+        self._add_records(
+            "allocations",
+            ids=[allocation_id],
+            metadatas=[allocation],
+            documents=[f"Allocation {vehicle_id} to {load_id}"],
+            durable=True
+        )
+        return allocation
+    
+    def get_allocation(self, allocation_id: str) -> Optional[Dict]:
+        """Get allocation by ID"""
+        return self._get_record("allocations", allocation_id)
+    
+    def get_active_allocations(self) -> List[Dict]:
+        """Get all active allocations"""
+        return self.get_by_field("allocations", "status", "active")
+    
+    def get_driver_allocations(self, driver_id: str) -> List[Dict]:
+        """Get all allocations for a driver's truck"""
+        driver = self.get_driver(driver_id)
+        if not driver or not driver.get('truck_id'):
+            return []
+        return self.get_by_field("allocations", "vehicle_id", driver['truck_id'])
+    
+    def get_driver_allocated_loads(self, driver_id: str) -> Optional[Dict]:
+        """
+        Resolve driver -> truck -> active allocations -> loads -> latest truck position
+        
+        Returns:
+            {"driver", "truck_id", "location", "allocations": [(allocation, load), ...]},
+            or None when the driver or its truck is unknown. location is None
+            when the truck has never reported a position.
+        """
+        driver = self.get_driver(driver_id)
+        truck_id = driver.get('truck_id') if driver else None
+        if not truck_id:
+            return None
+        return {
+            "driver": driver,
+            "truck_id": truck_id,
+            "location": self.get_latest_location(truck_id),
+            "allocations": self._active_allocated_loads(truck_id)
+        }
+    
+    def _active_allocated_loads(self, vehicle_id: str) -> List[Tuple[Dict, Dict]]:
+        """
+        Active allocations of a vehicle paired with their loads, oldest first
+        
+        With allocations and loads hot (the default) neither read reaches the
+        store: the allocations come from the smaller of the vehicle_id and
+        status postings, and the loads are by-id lookups in memory.
+        """
+        try:
+            allocations = self.find(
+                "allocations", where={"vehicle_id": vehicle_id, "status": "active"}, order_by="allocated_at"
+            )
+        except:
+            return []
+        loads = {load['load_id']: load for load in self._get_many("loads", [a['load_id'] for a in allocations])}
+        return [(a, loads[a['load_id']]) for a in allocations if a['load_id'] in loads]
+    
+    def update_allocation(self, allocation_id: str, updates: Dict, expected: Dict = None) -> Optional[Dict]:
+        """Update allocation (expected: field values required for the update, see _compare_and_update)"""
+        return self._compare_and_update(
+            "allocations", allocation_id, updates,
+            document=lambda allocation: f"Allocation {allocation['vehicle_id']} to {allocation['load_id']}",
+            expected=expected,
+            durable=True
+        )
+    
+    def cancel_allocation(self, allocation_id: str) -> Optional[Dict]:
+        """
+        Cancel an active allocation
+        
+        Raises:
+            ConflictError: If the allocation is no longer active
+        """
+        return self.update_allocation(allocation_id, {
+            "status": "cancelled",
+            "cancelled_at": datetime.utcnow().isoformat()
+        }, expected={"status": "active"})
+    
+    # ==================== LOCATION HISTORY ====================
+    
+    def add_location_update(self, vehicle_id: str, latitude: float, longitude: float, accuracy: float) -> Dict:
+        """Add a location update for a vehicle"""
+        location = self._new_location(vehicle_id, latitude, longitude, accuracy)
+        
+        self.tracks.append(vehicle_id, latitude, longitude, accuracy, location['recorded_at'])
+        self.changes.publish("location_history", "create", [location['location_id']], [location])
+        self._upsert_records(
+            "vehicle_positions",
+            ids=[vehicle_id],
+            metadatas=[location],
+            documents=[f"Location {vehicle_id}"]
+        )
+        return location
+    
+    def add_location_updates(self, updates: List[Dict]) -> Dict:
+        """
+        Add many location updates in one write per vehicle track
+        
+        Args:
+            updates: Rows with vehicle_id, latitude, longitude, accuracy and an
+                optional recorded_at (datetime or ISO string, defaults to now)
+        
+        Returns:
+            {"created": [location, ...], "errors": [{"index": i, "error": message}, ...]}
+            Invalid rows are reported and skipped; valid rows are still written.
+        """
+        created = []
+        errors = []
+        for index, row in enumerate(updates):
+            error = _check_row(row, LOCATION_FIELDS, coordinates=(("latitude", "longitude"),))
+            if not error and not _is_number(row['accuracy']):
+                error = "accuracy must be a number"
+            if not error:
+                try:
+                    row = dict(row, recorded_at=from_epoch_ms(to_epoch_ms(row.get('recorded_at'))))
+                except (TypeError, ValueError):
+                    error = "recorded_at must be a datetime or ISO 8601 string"
+            if error:
+                errors.append({"index": index, "error": error})
+            else:
+                created.append(self._new_location(**row))
+        if not created:
+            return {"created": created, "errors": errors}
+        
+        by_vehicle = {}
+        for location in created:
+            by_vehicle.setdefault(location['vehicle_id'], []).append(location)
+        for vehicle_id, locations in by_vehicle.items():
+            self.tracks.append_many(vehicle_id, [
+                (l['recorded_at'], l['latitude'], l['longitude'], l['accuracy']) for l in locations
+            ])
+        self.changes.publish("location_history", "create", [l['location_id'] for l in created], created)
+        
+        # Only move a vehicle's position forward; uploads may carry older readings
+        current = self.get_latest_locations(list(by_vehicle))
+        positions = {}
+        for vehicle_id, locations in by_vehicle.items():
+            newest = max(locations, key=lambda l: l['recorded_at'])
+            existing = current.get(vehicle_id)
+            if existing is None or newest['recorded_at'] >= existing.get('recorded_at', ''):
+                positions[vehicle_id] = newest
+        if positions:
+            self._upsert_records(
+                "vehicle_positions",
+                ids=list(positions),
+                metadatas=list(positions.values()),
+                documents=[f"Location {vehicle_id}" for vehicle_id in positions]
+            )
+        return {"created": created, "errors": errors}
+    
+    @staticmethod
+    def _new_location(vehicle_id: str, latitude: float, longitude: float, accuracy: float,
+                      recorded_at: datetime = None) -> Dict:
+        """Build a location record; recorded_at defaults to now"""
+        now = datetime.utcnow()
+        return {
+            "location_id": str(uuid.uuid4()),
+            "vehicle_id": vehicle_id,
+            "latitude": latitude,
+            "longitude": longitude,
+            "accuracy": accuracy,
+            "recorded_at": (recorded_at or now).isoformat(),
+            "created_at": now.isoformat()
+        }
+    
+    def get_latest_location(self, vehicle_id: str) -> Optional[Dict]:
+        """Get the latest location for a vehicle"""
+        return self._get_record("vehicle_positions", vehicle_id)
+    
+    def get_latest_locations(self, vehicle_ids: List[str]) -> Dict[str, Dict]:
+        """Get the latest location for many vehicles, keyed by vehicle_id"""
+        positions = self._get_many("vehicle_positions", list(dict.fromkeys(vehicle_ids)))
+        return {position['vehicle_id']: position for position in positions}
+    
+    def get_location_track(self, vehicle_id: str, start=None, end=None) -> Dict:
+        """
+        Get a vehicle's GPS track as column arrays
+        
+        Args:
+            vehicle_id: Vehicle ID
+            start: Inclusive start (datetime or ISO string), None for the beginning
+            end: Exclusive end (datetime or ISO string), None for now
+        
+        Returns:
+            Dict of NumPy arrays "t" (epoch ms), "lat", "lng", "acc" in time order
+        """
+        return self.tracks.read(vehicle_id, start, end)
+    
+    def get_location_history(self, vehicle_id: str, start=None, end=None) -> List[Dict]:
+        """Get a vehicle's GPS track as location records"""
+        track = self.get_location_track(vehicle_id, start, end)
+        return [
+            {
+                "vehicle_id": vehicle_id,
+                "latitude": float(lat),
+                "longitude": float(lng),
+                "accuracy": float(acc),
+                "recorded_at": from_epoch_ms(int(t)).isoformat()
+            }
+            for t, lat, lng, acc in zip(track["t"], track["lat"], track["lng"], track["acc"])
+        ]
+    
+    def _backfill_vehicle_positions(self):
+        """Derive current positions from location history recorded before the position store existed"""
+        try:
+            if self._store_count("vehicle_positions", []) > 0:
+                return
+            history = self._store_select("location_history", [])
+        except:
+            return
+        
+        latest = {}
+        for location in history:
+            vehicle_id = location.get('vehicle_id')
+            current = latest.get(vehicle_id)
+            if current is None or location.get('recorded_at', '') > current.get('recorded_at', ''):
+                latest[vehicle_id] = location
+        
+        if latest:
+            self._upsert_records(
+                "vehicle_positions",
+                ids=list(latest.keys()),
+                metadatas=list(latest.values()),
+                documents=[f"Location {vehicle_id}" for vehicle_id in latest]
+            )
+    
+    def _migrate_location_history(self):
+        """
+        Move location_history rows written before the track store existed into it
+        
+        Rows are deleted once their vehicle's track has them, so this runs only
+        while legacy rows remain. Rows without a vehicle, coordinates or a
+        readable recorded_at are left in place.
+        """
+        try:
+            history = self._store_select("location_history", [])
+        except:
+            return
+        
+        by_vehicle = {}
+        for location in history:
+            try:
+                reading = (
+                    to_epoch_ms(location['recorded_at']), float(location['latitude']),
+                    float(location['longitude']), float(location.get('accuracy') or 0.0)
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+            if location.get('vehicle_id') and location.get('location_id'):
+                by_vehicle.setdefault(location['vehicle_id'], []).append((location['location_id'], reading))
+        
+        for vehicle_id, rows in by_vehicle.items():
+            self.tracks.append_many(vehicle_id, [reading for _, reading in rows])
+            self._store_delete("location_history", [location_id for location_id, _ in rows])
+    
+    # ==================== NOTIFICATIONS ====================
+    
+    def create_notification(self, driver_id: str, notification_type: str, title: str, 
+                          message: str, load_id: str = "", waypoint_type: str = "") -> Dict:
+        """Create a notification for a driver"""
+        notification = self._new_notification(
+            driver_id, notification_type, title, message, load_id, waypoint_type
+        )
+        
+        self._add_records(
+            "notifications",
+            ids=[notification['notification_id']],
+            metadatas=[notification],
+            documents=[title]
+        )
+        return notification
+    
+    def create_notifications(self, notifications: List[Dict]) -> Dict:
+        """
+        Create many notifications in one write
+        
+        Args:
+            notifications: Rows keyed like create_notification's arguments
+        
+        Returns:
+            {"created": [notification, ...], "errors": [{"index": i, "error": message}, ...]}
+            Invalid rows are reported and skipped; valid rows are still written.
+        """
+        created = []
+        errors = []
+        for index, row in enumerate(notifications):
+            error = _check_row(row, NOTIFICATION_FIELDS)
+            if error:
+                errors.append({"index": index, "error": error})
+            else:
+                created.append(self._new_notification(**row))
+        
+        if created:
+            self._add_records(
+                "notifications",
+                ids=[n['notification_id'] for n in created],
+                metadatas=created,
+                documents=[n['title'] for n in created]
+            )
+        return {"created": created, "errors": errors}
+    
+    @staticmethod
+    def _new_notification(driver_id: str, notification_type: str, title: str,
+                          message: str, load_id: str = "", waypoint_type: str = "") -> Dict:
+        """Build an unread notification record"""
+        return {
+            "notification_id": str(uuid.uuid4()),
+            "driver_id": driver_id,
+            "type": notification_type,
+            "title": title,
+            "message": message,
+            "load_id": load_id or "",
+            "waypoint_type": waypoint_type or "",
+            "is_read": False,
+            "created_at": datetime.utcnow().isoformat()
+        }
+    
+    def get_driver_notifications(self, driver_id: str) -> List[Dict]:
+        """Get all notifications for a driver"""
+        notifications = self.get_by_field("notifications", "driver_id", driver_id)
+        notifications.sort(key=lambda x: x.get('created_at', ''))
+        return notifications
+    
+    def get_unread_count(self, driver_id: str) -> int:
+        """Get count of unread notifications for a driver"""
+        notifications = self.get_driver_notifications(driver_id)
+        return len([n for n in notifications if not n.get('is_read', False)])
+    
+    def mark_notification_read(self, notification_id: str) -> Optional[Dict]:
+        """Mark a notification as read"""
+        notification = self.get_notification(notification_id)
+        if notification:
+            notification['is_read'] = True
+            self._update_records(
+                "notifications",
+                ids=[notification_id],
+                metadatas=[notification],
+                documents=[notification['title']]
+            )
+            return notification
+        return None
+    
+    def get_notification(self, notification_id: str) -> Optional[Dict]:
+        """Get notification by ID"""
+        return self._get_record("notifications", notification_id)
+    
+    # ==================== EXPENSES & REPORTS ====================
+    
+    def create_expense(self, expense: Dict) -> Dict:
+        """Store a prepared expense record"""
+        self._add_records(
+            "expenses",
+            ids=[expense['expense_id']],
+            metadatas=[expense],
+            documents=[f"{expense['category']}: {expense['description']}"]
+        )
+        return expense
+    
+    def create_report(self, report: Dict) -> Dict:
+        """Store a prepared daily report record"""
+        self._add_records(
+            "reports",
+            ids=[report['report_id']],
+            metadatas=[report],
+            documents=[f"Report for {report['driver_id']} on {report['date']}"]
+        )
+        return report
+    
+    def get_report(self, report_id: str) -> Optional[Dict]:
+        """Get report by ID"""
+        return self._get_record("reports", report_id)
+    
+    # ==================== ARCHIVAL ====================
+    
+    def archive_terminal_records(self, older_than_days: int = None, now: datetime = None) -> Dict[str, int]:
+        """
+        Move terminal-state records older than the cutoff into the cold archive
+        
+        Delivered loads, completed trips, completed/cancelled allocations and
+        read notifications (see ARCHIVE_POLICIES) are appended to month
+        partitions, then deleted from the live store. By-id reads keep finding
+        them through the archive's tombstone index. GPS track partitions older
+        than the cutoff are archived too, without tombstones.
+        
+        Args:
+            older_than_days: Minimum age (defaults to settings.archive_after_days)
+            now: Reference time (defaults to now, UTC)
+        
+        Returns:
+            Number of records archived per collection
+        """
+        if older_than_days is None:
+            older_than_days = settings.archive_after_days
+        cutoff = (now or datetime.utcnow()) - timedelta(days=older_than_days)
+        cutoff_iso = cutoff.isoformat()
+        
+        archived = {}
+        for collection, where, age_field in ARCHIVE_POLICIES:
+            records = self.find(collection, where={**where, age_field: {"$gt": "", "$lt": cutoff_iso}})
+            if not records:
+                continue
+            id_field = ID_FIELDS[collection]
+            ids = [record[id_field] for record in records]
+            self.archive.append(collection, [
+                (record[id_field], record[age_field][:7], record) for record in records
+            ])
+            self._delete_records(collection, ids)
+            archived[collection] = archived.get(collection, 0) + len(ids)
+        
+        points = 0
+        for vehicle_id, partition in self.tracks.partitions_before(cutoff):
+            track = self.tracks.read_partition(vehicle_id, partition)
+            month = f"{partition[:4]}-{partition[4:6]}"
+            points += self.archive.append("location_history", [
+                (f"{vehicle_id}:{int(t)}", month, {
+                    "vehicle_id": vehicle_id,
+                    "latitude": float(lat),
+                    "longitude": float(lng),
+                    "accuracy": float(acc),
+                    "recorded_at": from_epoch_ms(int(t)).isoformat()
+                })
+                for t, lat, lng, acc in zip(track["t"], track["lat"], track["lng"], track["acc"])
+            ], tombstone=False)
+            self.tracks.drop_partition(vehicle_id, partition)
+        if points:
+            archived["location_history"] = points
+        
+        if archived:
+            self._store_compact()
+        return archived
+    
+    def apply_track_retention(self, now: datetime = None) -> Dict[str, int]:
+        """
+        Delete GPS tracks older than settings.track_retention_days and compact the track store
+        
+        Tracks move to the archive after archive_after_days (see
+        archive_terminal_records); retention then deletes them wherever they
+        are: track store day partitions past the cutoff, and archived months
+        that end before it. Compaction sorts partitions written out of order,
+        so reads no longer sort them.
+        
+        Returns:
+            Counts of deleted track partitions, deleted archive months and compacted partitions
+        """
+        cutoff = (now or datetime.utcnow()) - timedelta(days=settings.track_retention_days)
+        return {
+            "track_partitions_deleted": self.tracks.apply_retention(now),
+            "archived_track_months_deleted": self.archive.drop_months_before("location_history", cutoff.strftime("%Y-%m")),
+            "track_partitions_compacted": self.tracks.compact()
+        }
+    
+    # ==================== UTILITY ====================
+    
+    def clear_all_data(self):
+        """Clear all data (for testing)"""
+        self.hot.clear(CLEARED_COLLECTIONS)
+        self._store_clear(CLEARED_COLLECTIONS)
+        self.tracks.clear()
+        self.archive.clear()
+        self.cache.clear()
+        with self._load_points_lock:
+            for index in self.load_points.values():
+                index.clear()
+        for collection in CLEARED_COLLECTIONS:
+            self.changes.publish(collection, "clear", [None])
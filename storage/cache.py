@@ -0,0 +1,106 @@
+"""
+Entity Cache
+Bounded LRU cache of records read by id, refreshed by every database write
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, List, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache of metadata records.
+    
+    Records are copied on the way in and out, so callers that mutate a
+    returned record (e.g. before writing it back) never alter the cached one.
+    Immutable values such as distances can be cached without copying.
+    Like the secondary indexes, it only sees writes made through the owning
+    database instance.
+    """
+    
+    def __init__(self, maxsize: int = 1024, copy: Optional[Callable] = dict):
+        """
+        Args:
+            maxsize: Maximum number of records kept; 0 disables caching
+            copy: Applied to values on the way in and out; None stores
+                immutable values (numbers, tuples) as they are
+        """
+        self.maxsize = max(0, maxsize)
+        self._copy = copy or (lambda value: value)
+        self._lock = threading.Lock()
+        self._records: "OrderedDict[Hashable, Dict]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, key: Hashable) -> Optional[Dict]:
+        """Get a copy of a cached record, or None on a miss"""
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                self.misses += 1
+                return None
+            self._records.move_to_end(key)
+            self.hits += 1
+            return self._copy(record)
+    
+    def get_many(self, keys: Iterable[Hashable]) -> List[Optional[Dict]]:
+        """Look up several keys under one lock; None for each miss"""
+        found = []
+        with self._lock:
+            for key in keys:
+                record = self._records.get(key)
+                if record is None:
+                    self.misses += 1
+                    found.append(None)
+                else:
+                    self._records.move_to_end(key)
+                    self.hits += 1
+                    found.append(self._copy(record))
+        return found
+    
+    def put(self, key: Hashable, record: Dict):
+        """Cache a record, evicting the least recently used one when full"""
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._store(key, record)
+    
+    def put_many(self, items: Iterable):
+        """Cache several (key, record) pairs under one lock"""
+        if not self.maxsize:
+            return
+        with self._lock:
+            for key, record in items:
+                self._store(key, record)
+    
+    def _store(self, key: Hashable, record):
+        self._records[key] = self._copy(record)
+        self._records.move_to_end(key)
+        while len(self._records) > self.maxsize:
+            self._records.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, key: Hashable):
+        """Drop a record if cached"""
+        with self._lock:
+            self._records.pop(key, None)
+    
+    def clear(self):
+        """Drop all records (counters are kept)"""
+        with self._lock:
+            self._records.clear()
+    
+    def stats(self) -> Dict:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._records),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,139 @@
+"""
+Change Feed
+In-process log of database mutations with sequence numbers and a bounded replay buffer
+"""
+
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """One record mutation"""
+    sequence: int
+    collection: str
+    operation: str  # "create", "update", "upsert", "delete" or "clear"
+    record_id: Optional[str]
+    record: Optional[Dict] = field(default=None, compare=False)
+
+
+class ChangeFeedGap(Exception):
+    """Raised when a subscriber asks for events already dropped from the replay buffer"""
+
+
+class ChangeFeed:
+    """
+    Monotonically numbered feed of change events.
+    
+    Sequence numbers start at 1 and never repeat within a process. The last
+    `maxlen` events are kept for replay; a consumer remembers the last
+    sequence it processed and asks for everything after it. Like the entity
+    cache, it only sees writes made through the owning database instance.
+    
+    Listeners are called under the feed's lock, so each one sees events in
+    sequence order; they should return quickly.
+    """
+    
+    def __init__(self, maxlen: int = 10000):
+        """
+        Args:
+            maxlen: Number of recent events kept for replay
+        """
+        self.maxlen = max(1, maxlen)
+        self._events: "deque[ChangeEvent]" = deque(maxlen=self.maxlen)
+        self._condition = threading.Condition()
+        self._listeners: List[Callable[[ChangeEvent], None]] = []
+        self.sequence = 0
+    
+    def publish(self, collection: str, operation: str, record_ids: Iterable[Optional[str]],
+                records: Iterable[Optional[Dict]] = None) -> int:
+        """
+        Append events for a write, one per record
+        
+        Returns:
+            Sequence number of the last event appended
+        """
+        records = list(records) if records is not None else None
+        events = []
+        with self._condition:
+            for position, record_id in enumerate(record_ids):
+                self.sequence += 1
+                record = dict(records[position]) if records is not None else None
+                events.append(ChangeEvent(self.sequence, collection, operation, record_id, record))
+            self._events.extend(events)
+            self._condition.notify_all()
+            for event in events:
+                for listener in list(self._listeners):
+                    try:
+                        listener(event)
+                    except:
+                        pass
+            return self.sequence
+    
+    def since(self, sequence: int, collections: Iterable[str] = None, limit: int = None) -> List[ChangeEvent]:
+        """
+        Get events after a sequence number, oldest first
+        
+        Args:
+            sequence: Last sequence number the caller has seen (0 for everything retained)
+            collections: Only return events for these collections
+            limit: Maximum number of events returned
+        
+        Raises:
+            ChangeFeedGap: If events after `sequence` were already dropped
+        """
+        wanted = set(collections) if collections is not None else None
+        with self._condition:
+            oldest = self._events[0].sequence if self._events else self.sequence + 1
+            if sequence < oldest - 1:
+                raise ChangeFeedGap(f"Events after {sequence} are no longer retained (oldest is {oldest})")
+            events = [
+                event for event in self._events
+                if event.sequence > sequence and (wanted is None or event.collection in wanted)
+            ]
+        return events[:limit] if limit is not None else events
+    
+    def changed_since(self, sequence: int, collections: Iterable[str] = None) -> bool:
+        """Check whether any of the collections changed after a sequence number (True on a gap)"""
+        try:
+            return bool(self.since(sequence, collections, limit=1))
+        except ChangeFeedGap:
+            return True
+    
+    def wait(self, sequence: int, timeout: float = None) -> bool:
+        """Block until an event after `sequence` exists; False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.sequence > sequence, timeout)
+    
+    def subscribe(self, listener: Callable[[ChangeEvent], None], from_sequence: int = None) -> int:
+        """
+        Call listener for every future event, after replaying retained events
+        past from_sequence (no replay when None)
+        
+        Returns:
+            Sequence number the listener is current to at registration
+        """
+        with self._condition:
+            # Replayed under the lock, so no live event can overtake the backlog
+            for event in self.since(from_sequence) if from_sequence is not None else []:
+                listener(event)
+            self._listeners.append(listener)
+            return self.sequence
+    
+    def unsubscribe(self, listener: Callable[[ChangeEvent], None]):
+        """Stop calling a listener"""
+        with self._condition:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+    
+    def stats(self) -> Dict:
+        """Current sequence number and replay window"""
+        with self._condition:
+            return {
+                "sequence": self.sequence,
+                "retained": len(self._events),
+                "oldest_sequence": self._events[0].sequence if self._events else None,
+                "maxlen": self.maxlen
+            }
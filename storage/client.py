@@ -0,0 +1,156 @@
+"""
+Storage Client
+Database interface backed by a storage server (see storage.server)
+"""
+
+import queue
+import socket
+import threading
+from typing import Dict
+
+from config import settings
+from storage.wire import NAMESPACES, VALUE_ATTRIBUTES, send_frame, recv_frame
+
+
+class _RemoteNamespace:
+    """Proxy for a database attribute such as db.changes"""
+    
+    def __init__(self, database: "RemoteDatabase", name: str):
+        self._database = database
+        self._name = name
+    
+    def __getattr__(self, attribute: str):
+        if attribute.startswith("_"):
+            raise AttributeError(attribute)
+        method = f"{self._name}.{attribute}"
+        if attribute in VALUE_ATTRIBUTES.get(self._name, ()):
+            return self._database._call(method, (), {})
+        return self._database._method(method)
+
+
+class RemoteDatabase:
+    """
+    Same public interface as BaseDatabase, served by a storage server.
+    
+    Calls are forwarded over pooled Unix socket connections; each connection
+    carries one request at a time. Entity caching, the hot store and the change
+    feed live in the server, so every worker sees the same data.
+    """
+    
+    def __init__(self, socket_path: str = None, pool_size: int = None, timeout: float = None):
+        """
+        Args:
+            socket_path: Server socket (defaults to settings.storage_server_socket)
+            pool_size: Idle connections kept open (defaults to settings.storage_server_pool_size)
+            timeout: Seconds to wait for a response (defaults to settings.storage_server_timeout)
+        """
+        self.socket_path = socket_path or settings.storage_server_socket
+        self.timeout = timeout if timeout is not None else settings.storage_server_timeout
+        self._pool = queue.LifoQueue(maxsize=max(1, pool_size or settings.storage_server_pool_size))
+        self._namespaces: Dict[str, _RemoteNamespace] = {}
+        self._lock = threading.Lock()
+    
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if name in NAMESPACES:
+            with self._lock:
+                return self._namespaces.setdefault(name, _RemoteNamespace(self, name))
+        return self._method(name)
+    
+    def _method(self, name: str):
+        def call(*args, **kwargs):
+            return self._call(name, args, kwargs)
+        call.__name__ = name
+        return call
+    
+    # ==================== CONNECTIONS ====================
+    
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+    
+    def _acquire(self):
+        """A live pooled connection, or a new one; returns (socket, reused)"""
+        while True:
+            try:
+                sock = self._pool.get_nowait()
+            except queue.Empty:
+                return self._connect(), False
+            if self._is_open(sock):
+                return sock, True
+            # Pooled connections go stale when the server restarts
+            sock.close()
+    
+    def _is_open(self, sock: socket.socket) -> bool:
+        """Whether an idle connection is still open at the server's end (and carries no stray data)"""
+        try:
+            sock.setblocking(False)
+            try:
+                sock.recv(1, socket.MSG_PEEK)
+            finally:
+                sock.settimeout(self.timeout)
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        return False
+    
+    def _release(self, sock: socket.socket):
+        try:
+            self._pool.put_nowait(sock)
+        except queue.Full:
+            sock.close()
+    
+    def _call(self, method: str, args: tuple, kwargs: dict):
+        """
+        Send one request and return its result, re-raising the server's exception
+        
+        A request is only sent again when sending it failed: the server acts on
+        complete frames only, so it cannot have run it. Once the request is sent,
+        a lost connection raises ConnectionError, since the server may already
+        have applied it.
+        """
+        while True:
+            sock, reused = self._acquire()
+            try:
+                send_frame(sock, (method, args, kwargs))
+            except (BrokenPipeError, ConnectionResetError):
+                sock.close()
+                if reused:
+                    continue
+                raise ConnectionError(f"Storage server at {self.socket_path} closed the connection")
+            except:
+                sock.close()
+                raise
+            break
+        
+        try:
+            ok, value = recv_frame(sock)
+        except (EOFError, ConnectionError):
+            sock.close()
+            raise ConnectionError(
+                f"Storage server at {self.socket_path} closed the connection before answering {method}; "
+                f"it may have been applied"
+            )
+        except:
+            sock.close()
+            raise
+        self._release(sock)
+        if ok:
+            return value
+        raise value
+    
+    def close(self):
+        """Close pooled connections (the server keeps running)"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
@@ -0,0 +1,278 @@
+"""
+Geo Grid Index
+In-memory latitude/longitude grid for radius, nearest-neighbour, bounding-box
+and route corridor queries
+"""
+
+import math
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Great-circle kilometres per degree of latitude
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+class GeoGridIndex:
+    """
+    Points bucketed into fixed-size latitude/longitude cells.
+    
+    A query only visits the cells its search area overlaps and measures exact
+    great-circle distances for the points in them, so its cost grows with the
+    area searched and the points found there, not with the size of the index.
+    Points are added, moved and removed one at a time as records change.
+    
+    Distances are straight-line (haversine) kilometres on a sphere; callers
+    working in road distances convert their radius first.
+    """
+    
+    def __init__(self, cell_degrees: float = 1.0):
+        """
+        Args:
+            cell_degrees: Cell edge in degrees; around the typical query radius
+                divided by five keeps the number of cells visited small
+        """
+        self.cell_degrees = float(cell_degrees)
+        self._rows = max(1, math.ceil(180 / self.cell_degrees))
+        self._columns = max(1, math.ceil(360 / self.cell_degrees))
+        self._lock = threading.RLock()
+        self.clear()
+    
+    def clear(self):
+        """Drop all points"""
+        with self._lock:
+            # (row, column) -> ids of the points in that cell
+            self._cells: Dict[Tuple[int, int], Set[str]] = {}
+            # id -> (lat, lng, cell)
+            self._points: Dict[str, Tuple[float, float, Tuple[int, int]]] = {}
+    
+    def __len__(self) -> int:
+        return len(self._points)
+    
+    def __contains__(self, record_id: str) -> bool:
+        return record_id in self._points
+    
+    def _row(self, lat: float) -> int:
+        return min(max(int((lat + 90) // self.cell_degrees), 0), self._rows - 1)
+    
+    def _column(self, lng: float) -> int:
+        return int((lng + 180) // self.cell_degrees) % self._columns
+    
+    def put(self, record_id: str, lat: float, lng: float):
+        """Add a point, or move it if already indexed"""
+        cell = (self._row(lat), self._column(lng))
+        with self._lock:
+            previous = self._points.get(record_id)
+            if previous is not None and previous[2] != cell:
+                self._discard(previous[2], record_id)
+            self._cells.setdefault(cell, set()).add(record_id)
+            self._points[record_id] = (lat, lng, cell)
+    
+    def remove(self, record_id: str):
+        """Remove a point (no-op if not indexed)"""
+        with self._lock:
+            previous = self._points.pop(record_id, None)
+            if previous is not None:
+                self._discard(previous[2], record_id)
+    
+    def _discard(self, cell: Tuple[int, int], record_id: str):
+        ids = self._cells.get(cell)
+        if ids is not None:
+            ids.discard(record_id)
+            if not ids:
+                del self._cells[cell]
+    
+    # ==================== QUERIES ====================
+    
+    def within(self, lat: float, lng: float, radius_km: float) -> List[Tuple[str, float]]:
+        """
+        Points within a great-circle radius
+        
+        Returns:
+            (id, distance_km) pairs, nearest first
+        """
+        if radius_km < 0:
+            return []
+        with self._lock:
+            candidates = self._collect(self._occupied_cells(*self._circle_cells(lat, lng, radius_km)))
+            if not candidates:
+                return []
+            ids = list(candidates)
+            points = np.array([self._points[record_id][:2] for record_id in ids])
+        
+        distances = _haversine_km(lat, lng, points[:, 0], points[:, 1])
+        inside = np.flatnonzero(distances <= radius_km)
+        order = inside[np.argsort(distances[inside], kind="stable")]
+        return [(ids[i], float(distances[i])) for i in order]
+    
+    def within_ellipse(self, from_lat: float, from_lng: float, to_lat: float, to_lng: float,
+                       max_length_km: float) -> List[Tuple[str, float]]:
+        """
+        Points P with d(from, P) + d(P, to) <= max_length_km
+        
+        That is the ellipse with foci at the two locations: every stop that
+        lengthens the trip from one to the other by at most
+        max_length_km - d(from, to) lies inside it. Cells are pruned with a
+        lower bound on the path length through any point they contain, so
+        only cells near the ellipse are measured.
+        
+        Returns:
+            (id, path_length_km) pairs, shortest path first
+        """
+        direct = float(_haversine_km(from_lat, from_lng, np.array([to_lat]), np.array([to_lng]))[0])
+        if max_length_km < direct:
+            return []
+        # Every point of the ellipse is within (max_length + direct) / 2 of the
+        # midpoint of the foci (triangle inequality from each focus)
+        center = _midpoint(from_lat, from_lng, to_lat, to_lng)
+        if center is None:
+            center, radius = (from_lat, from_lng), max_length_km
+        else:
+            radius = (max_length_km + direct) / 2
+        
+        with self._lock:
+            cells = self._occupied_cells(*self._circle_cells(center[0], center[1], radius))
+            if not cells:
+                return []
+            rows = np.array([row for row, _ in cells], dtype=np.float64)
+            columns = np.array([column for _, column in cells], dtype=np.float64)
+            south = rows * self.cell_degrees - 90
+            north = np.minimum(south + self.cell_degrees, 90.0)
+            west = columns * self.cell_degrees - 180
+            center_lats = (south + north) / 2
+            center_lngs = west + self.cell_degrees / 2
+            # Centre-to-corner distance bounds how far any point of the cell is from its centre
+            half_diagonal = np.maximum(
+                haversine_pairs(center_lats, center_lngs, south, west),
+                haversine_pairs(center_lats, center_lngs, north, west)
+            )
+            lower_bound = (
+                _haversine_km(from_lat, from_lng, center_lats, center_lngs)
+                + _haversine_km(to_lat, to_lng, center_lats, center_lngs)
+                - 2 * half_diagonal
+            )
+            # (the small allowance keeps float error from pruning a cell on the boundary)
+            candidates = self._collect([cell for cell, bound in zip(cells, lower_bound) if bound <= max_length_km + 1e-6])
+            if not candidates:
+                return []
+            ids = list(candidates)
+            points = np.array([self._points[record_id][:2] for record_id in ids])
+        
+        lengths = (_haversine_km(from_lat, from_lng, points[:, 0], points[:, 1])
+                   + _haversine_km(to_lat, to_lng, points[:, 0], points[:, 1]))
+        inside = np.flatnonzero(lengths <= max_length_km)
+        order = inside[np.argsort(lengths[inside], kind="stable")]
+        return [(ids[i], float(lengths[i])) for i in order]
+    
+    def nearest(self, lat: float, lng: float, k: int = 1) -> List[Tuple[str, float]]:
+        """
+        The k points closest to a location
+        
+        Searches a circle that doubles until it holds k points; everything
+        outside a circle is farther than everything inside it.
+        
+        Returns:
+            (id, distance_km) pairs, nearest first
+        """
+        if k <= 0 or not self._points:
+            return []
+        radius = self.cell_degrees * KM_PER_DEGREE
+        while True:
+            found = self.within(lat, lng, radius)
+            if len(found) >= k or radius >= math.pi * EARTH_RADIUS_KM:
+                return found[:k]
+            radius *= 2
+    
+    def in_box(self, min_lat: float, min_lng: float, max_lat: float, max_lng: float) -> List[str]:
+        """
+        Points inside a latitude/longitude box, edges included
+        
+        A box with min_lng > max_lng wraps across the antimeridian.
+        """
+        if min_lat > max_lat:
+            return []
+        wraps = min_lng > max_lng
+        columns = self._column_span(min_lng, max_lng + 360 if wraps else max_lng)
+        
+        with self._lock:
+            candidates = self._collect(self._occupied_cells(self._row(min_lat), self._row(max_lat), columns))
+            inside = []
+            for record_id in candidates:
+                point_lat, point_lng, _ = self._points[record_id]
+                in_lng = (point_lng >= min_lng or point_lng <= max_lng) if wraps else min_lng <= point_lng <= max_lng
+                if min_lat <= point_lat <= max_lat and in_lng:
+                    inside.append(record_id)
+        return inside
+    
+    def _circle_cells(self, lat: float, lng: float, radius_km: float):
+        """Rows and columns of the cells a circle overlaps: (first row, last row, columns or None for all)"""
+        reach = radius_km / KM_PER_DEGREE
+        min_lat, max_lat = lat - reach, lat + reach
+        if min_lat <= -90 or max_lat >= 90:
+            # The circle covers a pole: every longitude is in reach
+            return self._row(min_lat), self._row(max_lat), None
+        angle = radius_km / EARTH_RADIUS_KM
+        half_width = math.degrees(math.asin(min(1.0, math.sin(angle) / math.cos(math.radians(lat)))))
+        return self._row(min_lat), self._row(max_lat), self._column_span(lng - half_width, lng + half_width)
+    
+    def _column_span(self, west: float, east: float):
+        """Columns from west to east (east may exceed 180), or None for all of them"""
+        first = int((west + 180) // self.cell_degrees)
+        last = int((east + 180) // self.cell_degrees)
+        if last - first + 1 >= self._columns:
+            return None
+        return [column % self._columns for column in range(first, last + 1)]
+    
+    def _occupied_cells(self, first_row: int, last_row: int, columns) -> List[Tuple[int, int]]:
+        """Non-empty cells in a block of rows and columns"""
+        if columns is None:
+            columns = range(self._columns)
+        # Scanning occupied cells is cheaper when the block has more cells
+        if (last_row - first_row + 1) * len(columns) > len(self._cells):
+            wanted = set(columns)
+            return [
+                (row, column) for row, column in self._cells
+                if first_row <= row <= last_row and column in wanted
+            ]
+        return [
+            (row, column)
+            for row in range(first_row, last_row + 1)
+            for column in columns
+            if (row, column) in self._cells
+        ]
+    
+    def _collect(self, cells: List[Tuple[int, int]]) -> Set[str]:
+        found = set()
+        for cell in cells:
+            found.update(self._cells[cell])
+        return found
+
+
+def _haversine_km(lat: float, lng: float, lats: np.ndarray, lngs: np.ndarray) -> np.ndarray:
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    lats2, lngs2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lats2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lats2) * np.sin((lngs2 - lng1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def haversine_pairs(lats1: np.ndarray, lngs1: np.ndarray, lats2: np.ndarray, lngs2: np.ndarray) -> np.ndarray:
+    """Great-circle km between each pair of points"""
+    lats1, lngs1, lats2, lngs2 = map(np.radians, (lats1, lngs1, lats2, lngs2))
+    a = np.sin((lats2 - lats1) / 2) ** 2 + np.cos(lats1) * np.cos(lats2) * np.sin((lngs2 - lngs1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _midpoint(lat1: float, lng1: float, lat2: float, lng2: float) -> Optional[Tuple[float, float]]:
+    """Great-circle midpoint, or None for (near-)antipodal points"""
+    points = []
+    for lat, lng in ((lat1, lng1), (lat2, lng2)):
+        lat, lng = math.radians(lat), math.radians(lng)
+        points.append((math.cos(lat) * math.cos(lng), math.cos(lat) * math.sin(lng), math.sin(lat)))
+    x, y, z = (a + b for a, b in zip(*points))
+    norm = math.sqrt(x * x + y * y + z * z)
+    if norm < 1e-9:
+        return None
+    return math.degrees(math.asin(max(-1.0, min(1.0, z / norm)))), math.degrees(math.atan2(y, x))
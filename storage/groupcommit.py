@@ -0,0 +1,103 @@
+"""
+Group Commit
+Batches concurrent store writes into one backend transaction
+"""
+
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+# (operation, collection, ids, records, documents); operation is "add", "update" or "upsert"
+WriteOp = Tuple[str, str, List[str], List[Dict], Optional[List[str]]]
+
+
+class _Pending:
+    __slots__ = ("op", "done", "error", "wake")
+    
+    def __init__(self, op: WriteOp):
+        self.op = op
+        self.done = False
+        self.error = None
+        self.wake = threading.Event()
+
+
+class GroupCommitWriter:
+    """
+    Leader/follower group commit.
+    
+    A thread submitting a write while no commit is running becomes the leader:
+    it takes every queued write (up to `max_batch`), applies them together and
+    wakes their submitters. Writes queued meanwhile wait for the next batch,
+    whose leader is the oldest of them. Every submit() returns only once its
+    own write is committed, or raises that write's error.
+    
+    If a batch fails, its writes are retried one at a time so a bad write
+    does not fail the others.
+    """
+    
+    def __init__(self, apply: Callable[[List[WriteOp]], None], max_batch: int = 256):
+        """
+        Args:
+            apply: Called with a list of writes to run in one transaction
+            max_batch: Most writes committed together
+        """
+        self.max_batch = max(1, max_batch)
+        self._apply = apply
+        self._lock = threading.Lock()
+        self._queue: "deque[_Pending]" = deque()
+        self._leading = False
+        self.commits = 0
+        self.committed_writes = 0
+    
+    def submit(self, operation: str, collection: str, ids: List[str], records: List[Dict],
+               documents: List[str] = None):
+        """Apply one write, batched with any submitted concurrently"""
+        pending = _Pending((operation, collection, ids, records, documents))
+        with self._lock:
+            self._queue.append(pending)
+            lead = not self._leading
+            self._leading = True
+        if not lead:
+            pending.wake.wait()
+        if not pending.done:
+            # Promoted to leader: our write is at the head of the queue
+            self._commit_next()
+        if pending.error is not None:
+            raise pending.error
+    
+    def _commit_next(self):
+        with self._lock:
+            batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+        
+        try:
+            self._apply([pending.op for pending in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0].error = e
+            else:
+                for pending in batch:
+                    try:
+                        self._apply([pending.op])
+                    except Exception as single_error:
+                        pending.error = single_error
+        
+        with self._lock:
+            self.commits += 1
+            self.committed_writes += sum(1 for pending in batch if pending.error is None)
+            for pending in batch:
+                pending.done = True
+                pending.wake.set()
+            if self._queue:
+                self._queue[0].wake.set()
+            else:
+                self._leading = False
+    
+    def stats(self) -> Dict:
+        """Commit counters; writes per commit above 1 means batching happened"""
+        with self._lock:
+            return {
+                "commits": self.commits,
+                "committed_writes": self.committed_writes,
+                "writes_per_commit": round(self.committed_writes / self.commits, 2) if self.commits else 0.0,
+                "queued": len(self._queue)
+            }
@@ -0,0 +1,262 @@
+"""
+Hot Store
+In-memory authoritative copy of the working-set collections, persisted to the
+backing store by a write-behind flusher
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from storage.indexes import SecondaryIndex
+from storage.query import matches, sort_records, page_records
+
+
+class HotStore:
+    """
+    Holds every record of selected collections in memory.
+    
+    Reads are served from memory (by-id reads are dictionary lookups, filters
+    narrow through equality indexes). Writes update memory immediately and are
+    queued; a background thread upserts the queue into the backing store when
+    it reaches `flush_size` records or every `flush_interval` seconds. Several
+    writes to one record before a flush are coalesced into one upsert.
+    
+    A write made with durable=True is flushed before the call returns. If a
+    flush fails the records stay queued and are retried on the next one.
+    """
+    
+    def __init__(self, persist: Callable[[str, List[str], List[Dict], List[Optional[str]]], None],
+                 collections: Iterable[str], indexed_fields: Dict[str, Iterable[str]] = None,
+                 flush_interval: float = 1.0, flush_size: int = 500):
+        """
+        Args:
+            persist: Called as persist(collection, ids, records, documents) to upsert a batch
+            collections: Collections held in memory
+            indexed_fields: Mapping of collection name -> fields with equality indexes
+            flush_interval: Seconds between background flushes
+            flush_size: Queued records that trigger an early flush
+        """
+        self.collections = set(collections)
+        self.flush_interval = flush_interval
+        self.flush_size = max(1, flush_size)
+        self._persist = persist
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._records: Dict[str, Dict[str, Dict]] = {name: {} for name in self.collections}
+        # collection -> record id -> (record, document) waiting to be persisted
+        self._pending: Dict[str, "OrderedDict[str, Tuple[Dict, Optional[str]]]"] = {
+            name: OrderedDict() for name in self.collections
+        }
+        self._pending_count = 0
+        self.indexes = SecondaryIndex({
+            name: fields for name, fields in (indexed_fields or {}).items() if name in self.collections
+        })
+        self.flushes = 0
+        self.flushed_records = 0
+        self.failed_flushes = 0
+        # Error of the latest flush while it has not yet been retried successfully
+        self.last_flush_error: Optional[str] = None
+        self._wake = threading.Event()
+        self._stopping = False
+        self._thread = None
+    
+    def holds(self, collection: str) -> bool:
+        """Check whether a collection is served from memory"""
+        return collection in self.collections
+    
+    # ==================== LIFECYCLE ====================
+    
+    def load(self, collection: str, ids: List[str], records: List[Dict]):
+        """Replace a collection's in-memory copy with records read from the backing store"""
+        with self._lock:
+            self._records[collection] = {record_id: dict(record) for record_id, record in zip(ids, records)}
+            self.indexes.rebuild(collection, ids, records)
+    
+    def start(self):
+        """Start the background flusher"""
+        if self._thread is None and self.collections:
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="hot-store-flusher", daemon=True)
+            self._thread.start()
+    
+    def close(self):
+        """Stop the flusher and persist everything still queued"""
+        thread = self._thread
+        if thread is not None:
+            self._stopping = True
+            self._wake.set()
+            thread.join(timeout=30)
+            self._thread = None
+        self.flush()
+    
+    def _run(self):
+        while not self._stopping:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                # flush() counted the failure for stats() and requeued the
+                # writes for the next pass
+                pass
+    
+    # ==================== READS ====================
+    
+    def get(self, collection: str, ids: List[str]) -> List[Dict]:
+        """Copies of the records that exist among ids"""
+        with self._lock:
+            records = self._records[collection]
+            return [dict(records[i]) for i in dict.fromkeys(ids) if i in records]
+    
+    def _candidates(self, collection: str, conditions: List[Tuple]) -> List[Tuple[str, Dict]]:
+        """(id, record) pairs matching conditions, narrowed by the most selective index"""
+        records = self._records[collection]
+        ids = None
+        indexed = [
+            (self.indexes.count(collection, field, value), position)
+            for position, (field, operator, value) in enumerate(conditions)
+            if operator == "$eq" and self.indexes.covers(collection, field)
+        ]
+        if indexed:
+            _, position = min(indexed)
+            field, _, value = conditions[position]
+            ids = self.indexes.lookup(collection, field, value)
+            conditions = conditions[:position] + conditions[position + 1:]
+        rows = records.items() if ids is None else ((i, records[i]) for i in ids if i in records)
+        return [(record_id, record) for record_id, record in rows if matches(record, conditions)]
+    
+    def select(self, collection: str, conditions: List[Tuple], order_by=None,
+               limit: int = None, offset: int = 0) -> List[Dict]:
+        with self._lock:
+            records = [dict(record) for _, record in self._candidates(collection, conditions)]
+        records = sort_records(records, order_by)
+        end = offset + limit if limit is not None else None
+        return records[offset:end]
+    
+    def page(self, collection: str, conditions: List[Tuple], field: str, descending: bool,
+             after: Optional[Tuple], limit: int) -> List[Tuple[Tuple, Dict]]:
+        with self._lock:
+            rows = self._candidates(collection, conditions)
+        window = page_records(rows, field, descending, after, limit)
+        return [(key, dict(record)) for key, record in window]
+    
+    def posted_values(self, collection: str, field: str, values: Iterable) -> set:
+        """Subset of values that at least one record holds in an indexed field"""
+        with self._lock:
+            return {value for value in values if self.indexes.count(collection, field, value)}
+    
+    def count(self, collection: str, conditions: List[Tuple]) -> int:
+        with self._lock:
+            if not conditions:
+                return len(self._records[collection])
+            if len(conditions) == 1:
+                field, operator, value = conditions[0]
+                if operator == "$eq" and self.indexes.covers(collection, field):
+                    return self.indexes.count(collection, field, value)
+            return len(self._candidates(collection, conditions))
+    
+    # ==================== WRITES ====================
+    
+    def write(self, collection: str, ids: List[str], records: List[Dict],
+              documents: List[Optional[str]] = None, durable: bool = False):
+        """Apply a write in memory and queue it for the backing store"""
+        with self._lock:
+            stored = self._records[collection]
+            pending = self._pending[collection]
+            for position, (record_id, record) in enumerate(zip(ids, records)):
+                document = documents[position] if documents is not None else None
+                if document is None and record_id in pending:
+                    document = pending[record_id][1]
+                stored[record_id] = dict(record)
+                self.indexes.put(collection, record_id, record)
+                if record_id not in pending:
+                    self._pending_count += 1
+                pending[record_id] = (dict(record), document)
+                pending.move_to_end(record_id)
+            backlog = self._pending_count
+        
+        if durable:
+            self.flush()
+        elif backlog >= self.flush_size:
+            self._wake.set()
+    
+    def flush(self) -> int:
+        """
+        Persist every queued record now
+        
+        Returns:
+            Number of records written
+        """
+        with self._flush_lock:
+            with self._lock:
+                batches = {name: queued for name, queued in self._pending.items() if queued}
+                for name in batches:
+                    self._pending[name] = OrderedDict()
+                self._pending_count = 0
+            
+            written = 0
+            for position, (collection, queued) in enumerate(batches.items()):
+                try:
+                    self._persist(
+                        collection,
+                        list(queued),
+                        [record for record, _ in queued.values()],
+                        [document for _, document in queued.values()]
+                    )
+                except Exception as e:
+                    self.failed_flushes += 1
+                    self.last_flush_error = f"{type(e).__name__}: {e}"
+                    for name, items in list(batches.items())[position:]:
+                        self._requeue(name, items)
+                    raise
+                written += len(queued)
+            
+            if batches:
+                self.flushes += 1
+                self.flushed_records += written
+                self.last_flush_error = None
+            return written
+    
+    def _requeue(self, collection: str, queued: "OrderedDict[str, Tuple[Dict, Optional[str]]]"):
+        """Put back a batch that failed to persist, keeping any newer queued writes"""
+        with self._lock:
+            pending = self._pending[collection]
+            for record_id, item in queued.items():
+                if record_id not in pending:
+                    pending[record_id] = item
+                    self._pending_count += 1
+    
+    def remove(self, collection: str, ids: List[str]):
+        """Drop records and any queued writes for them"""
+        with self._lock:
+            stored = self._records[collection]
+            pending = self._pending[collection]
+            for record_id in ids:
+                stored.pop(record_id, None)
+                self.indexes.remove(collection, record_id)
+                if pending.pop(record_id, None) is not None:
+                    self._pending_count -= 1
+    
+    def clear(self, collections: Iterable[str]):
+        """Drop records and queued writes of the given collections"""
+        with self._lock:
+            for name in collections:
+                if name not in self.collections:
+                    continue
+                self._records[name] = {}
+                self._pending_count -= len(self._pending[name])
+                self._pending[name] = OrderedDict()
+                self.indexes.rebuild(name, [], [])
+    
+    def stats(self) -> Dict:
+        """Record counts, queue depth, flush counters and the outstanding flush error"""
+        with self._lock:
+            return {
+                "collections": {name: len(records) for name, records in sorted(self._records.items())},
+                "pending": self._pending_count,
+                "flushes": self.flushes,
+                "flushed_records": self.flushed_records,
+                "failed_flushes": self.failed_flushes,
+                "last_flush_error": self.last_flush_error
+            }
@@ -0,0 +1,102 @@
+"""
+Secondary Indexes
+In-memory field -> record id postings kept in step with every database write
+"""
+
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+
+class SecondaryIndex:
+    """
+    Equality indexes over selected metadata fields of each collection.
+    
+    The index is built once from the stored records and then updated by the
+    database on every create/update/delete, so lookups cost O(matching rows)
+    instead of a scan of the whole collection. It only sees writes made through
+    the owning database instance.
+    """
+    
+    def __init__(self, fields: Dict[str, Iterable[str]]):
+        """
+        Args:
+            fields: Mapping of collection name -> metadata fields to index
+        """
+        self.fields = {collection: tuple(names) for collection, names in fields.items()}
+        self._lock = threading.RLock()
+        self.clear()
+    
+    def clear(self):
+        """Drop all postings"""
+        with self._lock:
+            # (collection, field) -> value -> set of record ids
+            self._postings: Dict[Tuple[str, str], Dict] = {
+                (collection, field): {}
+                for collection, names in self.fields.items()
+                for field in names
+            }
+            # (collection, record_id) -> indexed values currently posted
+            self._values: Dict[Tuple[str, str], Dict] = {}
+    
+    def covers(self, collection: str, field: str) -> bool:
+        """Check whether a field of a collection is indexed"""
+        return (collection, field) in self._postings
+    
+    def rebuild(self, collection: str, ids: List[str], records: List[Dict]):
+        """Rebuild all postings for a collection from its stored records"""
+        with self._lock:
+            for field in self.fields.get(collection, ()):
+                self._postings[(collection, field)] = {}
+            for key in [key for key in self._values if key[0] == collection]:
+                del self._values[key]
+            for record_id, record in zip(ids, records):
+                self.put(collection, record_id, record)
+    
+    def put(self, collection: str, record_id: str, record: Dict):
+        """Index a created or updated record, moving it out of stale postings"""
+        names = self.fields.get(collection)
+        if not names:
+            return
+        
+        with self._lock:
+            previous = self._values.get((collection, record_id), {})
+            current = {field: record.get(field) for field in names}
+            
+            for field in names:
+                old_value = previous.get(field)
+                new_value = current[field]
+                if field in previous and old_value == new_value:
+                    continue
+                postings = self._postings[(collection, field)]
+                if field in previous:
+                    self._discard(postings, old_value, record_id)
+                postings.setdefault(new_value, set()).add(record_id)
+            
+            self._values[(collection, record_id)] = current
+    
+    def remove(self, collection: str, record_id: str):
+        """Remove a deleted record from all postings"""
+        with self._lock:
+            previous = self._values.pop((collection, record_id), None)
+            if not previous:
+                return
+            for field, value in previous.items():
+                self._discard(self._postings[(collection, field)], value, record_id)
+    
+    def lookup(self, collection: str, field: str, value) -> List[str]:
+        """Get ids of records whose field equals value"""
+        with self._lock:
+            return list(self._postings[(collection, field)].get(value, ()))
+    
+    def count(self, collection: str, field: str, value) -> int:
+        """Count records whose field equals value"""
+        with self._lock:
+            return len(self._postings[(collection, field)].get(value, ()))
+    
+    @staticmethod
+    def _discard(postings: Dict, value, record_id: str):
+        ids = postings.get(value)
+        if ids is not None:
+            ids.discard(record_id)
+            if not ids:
+                del postings[value]
@@ -0,0 +1,184 @@
+"""
+Query Builder
+Compiles db.find() filters into ChromaDB metadata `where` clauses and
+encodes keyset pagination cursors for db.page()
+"""
+
+import base64
+import heapq
+import json
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+
+# Operators ChromaDB evaluates for any scalar value
+EQUALITY_OPERATORS = {"$eq", "$ne", "$in", "$nin"}
+
+# Operators ChromaDB only evaluates for numbers
+RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte"}
+
+# Operators evaluated in Python after the pushed-down filter has run
+RESIDUAL_OPERATORS = {"$prefix"}
+
+SUPPORTED_OPERATORS = EQUALITY_OPERATORS | RANGE_OPERATORS | RESIDUAL_OPERATORS
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def normalize_where(where: Optional[Dict]) -> List[Tuple[str, str, object]]:
+    """
+    Flatten a filter into (field, operator, value) conditions combined with AND
+    
+    Accepts {"field": value} for equality and {"field": {"$op": value, ...}}
+    for operators; see SUPPORTED_OPERATORS.
+    """
+    conditions = []
+    for field, condition in (where or {}).items():
+        if isinstance(condition, dict):
+            for operator, value in condition.items():
+                if operator not in SUPPORTED_OPERATORS:
+                    raise ValueError(f"Unsupported operator {operator} for field {field}")
+                conditions.append((field, operator, value))
+        else:
+            conditions.append((field, "$eq", condition))
+    return conditions
+
+
+def compile_where(conditions: List[Tuple[str, str, object]]) -> Tuple[Optional[Dict], List[Tuple[str, str, object]]]:
+    """
+    Split conditions into a ChromaDB where clause and residual Python predicates
+    
+    Returns:
+        (where clause or None, residual conditions)
+    """
+    clauses = []
+    residual = []
+    for field, operator, value in conditions:
+        pushable = (
+            operator in EQUALITY_OPERATORS
+            or (operator in RANGE_OPERATORS and _is_number(value))
+        )
+        if pushable:
+            clauses.append({field: {operator: value}})
+        else:
+            residual.append((field, operator, value))
+    
+    if not clauses:
+        return None, residual
+    if len(clauses) == 1:
+        return clauses[0], residual
+    return {"$and": clauses}, residual
+
+
+def matches(record: Dict, conditions: List[Tuple[str, str, object]]) -> bool:
+    """Evaluate conditions against a record in Python"""
+    for field, operator, expected in conditions:
+        value = record.get(field)
+        if operator == "$eq":
+            ok = value == expected
+        elif operator == "$ne":
+            ok = value != expected
+        elif operator == "$in":
+            ok = value in expected
+        elif operator == "$nin":
+            ok = value not in expected
+        elif operator == "$prefix":
+            ok = isinstance(value, str) and value.startswith(expected)
+        else:
+            if value is None:
+                return False
+            try:
+                if operator == "$gt":
+                    ok = value > expected
+                elif operator == "$gte":
+                    ok = value >= expected
+                elif operator == "$lt":
+                    ok = value < expected
+                else:
+                    ok = value <= expected
+            except TypeError:
+                return False
+        if not ok:
+            return False
+    return True
+
+
+def sort_records(records: List[Dict], order_by: Union[str, List[str], None]) -> List[Dict]:
+    """
+    Sort records by one or more fields; prefix a field with "-" for descending
+    
+    Missing values sort last in either direction.
+    """
+    if not order_by:
+        return records
+    
+    fields = [order_by] if isinstance(order_by, str) else list(order_by)
+    # Stable sorts applied from the least to the most significant field
+    for field in reversed(fields):
+        descending = field.startswith("-")
+        name = field.lstrip("-")
+        present = [r for r in records if r.get(name) is not None]
+        missing = [r for r in records if r.get(name) is None]
+        present.sort(key=lambda r: r[name], reverse=descending)
+        records = present + missing
+    return records
+
+
+def sort_key(value, record_id: str) -> Tuple:
+    """
+    Keyset pagination key: (missing, value, record id)
+    
+    Records without the sort field order after all others; the record id
+    breaks ties so every key is unique.
+    """
+    if value is None:
+        return (True, "", record_id)
+    return (False, value, record_id)
+
+
+def page_records(items: Iterable[Tuple[str, Dict]], field: str, descending: bool,
+                 after: Optional[Tuple], limit: int) -> List[Tuple[Tuple, Dict]]:
+    """
+    Keyset page over (record id, record) pairs held in memory
+    
+    Keys every record, then heap-selects only the requested window.
+    
+    Raises:
+        ValueError: If the cursor key cannot be compared with the sort field
+    """
+    keyed = []
+    for record_id, record in items:
+        key = sort_key(record.get(field), record_id)
+        try:
+            if after is not None and (key <= after if not descending else key >= after):
+                continue
+        except TypeError:
+            raise ValueError("Invalid cursor")
+        keyed.append((key, record))
+    
+    select = heapq.nlargest if descending else heapq.nsmallest
+    return select(limit, keyed, key=lambda item: item[0])
+
+
+def encode_cursor(key: Tuple) -> str:
+    """Encode the key of the last record on a page as an opaque cursor"""
+    raw = json.dumps(list(key), separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple:
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        missing, value, record_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(missing, bool) or not isinstance(record_id, str):
+        raise ValueError("Invalid cursor")
+    return (missing, value, record_id)
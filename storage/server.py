@@ -0,0 +1,132 @@
+"""
+Storage Server
+Owns the data files and serves database calls to API workers over a
+Unix-domain socket
+
+Run one per deployment, then start the API with STORAGE_SERVER_SOCKET set:
+
+    python -m storage.server
+    STORAGE_SERVER_SOCKET=./storage.sock uvicorn main:app --workers 4
+"""
+
+import os
+import pickle
+import signal
+import socketserver
+import threading
+
+from storage.base import BaseDatabase
+from storage.wire import NAMESPACES, BLOCKED_METHODS, send_frame, recv_frame
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """Serves one client connection until it closes"""
+    
+    def handle(self):
+        while True:
+            try:
+                method, args, kwargs = recv_frame(self.request)
+            except (EOFError, ConnectionError, OSError):
+                return
+            try:
+                response = (True, self.server.storage.dispatch(method, args, kwargs))
+            except Exception as e:
+                response = (False, e)
+            try:
+                send_frame(self.request, response)
+            except (pickle.PicklingError, TypeError, AttributeError) as e:
+                send_frame(self.request, (False, RuntimeError(f"Unserializable result from {method}: {e}")))
+            except OSError:
+                return
+
+
+class _ThreadingServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class StorageServer:
+    """
+    Single writer for a database shared by several processes.
+    
+    Each client connection gets a thread; requests name a public database
+    method (or "namespace.method", see storage.wire.NAMESPACES) and carry its
+    arguments. Results and raised exceptions are sent back as-is, so clients
+    see the same return values and error types as an in-process database.
+    """
+    
+    def __init__(self, database: BaseDatabase, socket_path: str):
+        """
+        Args:
+            database: Local database the server owns
+            socket_path: Unix socket to listen on (replaced if it already exists)
+        """
+        self.database = database
+        self.socket_path = socket_path
+        self._server = None
+    
+    def dispatch(self, method: str, args: tuple, kwargs: dict):
+        """Run one request against the database"""
+        parts = method.split(".")
+        if (
+            any(not part or part.startswith("_") for part in parts)
+            or len(parts) > 2
+            or (len(parts) == 2 and parts[0] not in NAMESPACES)
+            or method in BLOCKED_METHODS
+        ):
+            raise AttributeError(f"Unknown storage method: {method}")
+        
+        target = self.database
+        for part in parts:
+            target = getattr(target, part)
+        if callable(target):
+            return target(*args, **kwargs)
+        if args or kwargs:
+            raise TypeError(f"{method} is not callable")
+        return target
+    
+    def start(self):
+        """Bind the socket and serve in a background thread"""
+        directory = os.path.dirname(os.path.abspath(self.socket_path))
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        
+        previous_umask = os.umask(0o177)
+        try:
+            self._server = _ThreadingServer(self.socket_path, _RequestHandler)
+        finally:
+            os.umask(previous_umask)
+        self._server.storage = self
+        threading.Thread(target=self._server.serve_forever, name="storage-server", daemon=True).start()
+    
+    def stop(self):
+        """Stop accepting requests, remove the socket and close the database"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        self.database.close()
+
+
+def main():
+    from config import settings
+    from db_chromadb import create_database
+    
+    socket_path = settings.storage_server_socket or "./storage.sock"
+    server = StorageServer(create_database(local=True), socket_path)
+    server.start()
+    print(f"Storage server ({settings.storage_backend}) listening on {socket_path}")
+    
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    try:
+        stopped.wait()
+    except KeyboardInterrupt:
+        pass
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
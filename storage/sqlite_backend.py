@@ -0,0 +1,449 @@
+"""
+SQLite Storage Backend
+One table per collection with typed columns for the known record fields, a
+JSON `extra` column for anything else, and composite indexes for the
+status/foreign-key/time filters the services run. Runs in WAL mode so
+readers never block the writer.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import settings
+from storage.base import BaseDatabase, COLLECTIONS
+from storage.groupcommit import WriteOp
+from storage.query import sort_key
+
+
+# Typed columns per collection; fields not listed are kept in the JSON `extra` column
+_LOCATION_COLUMNS = {
+    "location_id": str, "vehicle_id": str, "latitude": float, "longitude": float,
+    "accuracy": float, "recorded_at": str, "created_at": str,
+}
+
+SCHEMA = {
+    "owners": {
+        "owner_id": str, "name": str, "email": str, "created_at": str,
+    },
+    "drivers": {
+        "driver_id": str, "name": str, "phone": str, "truck_id": str,
+        "hourly_rate": float, "created_at": str,
+    },
+    "vendors": {
+        "vendor_id": str, "name": str, "email": str, "phone": str,
+        "location_lat": float, "location_lng": float, "created_at": str,
+    },
+    "trucks": {
+        "truck_id": str, "owner_id": str, "license_plate": str,
+        "fuel_consumption_rate": float, "status": str, "created_at": str,
+    },
+    "trips": {
+        "trip_id": str, "driver_id": str, "truck_id": str,
+        "origin_lat": float, "origin_lng": float, "origin_address": str,
+        "destination_lat": float, "destination_lng": float, "destination_address": str,
+        "outbound_load": str, "is_deadheading": bool, "status": str,
+        "created_at": str, "completed_at": str,
+    },
+    "loads": {
+        "load_id": str, "vendor_id": str, "weight_kg": float,
+        "pickup_lat": float, "pickup_lng": float, "pickup_address": str,
+        "destination_lat": float, "destination_lng": float, "destination_address": str,
+        "price_offered": float, "currency": str, "status": str,
+        "assigned_driver_id": str, "assigned_trip_id": str, "created_at": str,
+        "assigned_at": str, "picked_up_at": str, "delivered_at": str,
+    },
+    "load_assignments": {},
+    "expenses": {
+        "expense_id": str, "driver_id": str, "amount": float, "category": str,
+        "description": str, "trip_id": str, "timestamp": str, "created_at": str,
+        "source": str, "version": int,
+    },
+    "reports": {
+        "report_id": str, "driver_id": str, "date": str, "generated_at": str,
+        "trips": str, "financial_summary": str, "ai_insights": str,
+        "source": str, "version": int,
+    },
+    "allocations": {
+        "allocation_id": str, "vehicle_id": str, "load_id": str, "owner_id": str,
+        "status": str, "allocated_at": str, "completed_at": str, "cancelled_at": str,
+        "created_at": str,
+    },
+    "location_history": _LOCATION_COLUMNS,
+    "notifications": {
+        "notification_id": str, "driver_id": str, "type": str, "title": str,
+        "message": str, "load_id": str, "waypoint_type": str, "is_read": bool,
+        "created_at": str,
+    },
+    "vehicle_positions": _LOCATION_COLUMNS,
+}
+
+# Composite indexes matching the filters and sort orders the services use
+INDEXES = {
+    "loads": [("status", "created_at"), ("assigned_trip_id",), ("vendor_id",)],
+    "trucks": [("owner_id", "status", "created_at")],
+    "drivers": [("truck_id",)],
+    "trips": [("status", "created_at"), ("driver_id", "status")],
+    "allocations": [("status", "vehicle_id"), ("vehicle_id", "status"), ("load_id",)],
+    "notifications": [("driver_id", "created_at"), ("driver_id", "is_read")],
+    "expenses": [("driver_id", "timestamp")],
+    "reports": [("driver_id", "date")],
+    "location_history": [("vehicle_id", "recorded_at")],
+}
+
+_SQL_TYPES = {str: "TEXT", float: "REAL", int: "INTEGER", bool: "INTEGER"}
+
+_FIELD_NAME = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# Bound parameters per statement when reading ids in chunks
+_ID_CHUNK = 500
+
+
+class SQLiteDatabase(BaseDatabase):
+    """SQLite storage for all application data"""
+    
+    def __init__(self, database_path: str = None, track_directory: str = None,
+                 hot_collections: Iterable[str] = None, archive_directory: str = None):
+        """
+        Open (and create if needed) the SQLite database
+        
+        Args:
+            database_path: Database file (defaults to settings.sqlite_database_path)
+            track_directory: GPS track store directory (defaults to settings.track_store_directory)
+            hot_collections: Collections held in memory with write-behind persistence
+                (defaults to settings.hot_collections)
+            archive_directory: Cold archive directory (defaults to settings.archive_directory)
+        """
+        super().__init__(track_directory, hot_collections, archive_directory)
+        self.database_path = database_path or settings.sqlite_database_path
+        directory = os.path.dirname(os.path.abspath(self.database_path))
+        os.makedirs(directory, exist_ok=True)
+        
+        # One connection per thread; WAL lets them read while another writes
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        
+        self._create_schema()
+        self._backfill_vehicle_positions()
+        self._migrate_location_history()
+        self._load_hot_set()
+    
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.database_path,
+                timeout=30,
+                check_same_thread=False,
+                cached_statements=512
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+    
+    def close(self):
+        """Flush queued writes, then close every connection opened by this database"""
+        super().close()
+        with self._connections_lock:
+            for connection in self._connections:
+                connection.close()
+            self._connections = []
+        self._local = threading.local()
+    
+    def _create_schema(self):
+        connection = self._connection()
+        with connection:
+            for collection in COLLECTIONS:
+                columns = "".join(
+                    f', "{name}" {_SQL_TYPES[kind]}' for name, kind in SCHEMA[collection].items()
+                )
+                connection.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{collection}" '
+                    f'(id TEXT PRIMARY KEY{columns}, extra TEXT NOT NULL DEFAULT \'{{}}\')'
+                )
+                for fields in INDEXES.get(collection, ()):
+                    name = f"idx_{collection}_{'_'.join(fields)}"
+                    column_list = ", ".join(f'"{field}"' for field in fields)
+                    connection.execute(
+                        f'CREATE INDEX IF NOT EXISTS "{name}" ON "{collection}" ({column_list})'
+                    )
+    
+    # ==================== ROW MAPPING ====================
+    
+    @staticmethod
+    def _columns(collection: str) -> Dict[str, type]:
+        if collection not in SCHEMA:
+            raise ValueError(f"Unknown collection: {collection}")
+        return SCHEMA[collection]
+    
+    def _row_values(self, collection: str, record_id: str, record: Dict) -> List:
+        """Flatten a record into (id, typed columns..., extra JSON)"""
+        columns = self._columns(collection)
+        extra = {key: value for key, value in record.items() if key not in columns}
+        return [record_id] + [record.get(name) for name in columns] + [json.dumps(extra)]
+    
+    def _record(self, collection: str, row: Tuple) -> Dict:
+        """Rebuild a record from (id, typed columns..., extra JSON)"""
+        record = {}
+        for (name, kind), value in zip(self._columns(collection).items(), row[1:-1]):
+            if value is None:
+                continue
+            record[name] = bool(value) if kind is bool else value
+        record.update(json.loads(row[-1]))
+        return record
+    
+    def _select_list(self, collection: str, qualified: bool = False) -> str:
+        table = f'"{collection}".' if qualified else ""
+        columns = "".join(f', {table}"{name}"' for name in self._columns(collection))
+        return f"{table}id{columns}, {table}extra"
+    
+    def _expression(self, collection: str, field: str) -> Tuple[str, List]:
+        """SQL expression (and its parameters) that reads a record field"""
+        if field in self._columns(collection):
+            return f'"{field}"', []
+        if not _FIELD_NAME.match(field):
+            raise ValueError(f"Invalid field name: {field}")
+        return "json_extract(extra, ?)", [f"$.{field}"]
+    
+    def _where(self, collection: str, conditions: List[Tuple]) -> Tuple[str, List]:
+        """Compile normalized conditions into a WHERE clause with bound parameters"""
+        self._columns(collection)
+        clauses = []
+        params = []
+        for field, operator, value in conditions:
+            expression, expression_params = self._expression(collection, field)
+            if operator == "$eq" and value is None:
+                clauses.append(f"{expression} IS NULL")
+                params += expression_params
+            elif operator == "$eq":
+                clauses.append(f"{expression} = ?")
+                params += expression_params + [value]
+            elif operator == "$ne":
+                clauses.append(f"{expression} IS NOT ?")
+                params += expression_params + [value]
+            elif operator in ("$in", "$nin"):
+                values = list(value)
+                placeholders = ", ".join("?" * len(values))
+                if operator == "$in":
+                    clauses.append(f"{expression} IN ({placeholders})" if values else "0")
+                    params += expression_params + values if values else []
+                else:
+                    clauses.append(
+                        f"({expression} IS NULL OR {expression} NOT IN ({placeholders}))" if values else "1"
+                    )
+                    params += expression_params + expression_params + values if values else []
+            elif operator == "$prefix":
+                clauses.append(f"({expression} >= ? AND {expression} < ?)")
+                params += expression_params + [value] + expression_params + [value + "\U0010ffff"]
+            else:
+                comparison = {"$gt": ">", "$gte": ">=", "$lt": "<", "$lte": "<="}[operator]
+                clauses.append(f"{expression} {comparison} ?")
+                params += expression_params + [value]
+        if not clauses:
+            return "", []
+        return " WHERE " + " AND ".join(clauses), params
+    
+    def _order(self, collection: str, order_by) -> Tuple[str, List]:
+        """ORDER BY clause with missing values last in either direction"""
+        fields = [order_by] if isinstance(order_by, str) else list(order_by)
+        terms = []
+        params = []
+        for field in fields:
+            direction = " DESC" if field.startswith("-") else ""
+            expression, expression_params = self._expression(collection, field.lstrip("-"))
+            terms.append(f"({expression} IS NULL), {expression}{direction}")
+            params += expression_params + expression_params
+        return " ORDER BY " + ", ".join(terms), params
+    
+    # ==================== BACKEND PRIMITIVES ====================
+    
+    def _write_statement(self, operation: str, collection: str, ids: List[str],
+                         records: List[Dict]) -> Tuple[str, List[List]]:
+        """SQL and parameter rows for an "add", "update" or "upsert" write"""
+        names = list(self._columns(collection)) + ["extra"]
+        placeholders = ", ".join("?" * (len(names) + 1))
+        if operation == "update":
+            assignments = ", ".join(f'"{name}" = ?' for name in names)
+            sql = f'UPDATE "{collection}" SET {assignments} WHERE id = ?'
+            rows = []
+            for record_id, record in zip(ids, records):
+                values = self._row_values(collection, record_id, record)
+                rows.append(values[1:] + [record_id])
+            return sql, rows
+        
+        sql = f'INSERT INTO "{collection}" VALUES ({placeholders})'
+        if operation == "upsert":
+            assignments = ", ".join(f'"{name}" = excluded."{name}"' for name in names)
+            sql += f" ON CONFLICT(id) DO UPDATE SET {assignments}"
+        return sql, [self._row_values(collection, i, r) for i, r in zip(ids, records)]
+    
+    def _store_add(self, collection: str, ids: List[str], records: List[Dict], documents: List[str]):
+        self._store_apply([("add", collection, ids, records, documents)])
+    
+    def _store_update(self, collection: str, ids: List[str], records: List[Dict], documents: List[str] = None):
+        self._store_apply([("update", collection, ids, records, documents)])
+    
+    def _store_upsert(self, collection: str, ids: List[str], records: List[Dict], documents: List[str]):
+        self._store_apply([("upsert", collection, ids, records, documents)])
+    
+    def _store_apply(self, writes: List[WriteOp]):
+        """Run a batch of writes in one transaction"""
+        statements = [
+            self._write_statement(operation, collection, ids, records)
+            for operation, collection, ids, records, _ in writes
+        ]
+        connection = self._connection()
+        with connection:
+            for sql, rows in statements:
+                connection.executemany(sql, rows)
+    
+    def _store_get(self, collection: str, ids: List[str]) -> List[Dict]:
+        connection = self._connection()
+        select = self._select_list(collection)
+        rows = {}
+        unique_ids = list(dict.fromkeys(ids))
+        for start in range(0, len(unique_ids), _ID_CHUNK):
+            chunk = unique_ids[start:start + _ID_CHUNK]
+            sql = f'SELECT {select} FROM "{collection}" WHERE id IN ({", ".join("?" * len(chunk))})'
+            for row in connection.execute(sql, chunk):
+                rows[row[0]] = row
+        return [self._record(collection, rows[i]) for i in unique_ids if i in rows]
+    
+    def _store_select(self, collection: str, conditions: List[Tuple], order_by=None,
+                      limit: int = None, offset: int = 0) -> List[Dict]:
+        where, params = self._where(collection, conditions)
+        sql = f'SELECT {self._select_list(collection)} FROM "{collection}"{where}'
+        if order_by:
+            order, order_params = self._order(collection, order_by)
+            sql += order
+            params += order_params
+        if limit is not None or offset:
+            sql += " LIMIT ? OFFSET ?"
+            params += [limit if limit is not None else -1, offset]
+        rows = self._connection().execute(sql, params).fetchall()
+        return [self._record(collection, row) for row in rows]
+    
+    def _store_page(self, collection: str, conditions: List[Tuple], field: str, descending: bool,
+                    after: Optional[Tuple], limit: int) -> List[Tuple[Tuple, Dict]]:
+        """Keyset scan: seeks past the cursor key and reads only the page"""
+        where, params = self._where(collection, conditions)
+        expression, expression_params = self._expression(collection, field)
+        
+        if after is not None:
+            missing, value, record_id = after
+            seek, seek_params = self._seek(expression, expression_params, descending, missing, value, record_id)
+            where = f"{where} AND {seek}" if where else f" WHERE {seek}"
+            params += seek_params
+        
+        direction = " DESC" if descending else ""
+        sql = (
+            f'SELECT {self._select_list(collection)} FROM "{collection}"{where} '
+            f"ORDER BY ({expression} IS NULL){direction}, {expression}{direction}, id{direction} LIMIT ?"
+        )
+        params += expression_params + expression_params + [limit]
+        rows = self._connection().execute(sql, params).fetchall()
+        
+        page = []
+        for row in rows:
+            record = self._record(collection, row)
+            page.append((sort_key(record.get(field), row[0]), record))
+        return page
+    
+    @staticmethod
+    def _seek(expression: str, expression_params: List, descending: bool,
+              missing: bool, value, record_id: str) -> Tuple[str, List]:
+        """Condition selecting rows whose (missing, value, id) key lies past the cursor key"""
+        e, p = expression, expression_params
+        if not descending:
+            if missing:
+                return f"({e} IS NULL AND id > ?)", p + [record_id]
+            return (
+                f"({e} IS NULL OR {e} > ? OR ({e} = ? AND id > ?))",
+                p + p + [value] + p + [value, record_id]
+            )
+        if missing:
+            return f"({e} IS NOT NULL OR id < ?)", p + [record_id]
+        return (
+            f"({e} IS NOT NULL AND ({e} < ? OR ({e} = ? AND id < ?)))",
+            p + p + [value] + p + [value, record_id]
+        )
+    
+    def _store_count(self, collection: str, conditions: List[Tuple]) -> int:
+        where, params = self._where(collection, conditions)
+        row = self._connection().execute(f'SELECT COUNT(*) FROM "{collection}"{where}', params).fetchone()
+        return row[0]
+    
+    def _store_clear(self, collections: Tuple[str, ...]):
+        connection = self._connection()
+        with connection:
+            for collection in collections:
+                self._columns(collection)
+                connection.execute(f'DELETE FROM "{collection}"')
+    
+    def _store_delete(self, collection: str, ids: List[str]):
+        self._columns(collection)
+        connection = self._connection()
+        with connection:
+            for start in range(0, len(ids), _ID_CHUNK):
+                chunk = ids[start:start + _ID_CHUNK]
+                connection.execute(
+                    f'DELETE FROM "{collection}" WHERE id IN ({", ".join("?" * len(chunk))})', chunk
+                )
+    
+    def _store_compact(self):
+        """Return space freed by deletes to the filesystem and truncate the WAL"""
+        connection = self._connection()
+        connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        connection.execute("VACUUM")
+    
+    # ==================== ENTITY QUERIES ====================
+    
+    def trips_without_loads(self, status: str = "active") -> List[Dict]:
+        """
+        Anti-join on the assigned_trip_id index instead of a second round trip
+        
+        Trips or loads held in the hot store (the default) are newer in memory
+        than in the table, so the query is answered from the hot store's
+        status and assigned_trip_id postings instead.
+        """
+        if self.hot.holds("trips") or self.hot.holds("loads"):
+            return super().trips_without_loads(status)
+        sql = (
+            f'SELECT {self._select_list("trips")} FROM "trips" WHERE "status" = ? '
+            'AND NOT EXISTS (SELECT 1 FROM "loads" WHERE "loads"."assigned_trip_id" = "trips".id)'
+        )
+        try:
+            rows = self._connection().execute(sql, [status]).fetchall()
+            return [self._record("trips", row) for row in rows]
+        except:
+            return []
+    
+    def _active_allocated_loads(self, vehicle_id: str) -> List[Tuple[Dict, Dict]]:
+        """
+        Allocations joined to their loads in one statement on the (vehicle_id, status) index
+        
+        Only used when neither collection is hot; the default hot set answers
+        from the hot store's postings instead (see BaseDatabase).
+        """
+        if self.hot.holds("allocations") or self.hot.holds("loads"):
+            return super()._active_allocated_loads(vehicle_id)
+        sql = (
+            f'SELECT {self._select_list("allocations", qualified=True)}, '
+            f'{self._select_list("loads", qualified=True)} '
+            'FROM "allocations" JOIN "loads" ON "loads".id = "allocations"."load_id" '
+            'WHERE "allocations"."vehicle_id" = ? AND "allocations"."status" = ? '
+            'ORDER BY "allocations"."allocated_at", "allocations".id'
+        )
+        width = len(self._columns("allocations")) + 2
+        try:
+            rows = self._connection().execute(sql, [vehicle_id, "active"]).fetchall()
+        except:
+            return []
+        return [(self._record("allocations", row[:width]), self._record("loads", row[width:])) for row in rows]
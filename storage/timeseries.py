@@ -0,0 +1,364 @@
+"""
+Vehicle Track Store
+Append-only columnar time series of GPS readings, one directory per vehicle
+and one partition per UTC day:
+
+    <root>/<vehicle_id>/<YYYYMMDD>/t.i8     int64 epoch milliseconds
+                                   lat.f8   float64 latitude
+                                   lng.f8   float64 longitude
+                                   acc.f8   float64 accuracy (meters)
+
+Ingest appends packed values to each column file; reads memory-map the
+columns and binary-search the time column.
+"""
+
+import os
+import re
+import shutil
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+
+COLUMNS = {
+    "t": np.dtype("<i8"),
+    "lat": np.dtype("<f8"),
+    "lng": np.dtype("<f8"),
+    "acc": np.dtype("<f8"),
+}
+
+COLUMN_FILES = {
+    "t": "t.i8",
+    "lat": "lat.f8",
+    "lng": "lng.f8",
+    "acc": "acc.f8",
+}
+
+# Marker written when a reading arrives older than the partition's last one
+UNSORTED_MARKER = ".unsorted"
+
+# Vehicle ids outside this set are stored hex-encoded behind ENCODED_PREFIX
+_SAFE_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+ENCODED_PREFIX = "~"
+
+
+def to_epoch_ms(value) -> int:
+    """Convert a datetime (naive = UTC), ISO string or epoch ms to epoch ms"""
+    if value is None:
+        value = datetime.utcnow()
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return int(round(value.timestamp() * 1000))
+    return int(value)
+
+
+def from_epoch_ms(value: int) -> datetime:
+    """Convert epoch ms to a naive UTC datetime"""
+    return datetime.fromtimestamp(value / 1000, tz=timezone.utc).replace(tzinfo=None)
+
+
+def _empty_track() -> Dict[str, np.ndarray]:
+    return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()}
+
+
+class TrackStore:
+    """Per-vehicle, day-partitioned columnar GPS track storage"""
+    
+    def __init__(self, root: str, retention_days: Optional[int] = None):
+        """
+        Args:
+            root: Directory holding the track partitions
+            retention_days: Partitions older than this many days are deleted
+                (None keeps everything)
+        """
+        self.root = root
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+    
+    # ==================== PATHS ====================
+    
+    def _vehicle_dir(self, vehicle_id: str) -> str:
+        # UUIDs are used as-is; anything else is hex-encoded to stay filesystem safe
+        if _SAFE_NAME.match(vehicle_id):
+            name = vehicle_id
+        else:
+            name = ENCODED_PREFIX + vehicle_id.encode().hex()
+        return os.path.join(self.root, name)
+    
+    @staticmethod
+    def _column_path(partition_path: str, name: str) -> str:
+        return os.path.join(partition_path, COLUMN_FILES[name])
+    
+    @staticmethod
+    def _partition_name(epoch_ms: int) -> str:
+        return from_epoch_ms(epoch_ms).strftime("%Y%m%d")
+    
+    def _partitions(self, vehicle_id: str) -> List[str]:
+        vehicle_dir = self._vehicle_dir(vehicle_id)
+        if not os.path.isdir(vehicle_dir):
+            return []
+        return sorted(name for name in os.listdir(vehicle_dir) if name.isdigit())
+    
+    # ==================== INGEST ====================
+    
+    def append(self, vehicle_id: str, latitude: float, longitude: float,
+               accuracy: float, recorded_at=None) -> int:
+        """
+        Append one reading
+        
+        Returns:
+            Epoch milliseconds stored for the reading
+        """
+        epoch_ms = to_epoch_ms(recorded_at)
+        self.append_many(vehicle_id, [(epoch_ms, latitude, longitude, accuracy)])
+        return epoch_ms
+    
+    def append_many(self, vehicle_id: str, readings: Iterable[Tuple]):
+        """Append (recorded_at, latitude, longitude, accuracy) readings for one vehicle"""
+        rows = [(to_epoch_ms(r[0]), float(r[1]), float(r[2]), float(r[3])) for r in readings]
+        if not rows:
+            return
+        
+        by_partition: Dict[str, List[Tuple]] = {}
+        for row in rows:
+            by_partition.setdefault(self._partition_name(row[0]), []).append(row)
+        
+        with self._lock:
+            vehicle_dir = self._vehicle_dir(vehicle_id)
+            for partition, partition_rows in by_partition.items():
+                path = os.path.join(vehicle_dir, partition)
+                is_new = not os.path.isdir(path)
+                os.makedirs(path, exist_ok=True)
+                
+                self._align_columns(path)
+                times = np.array([r[0] for r in partition_rows], dtype=COLUMNS["t"])
+                last = self._last_time(path)
+                if (last is not None and times[0] < last) or np.any(np.diff(times) < 0):
+                    open(os.path.join(path, UNSORTED_MARKER), "a").close()
+                
+                columns = {
+                    "t": times,
+                    "lat": np.array([r[1] for r in partition_rows], dtype=COLUMNS["lat"]),
+                    "lng": np.array([r[2] for r in partition_rows], dtype=COLUMNS["lng"]),
+                    "acc": np.array([r[3] for r in partition_rows], dtype=COLUMNS["acc"]),
+                }
+                for name, values in columns.items():
+                    with open(self._column_path(path, name), "ab") as f:
+                        f.write(values.tobytes())
+                
+                if is_new:
+                    self._apply_retention_locked(vehicle_id)
+    
+    def _align_columns(self, partition_path: str):
+        """Trim values left behind by an interrupted append so columns stay row-aligned"""
+        sizes = {}
+        for name, dtype in COLUMNS.items():
+            path = self._column_path(partition_path, name)
+            sizes[name] = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+        count = min(sizes.values())
+        for name, dtype in COLUMNS.items():
+            path = self._column_path(partition_path, name)
+            if os.path.exists(path) and os.path.getsize(path) != count * dtype.itemsize:
+                with open(path, "r+b") as f:
+                    f.truncate(count * dtype.itemsize)
+    
+    def _last_time(self, partition_path: str) -> Optional[int]:
+        path = self._column_path(partition_path, "t")
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        if size < 8:
+            return None
+        with open(path, "rb") as f:
+            f.seek((size // 8 - 1) * 8)
+            return int(np.frombuffer(f.read(8), dtype=COLUMNS["t"])[0])
+    
+    # ==================== READS ====================
+    
+    def _load_partition(self, partition_path: str) -> Dict[str, np.ndarray]:
+        """Memory-map a partition's columns (trimmed to the shortest column)"""
+        sizes = {}
+        for name, dtype in COLUMNS.items():
+            path = self._column_path(partition_path, name)
+            sizes[name] = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+        count = min(sizes.values())
+        if count == 0:
+            return _empty_track()
+        return {
+            name: np.memmap(self._column_path(partition_path, name), dtype=dtype, mode="r", shape=(count,))
+            for name, dtype in COLUMNS.items()
+        }
+    
+    def read(self, vehicle_id: str, start=None, end=None) -> Dict[str, np.ndarray]:
+        """
+        Range scan of a vehicle's track
+        
+        Args:
+            vehicle_id: Vehicle to read
+            start: Inclusive lower bound (datetime, ISO string or epoch ms)
+            end: Exclusive upper bound (datetime, ISO string or epoch ms)
+        
+        Returns:
+            Dict of column arrays "t", "lat", "lng", "acc" ordered by time
+        """
+        start_ms = to_epoch_ms(start) if start is not None else None
+        end_ms = to_epoch_ms(end) if end is not None else None
+        first = self._partition_name(start_ms) if start_ms is not None else None
+        last = self._partition_name(end_ms) if end_ms is not None else None
+        
+        pieces = []
+        vehicle_dir = self._vehicle_dir(vehicle_id)
+        for partition in self._partitions(vehicle_id):
+            if (first and partition < first) or (last and partition > last):
+                continue
+            path = os.path.join(vehicle_dir, partition)
+            columns = self._load_partition(path)
+            times = columns["t"]
+            if len(times) == 0:
+                continue
+            
+            if os.path.exists(os.path.join(path, UNSORTED_MARKER)):
+                order = np.argsort(times, kind="stable")
+                columns = {name: values[order] for name, values in columns.items()}
+                times = columns["t"]
+            
+            lo = np.searchsorted(times, start_ms, side="left") if start_ms is not None else 0
+            hi = np.searchsorted(times, end_ms, side="left") if end_ms is not None else len(times)
+            if hi > lo:
+                pieces.append({name: np.array(values[lo:hi]) for name, values in columns.items()})
+        
+        if not pieces:
+            return _empty_track()
+        return {name: np.concatenate([p[name] for p in pieces]) for name in COLUMNS}
+    
+    def latest(self, vehicle_id: str) -> Optional[Dict]:
+        """Most recent reading of a vehicle"""
+        partitions = self._partitions(vehicle_id)
+        if not partitions:
+            return None
+        track = self.read_partition(vehicle_id, partitions[-1])
+        if len(track["t"]) == 0:
+            return None
+        i = int(np.argmax(track["t"]))
+        return {
+            "t": int(track["t"][i]),
+            "lat": float(track["lat"][i]),
+            "lng": float(track["lng"][i]),
+            "acc": float(track["acc"][i]),
+        }
+    
+    def read_partition(self, vehicle_id: str, partition: str) -> Dict[str, np.ndarray]:
+        """Read one day partition as-is (append order)"""
+        return self._load_partition(os.path.join(self._vehicle_dir(vehicle_id), partition))
+    
+    def vehicles(self) -> List[str]:
+        """Vehicle ids with stored tracks"""
+        if not os.path.isdir(self.root):
+            return []
+        names = []
+        for name in sorted(os.listdir(self.root)):
+            if name.startswith(ENCODED_PREFIX):
+                name = bytes.fromhex(name[len(ENCODED_PREFIX):]).decode()
+            names.append(name)
+        return names
+    
+    # ==================== MAINTENANCE ====================
+    
+    def compact(self, vehicle_id: str = None) -> int:
+        """
+        Rewrite partitions in time order, dropping duplicate timestamps and
+        any partially written trailing values
+        
+        Returns:
+            Number of partitions rewritten
+        """
+        vehicle_ids = [vehicle_id] if vehicle_id else self.vehicles()
+        rewritten = 0
+        with self._lock:
+            for vid in vehicle_ids:
+                vehicle_dir = self._vehicle_dir(vid)
+                for partition in self._partitions(vid):
+                    path = os.path.join(vehicle_dir, partition)
+                    if self._compact_partition(path):
+                        rewritten += 1
+        return rewritten
+    
+    def _compact_partition(self, path: str) -> bool:
+        marker = os.path.join(path, UNSORTED_MARKER)
+        columns = self._load_partition(path)
+        count = len(columns["t"])
+        sizes_match = all(
+            os.path.exists(self._column_path(path, name))
+            and os.path.getsize(self._column_path(path, name)) == count * dtype.itemsize
+            for name, dtype in COLUMNS.items()
+        )
+        if not os.path.exists(marker) and sizes_match:
+            return False
+        
+        times = np.array(columns["t"])
+        order = np.argsort(times, kind="stable")
+        sorted_times = times[order]
+        # Keep the last reading written for each timestamp
+        keep = np.ones(len(order), dtype=bool)
+        if len(order) > 1:
+            keep[:-1] = sorted_times[1:] != sorted_times[:-1]
+        selected = order[keep]
+        compacted = {name: np.array(values)[selected] for name, values in columns.items()}
+        del columns
+        
+        for name in COLUMNS:
+            tmp_path = self._column_path(path, name) + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(compacted[name].tobytes())
+            os.replace(tmp_path, self._column_path(path, name))
+        if os.path.exists(marker):
+            os.remove(marker)
+        return True
+    
+    def apply_retention(self, now: datetime = None) -> int:
+        """
+        Delete partitions older than the retention window
+        
+        Returns:
+            Number of partitions deleted
+        """
+        with self._lock:
+            return sum(self._apply_retention_locked(vid, now) for vid in self.vehicles())
+    
+    def _apply_retention_locked(self, vehicle_id: str, now: datetime = None) -> int:
+        if self.retention_days is None:
+            return 0
+        cutoff = ((now or datetime.utcnow()) - timedelta(days=self.retention_days)).strftime("%Y%m%d")
+        vehicle_dir = self._vehicle_dir(vehicle_id)
+        deleted = 0
+        for partition in self._partitions(vehicle_id):
+            if partition < cutoff:
+                shutil.rmtree(os.path.join(vehicle_dir, partition), ignore_errors=True)
+                deleted += 1
+        return deleted
+    
+    def partitions_before(self, cutoff: datetime) -> List[Tuple[str, str]]:
+        """(vehicle_id, partition) pairs for days entirely before cutoff"""
+        day = cutoff.strftime("%Y%m%d")
+        with self._lock:
+            return [
+                (vehicle_id, partition)
+                for vehicle_id in self.vehicles()
+                for partition in self._partitions(vehicle_id)
+                if partition < day
+            ]
+    
+    def drop_partition(self, vehicle_id: str, partition: str):
+        """Delete one day partition"""
+        with self._lock:
+            shutil.rmtree(os.path.join(self._vehicle_dir(vehicle_id), partition), ignore_errors=True)
+    
+    def clear(self):
+        """Delete all tracks"""
+        with self._lock:
+            shutil.rmtree(self.root, ignore_errors=True)
+            os.makedirs(self.root, exist_ok=True)
@@ -0,0 +1,60 @@
+"""
+Storage Wire Protocol
+Length-prefixed frames exchanged between the storage server and its clients
+"""
+
+import pickle
+import socket
+import struct
+
+# Frame header: payload length, unsigned 32-bit big-endian
+HEADER = struct.Struct("!I")
+MAX_FRAME_SIZE = 256 * 1024 * 1024
+
+# Database attributes exposed as namespaces of callable methods (db.changes.since(...))
+NAMESPACES = ("changes", "cache", "hot", "archive", "tracks", "writer")
+
+# Plain value attributes inside a namespace, read rather than called
+VALUE_ATTRIBUTES = {"changes": ("sequence",)}
+
+# Methods a client may not run on the server's database
+BLOCKED_METHODS = ("close",)
+
+
+def send_frame(sock: socket.socket, message):
+    """
+    Send one message
+    
+    Messages are pickled, so the socket must only be reachable by the
+    processes of the deployment (the server creates it with mode 0600).
+    """
+    payload = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    if len(payload) > MAX_FRAME_SIZE:
+        raise ValueError(f"Message of {len(payload)} bytes exceeds the {MAX_FRAME_SIZE} byte frame limit")
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def recv_frame(sock: socket.socket):
+    """
+    Receive one message
+    
+    Raises:
+        EOFError: If the peer closed the connection between frames
+    """
+    header = _recv_exactly(sock, HEADER.size, allow_eof=True)
+    (length,) = HEADER.unpack(header)
+    if length > MAX_FRAME_SIZE:
+        raise ConnectionError(f"Frame of {length} bytes exceeds the {MAX_FRAME_SIZE} byte limit")
+    return pickle.loads(_recv_exactly(sock, length))
+
+
+def _recv_exactly(sock: socket.socket, size: int, allow_eof: bool = False) -> bytes:
+    buffer = bytearray()
+    while len(buffer) < size:
+        chunk = sock.recv(size - len(buffer))
+        if not chunk:
+            if allow_eof and not buffer:
+                raise EOFError("Connection closed")
+            raise ConnectionError("Connection closed mid-frame")
+        buffer += chunk
+    return bytes(buffer)
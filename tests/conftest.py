@@ -0,0 +1,14 @@
+"""
+Shared pytest setup
+Points the global database at throwaway directories before any module
+imports db_chromadb, so tests never touch ./chroma_data, ./track_data or ./archive_data
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CHROMA_PERSIST_DIRECTORY", tempfile.mkdtemp(prefix="vortex_test_chroma_"))
+os.environ.setdefault("TRACK_STORE_DIRECTORY", tempfile.mkdtemp(prefix="vortex_test_tracks_"))
+os.environ.setdefault("ARCHIVE_DIRECTORY", tempfile.mkdtemp(prefix="vortex_test_archive_"))
@@ -0,0 +1,74 @@
+"""
+Tests for the cold archive store
+"""
+
+import gzip
+import os
+
+from storage.archive import ArchiveStore
+from storage.query import normalize_where
+
+
+def test_append_partitions_by_month_and_tombstones_ids(tmp_path):
+    archive = ArchiveStore(str(tmp_path))
+    written = archive.append("loads", [
+        ("load-1", "2025-01", {"load_id": "load-1", "status": "delivered"}),
+        ("load-2", "2025-02", {"load_id": "load-2", "status": "delivered"}),
+    ])
+    
+    assert written == 2
+    assert archive.months("loads") == ["2025-01", "2025-02"]
+    assert archive.contains("loads", "load-1")
+    assert archive.get("loads", "load-2") == {"load_id": "load-2", "status": "delivered"}
+    assert archive.get("loads", "missing") is None
+    assert archive.stats()['archived'] == {"loads": 2}
+
+
+def test_tombstones_survive_reopen(tmp_path):
+    ArchiveStore(str(tmp_path)).append("trips", [("trip-1", "2025-01", {"trip_id": "trip-1"})])
+    ArchiveStore(str(tmp_path)).append("trips", [("trip-2", "2025-01", {"trip_id": "trip-2"})])
+    
+    reopened = ArchiveStore(str(tmp_path))
+    assert reopened.get("trips", "trip-1") == {"trip_id": "trip-1"}
+    assert [r['trip_id'] for r in reopened.scan("trips")] == ["trip-1", "trip-2"]
+
+
+def test_scan_filters_and_bounds_months(tmp_path):
+    archive = ArchiveStore(str(tmp_path))
+    archive.append("trips", [
+        ("trip-1", "2025-01", {"trip_id": "trip-1", "driver_id": "driver-1"}),
+        ("trip-2", "2025-02", {"trip_id": "trip-2", "driver_id": "driver-2"}),
+        ("trip-3", "2025-03", {"trip_id": "trip-3", "driver_id": "driver-1"}),
+    ])
+    
+    conditions = normalize_where({"driver_id": "driver-1"})
+    assert [r['trip_id'] for r in archive.scan("trips", conditions)] == ["trip-1", "trip-3"]
+    assert [r['trip_id'] for r in archive.scan("trips", start_month="2025-02")] == ["trip-2", "trip-3"]
+    assert [r['trip_id'] for r in archive.scan("trips", end_month="2025-01")] == ["trip-1"]
+
+
+def test_bulk_rows_skip_tombstones(tmp_path):
+    archive = ArchiveStore(str(tmp_path))
+    archive.append("location_history", [("truck-1:0", "2025-01", {"vehicle_id": "truck-1"})], tombstone=False)
+    
+    assert not archive.contains("location_history", "truck-1:0")
+    assert len(list(archive.scan("location_history"))) == 1
+
+
+def test_truncated_partition_is_readable(tmp_path):
+    archive = ArchiveStore(str(tmp_path))
+    archive.append("loads", [("load-1", "2025-01", {"load_id": "load-1"})])
+    path = os.path.join(str(tmp_path), "loads", "2025-01.jsonl.gz")
+    with open(path, "ab") as f:
+        f.write(gzip.compress(b'{"id":"load-2","record":{}}\n')[:12])
+    
+    assert [r['load_id'] for r in archive.scan("loads")] == ["load-1"]
+
+
+def test_clear_removes_everything(tmp_path):
+    archive = ArchiveStore(str(tmp_path))
+    archive.append("loads", [("load-1", "2025-01", {"load_id": "load-1"})])
+    archive.clear()
+    
+    assert archive.months("loads") == []
+    assert not archive.contains("loads", "load-1")
@@ -0,0 +1,44 @@
+"""
+Tests for the entity LRU cache
+"""
+
+from storage.cache import LRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", {"id": "a"})
+    cache.put("b", {"id": "b"})
+    assert cache.get("a") == {"id": "a"}
+    
+    cache.put("c", {"id": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_counts_hits_and_misses():
+    cache = LRUCache(maxsize=4)
+    cache.put("a", {"id": "a"})
+    cache.get("a")
+    cache.get("missing")
+    cache.invalidate("a")
+    cache.get("a")
+    
+    assert cache.stats() == {
+        "size": 0, "maxsize": 4, "hits": 1, "misses": 2, "evictions": 0, "hit_rate": 0.3333
+    }
+
+
+def test_zero_size_disables_caching():
+    cache = LRUCache(maxsize=0)
+    cache.put("a", {"id": "a"})
+    assert cache.get("a") is None
+
+
+def test_bulk_access_and_uncopied_values():
+    cache = LRUCache(maxsize=2, copy=None)
+    cache.put_many([("a", 1.5), ("b", (2, 3)), ("c", 4.0)])
+    
+    assert cache.get_many(["a", "b", "c"]) == [None, (2, 3), 4.0]
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 1 and cache.stats()['evictions'] == 1
@@ -0,0 +1,59 @@
+"""
+Tests for the change feed
+"""
+
+import threading
+
+import pytest
+
+from storage.changefeed import ChangeFeed, ChangeFeedGap
+
+
+def test_sequence_and_replay_from_offset():
+    feed = ChangeFeed(maxlen=3)
+    feed.publish("loads", "create", ["l1", "l2"], [{"status": "available"}, {"status": "available"}])
+    sequence = feed.publish("trips", "update", ["t1"], [{"status": "active"}])
+    
+    assert sequence == feed.sequence == 3
+    assert [e.record_id for e in feed.since(1)] == ["l2", "t1"]
+    assert [e.record_id for e in feed.since(0, collections=["trips"])] == ["t1"]
+    assert feed.changed_since(3) is False
+    
+    feed.publish("loads", "update", ["l1"])
+    with pytest.raises(ChangeFeedGap):
+        feed.since(0)
+    assert feed.changed_since(0, ["drivers"]) is True
+    assert [e.sequence for e in feed.since(1)] == [2, 3, 4]
+
+
+def test_subscribers_get_backlog_then_live_events():
+    feed = ChangeFeed()
+    feed.publish("loads", "create", ["l1"])
+    seen = []
+    
+    assert feed.subscribe(seen.append, from_sequence=0) == 1
+    feed.publish("loads", "update", ["l1"])
+    feed.unsubscribe(seen.append)
+    feed.publish("loads", "update", ["l1"])
+    
+    assert [(e.sequence, e.operation) for e in seen] == [(1, "create"), (2, "update")]
+    assert feed.wait(2, timeout=0) is True
+    assert feed.wait(3, timeout=0) is False
+
+
+def test_live_events_never_overtake_the_replayed_backlog():
+    feed = ChangeFeed()
+    feed.publish("loads", "create", ["l1", "l2"])
+    seen = []
+    publisher = threading.Thread(target=feed.publish, args=("loads", "update", ["l1"]))
+    
+    def listener(event):
+        seen.append(event.sequence)
+        if event.sequence == 1:
+            # Another write lands while the backlog is being replayed
+            publisher.start()
+            publisher.join(timeout=0.2)
+    
+    feed.subscribe(listener, from_sequence=0)
+    publisher.join()
+    assert seen == [1, 2, 3]
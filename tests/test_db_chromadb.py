@@ -0,0 +1,501 @@
+"""
+Tests for the storage layer, run against every backend
+"""
+
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from db_chromadb import ChromaDatabase
+from storage.base import ConflictError
+from storage.sqlite_backend import SQLiteDatabase
+
+
+def _chroma(tmp_path, **options):
+    return ChromaDatabase(
+        persist_directory=str(tmp_path / "chroma"),
+        track_directory=str(tmp_path / "tracks"),
+        archive_directory=str(tmp_path / "archive"),
+        **options
+    )
+
+
+def _sqlite(tmp_path, **options):
+    return SQLiteDatabase(
+        database_path=str(tmp_path / "sqlite" / "test.db"),
+        track_directory=str(tmp_path / "tracks"),
+        archive_directory=str(tmp_path / "archive"),
+        **options
+    )
+
+
+@pytest.fixture(params=[_chroma, _sqlite], ids=["chroma", "sqlite"])
+def open_database(request):
+    return request.param
+
+
+@pytest.fixture
+def database(open_database, tmp_path):
+    database = open_database(tmp_path)
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def chroma_database(tmp_path):
+    return _chroma(tmp_path)
+
+
+def test_plain_collections_skip_embeddings(chroma_database):
+    """Plain record writes store no documents and only a one-dimension placeholder vector"""
+    database = chroma_database
+    load = database.create_load(
+        vendor_id="vendor-1", weight_kg=1000, pickup_lat=28.70, pickup_lng=77.10,
+        pickup_address="Azadpur", destination_lat=26.91, destination_lng=75.78,
+        destination_address="Jaipur", price_offered=15000
+    )
+    
+    database.flush()
+    stored = database.loads.get(ids=[load['load_id']], include=["documents", "embeddings", "metadatas"])
+    assert stored['documents'] == [None]
+    assert len(stored['embeddings'][0]) == 1
+    assert stored['metadatas'][0]['pickup_address'] == "Azadpur"
+    
+    updated = database.update_load(load['load_id'], {"status": "assigned"})
+    assert updated['status'] == "assigned"
+    assert database.get_load(load['load_id'])['status'] == "assigned"
+
+
+def test_location_and_notification_writes(database):
+    """High-volume collections round-trip without an embedding function"""
+    database.add_location_update("truck-1", 19.07, 72.87, 5.0)
+    notification = database.create_notification("driver-1", "allocation", "New Load", "Go")
+    
+    assert database.get_latest_location("truck-1")['latitude'] == 19.07
+    assert database.mark_notification_read(notification['notification_id'])['is_read'] is True
+    assert database.get_unread_count("driver-1") == 0
+
+
+def _load_fields(**overrides):
+    fields = dict(
+        vendor_id="vendor-1", weight_kg=1000, pickup_lat=28.70, pickup_lng=77.10,
+        pickup_address="Azadpur", destination_lat=26.91, destination_lng=75.78,
+        destination_address="Jaipur", price_offered=15000
+    )
+    fields.update(overrides)
+    return fields
+
+
+def _create_load(database, **overrides):
+    return database.create_load(**_load_fields(**overrides))
+
+
+def test_secondary_indexes_follow_updates(database):
+    """Status and foreign-key lookups reflect every write"""
+    first = _create_load(database)
+    second = _create_load(database, vendor_id="vendor-2")
+    
+    assert {l['load_id'] for l in database.get_available_loads()} == {first['load_id'], second['load_id']}
+    
+    database.accept_load(first['load_id'], "trip-1", "driver-1")
+    assert [l['load_id'] for l in database.get_available_loads()] == [second['load_id']]
+    assert database.get_by_field("loads", "assigned_trip_id", "trip-1")[0]['load_id'] == first['load_id']
+    assert database.count_by_field("loads", "status", "assigned") == 1
+    
+    owner = database.create_owner("Owner", "owner@example.com")
+    truck = database.create_truck(owner['owner_id'], "DL-01-AB-1234")
+    driver = database.create_driver("Driver", "+91", truck['truck_id'])
+    assert database.get_owner_trucks(owner['owner_id'])[0]['truck_id'] == truck['truck_id']
+    assert database.get_driver_for_truck(truck['truck_id'])['driver_id'] == driver['driver_id']
+    
+    allocation = database.create_allocation(truck['truck_id'], second['load_id'], owner['owner_id'])
+    assert len(database.get_active_allocations()) == 1
+    database.cancel_allocation(allocation['allocation_id'])
+    assert database.get_active_allocations() == []
+
+
+def test_records_readable_after_reopen(tmp_path, open_database):
+    """A fresh instance sees persisted records (Chroma rebuilds its indexes)"""
+    first = open_database(tmp_path)
+    load = _create_load(first)
+    first.close()
+    
+    reopened = open_database(tmp_path)
+    assert [l['load_id'] for l in reopened.get_available_loads()] == [load['load_id']]
+
+
+def test_latest_position_store(database):
+    """Latest position is updated in place and readable in bulk"""
+    database.add_location_update("truck-1", 28.61, 77.20, 10.0)
+    database.add_location_update("truck-1", 28.70, 77.10, 5.0)
+    database.add_location_update("truck-2", 19.07, 72.87, 8.0)
+    
+    assert database.get_latest_location("truck-1")['latitude'] == 28.70
+    assert len(database.find("vehicle_positions")) == 2
+    
+    positions = database.get_latest_locations(["truck-1", "truck-2", "truck-3"])
+    assert positions["truck-2"]['longitude'] == 72.87
+    assert "truck-3" not in positions
+
+
+def test_find_filters_sorts_and_pages(database):
+    """find() combines index, store-side and residual filters"""
+    for day, amount in [("01", 100.0), ("01", 250.0), ("02", 75.0)]:
+        database.create_expense({
+            "expense_id": f"exp-{day}-{amount}", "driver_id": "driver-1", "amount": amount,
+            "category": "fuel", "description": "Diesel", "trip_id": "",
+            "timestamp": f"2024-03-{day}T10:00:00", "created_at": "2024-03-01T10:00:00",
+            "source": "test", "version": 1
+        })
+    
+    daily = database.find("expenses", where={
+        "driver_id": "driver-1", "timestamp": {"$prefix": "2024-03-01"}
+    }, order_by="-amount")
+    assert [e['amount'] for e in daily] == [250.0, 100.0]
+    
+    cheap = database.find("expenses", where={"amount": {"$lt": 200}}, order_by="amount", limit=1, offset=1)
+    assert [e['amount'] for e in cheap] == [100.0]
+    
+    assert len(database.find("expenses", limit=2)) == 2
+    assert database.find("expenses", where={"driver_id": "nobody"}) == []
+
+
+def test_location_updates_go_to_track_store(database):
+    """GPS pings are appended to the track store instead of the record store"""
+    database.add_location_update("truck-1", 28.61, 77.20, 10.0)
+    database.add_location_update("truck-1", 28.62, 77.21, 8.0)
+    
+    assert database.find("location_history") == []
+    history = database.get_location_history("truck-1")
+    assert [p['latitude'] for p in history] == [28.61, 28.62]
+    assert database.get_location_track("truck-2")['t'].size == 0
+
+
+def test_legacy_location_history_moves_to_track_store(open_database, tmp_path):
+    """Rows stored as records before the track store existed are migrated once on open"""
+    start = datetime.utcnow().replace(microsecond=0) - timedelta(days=3)
+    legacy = [
+        {"location_id": f"loc-{i}", "vehicle_id": "truck-1", "latitude": [28.6, 28.61, 28.62][i],
+         "longitude": 77.2, "accuracy": 5.0, "recorded_at": (start + timedelta(hours=i)).isoformat()}
+        for i in range(3)
+    ]
+    first = open_database(tmp_path)
+    first._store_add("location_history", [l['location_id'] for l in legacy], legacy,
+                     [f"Location {l['vehicle_id']}" for l in legacy])
+    first.close()
+    
+    database = open_database(tmp_path)
+    try:
+        assert database.find("location_history") == []
+        history = database.get_location_history("truck-1")
+        assert [p['latitude'] for p in history] == [28.6, 28.61, 28.62]
+        assert history[0]['recorded_at'] == start.isoformat()
+    finally:
+        database.close()
+    
+    reopened = open_database(tmp_path)
+    try:
+        assert len(reopened.get_location_history("truck-1")) == 3
+    finally:
+        reopened.close()
+
+
+def test_bulk_writes_report_errors_per_row(database):
+    """Valid rows are written together and invalid rows are reported by index"""
+    loads = database.create_loads([
+        _load_fields(),
+        _load_fields(weight_kg=-5),
+        _load_fields(pickup_lat=123.0),
+        {"vendor_id": "vendor-1"},
+        _load_fields(vendor_id="vendor-2", currency="USD"),
+    ])
+    assert [l['vendor_id'] for l in loads['created']] == ["vendor-1", "vendor-2"]
+    assert [e['index'] for e in loads['errors']] == [1, 2, 3]
+    assert database.count_by_field("loads", "status", "available") == 2
+    
+    now = datetime.utcnow()
+    locations = database.add_location_updates([
+        {"vehicle_id": "truck-1", "latitude": 28.6, "longitude": 77.2, "accuracy": 5.0,
+         "recorded_at": now - timedelta(minutes=10)},
+        {"vehicle_id": "truck-1", "latitude": 28.7, "longitude": 77.3, "accuracy": 5.0,
+         "recorded_at": now - timedelta(minutes=5)},
+        {"vehicle_id": "truck-2", "latitude": 28.8, "longitude": 77.4, "accuracy": "bad"},
+    ])
+    assert len(locations['created']) == 2
+    assert locations['errors'] == [{"index": 2, "error": "accuracy must be a number"}]
+    assert database.get_latest_location("truck-1")['latitude'] == 28.7
+    assert len(database.get_location_history("truck-1")) == 2
+    
+    # An older upload does not move the current position backwards
+    database.add_location_updates([
+        {"vehicle_id": "truck-1", "latitude": 1.0, "longitude": 1.0, "accuracy": 5.0,
+         "recorded_at": (now - timedelta(hours=1)).isoformat()},
+    ])
+    assert database.get_latest_location("truck-1")['latitude'] == 28.7
+    
+    notifications = database.create_notifications([
+        {"driver_id": "driver-1", "notification_type": "allocation", "title": "A", "message": "a"},
+        {"driver_id": "driver-1", "notification_type": "allocation", "title": "B"},
+    ])
+    assert len(notifications['created']) == 1
+    assert notifications['errors'][0]['index'] == 1
+    assert database.get_unread_count("driver-1") == 1
+
+
+def test_entity_cache_is_written_through(open_database, tmp_path):
+    """By-id reads are cached and every write path refreshes the cached record"""
+    database = open_database(tmp_path, hot_collections=())
+    load = _create_load(database)
+    
+    first = database.get_load(load['load_id'])
+    first['status'] = "mutated by caller"
+    assert database.get_load(load['load_id'])['status'] == "available"
+    
+    database.accept_load(load['load_id'], "trip-1", "driver-1")
+    assert database.get_load(load['load_id'])['status'] == "assigned"
+    
+    # Every read above, including accept_load's own, was served from the cache
+    assert database.cache.stats()['misses'] == 0
+    
+    assert database.get_truck("missing") is None
+    assert database.cache.stats()['misses'] == 1
+
+
+def test_page_walks_keyset_cursor(database):
+    """Pages follow (created_at, id) order and stay stable across inserts"""
+    created = database.create_loads([_load_fields(weight_kg=w) for w in range(1, 6)])['created']
+    expected = [l['load_id'] for l in sorted(created, key=lambda l: (l['created_at'], l['load_id']))]
+    
+    first, cursor = database.page("loads", where={"status": "available"}, limit=2)
+    assert [l['load_id'] for l in first] == expected[:2]
+    
+    # A load posted between page requests lands after the ones already paged past
+    _create_load(database)
+    second, cursor = database.page("loads", where={"status": "available"}, limit=2, cursor=cursor)
+    assert [l['load_id'] for l in second] == expected[2:4]
+    
+    rest, cursor = database.page("loads", where={"status": "available"}, limit=10, cursor=cursor)
+    assert [l['load_id'] for l in rest][:1] == expected[4:]
+    assert len(rest) == 2 and cursor is None
+    
+    newest, _ = database.page("loads", order_by="-created_at", limit=1)
+    assert newest[0]['load_id'] == rest[-1]['load_id']
+    
+    with pytest.raises(ValueError):
+        database.page("loads", cursor="not-a-cursor")
+
+
+def test_trip_to_load_mapping(database):
+    """Trips find their assigned load without scanning, and unmatched trips in one query"""
+    trips = [
+        database.create_trip("driver-1", f"truck-{n}", 28.70, 77.10, "Delhi", 26.91, 75.78, "Jaipur", "")
+        for n in range(3)
+    ]
+    database.update_trip(trips[2]['trip_id'], {"status": "completed"})
+    load = _create_load(database)
+    database.accept_load(load['load_id'], trips[0]['trip_id'], "driver-1")
+    
+    assert database.get_load_for_trip(trips[0]['trip_id'])['load_id'] == load['load_id']
+    assert database.get_load_for_trip(trips[1]['trip_id']) is None
+    assert database.get_load_for_trip("") is None
+    assert [t['trip_id'] for t in database.trips_without_loads()] == [trips[1]['trip_id']]
+    assert [t['trip_id'] for t in database.trips_without_loads("completed")] == [trips[2]['trip_id']]
+
+
+def test_trips_without_loads_answered_by_hot_set_or_store(open_database, tmp_path, monkeypatch):
+    """The default hot set answers from memory; stored collections are queried (one anti-join on SQLite)"""
+    for name, hot_collections in (("hot", None), ("stored", ())):
+        database = open_database(tmp_path / name, hot_collections=hot_collections)
+        try:
+            trips = [
+                database.create_trip("driver-1", f"truck-{n}", 28.70, 77.10, "Delhi", 26.91, 75.78, "Jaipur", "")
+                for n in range(2)
+            ]
+            load = _create_load(database)
+            database.accept_load(load['load_id'], trips[0]['trip_id'], "driver-1")
+            database.hot.flush()
+            
+            # Loads are never scanned: the assigned_trip_id postings (or the anti-join) decide
+            found = []
+            find = database.find
+            monkeypatch.setattr(database, "find", lambda collection, **query: found.append(collection) or find(collection, **query))
+            assert [t['trip_id'] for t in database.trips_without_loads()] == [trips[1]['trip_id']]
+            assert "loads" not in found
+        finally:
+            monkeypatch.undo()
+            database.close()
+
+
+def test_driver_allocated_loads_resolved_together(database):
+    """Driver -> truck -> active allocations -> loads -> position comes back in one call"""
+    truck = database.create_truck("owner-1", "DL-01")
+    other_truck = database.create_truck("owner-1", "DL-02")
+    driver = database.create_driver("Driver", "+91", truck['truck_id'])
+    first, second, elsewhere = (_create_load(database) for _ in range(3))
+    
+    database.create_allocation(truck['truck_id'], first['load_id'], "owner-1")
+    cancelled = database.create_allocation(truck['truck_id'], second['load_id'], "owner-1")
+    database.cancel_allocation(cancelled['allocation_id'])
+    database.create_allocation(other_truck['truck_id'], elsewhere['load_id'], "owner-1")
+    database.add_location_update(truck['truck_id'], 28.61, 77.20, 5.0)
+    database.cache.clear()
+    
+    # The default hot set serves allocations and loads without reading the store
+    read = []
+    for primitive in ("_store_select", "_store_get"):
+        original = getattr(database, primitive)
+        setattr(database, primitive, lambda collection, *args, original=original, **kwargs:
+                read.append(collection) or original(collection, *args, **kwargs))
+    summary = database.get_driver_allocated_loads(driver['driver_id'])
+    assert not {"allocations", "loads"} & set(read)
+    assert summary['truck_id'] == truck['truck_id']
+    assert summary['location']['latitude'] == 28.61
+    assert [(a['load_id'], l['pickup_address']) for a, l in summary['allocations']] == [(first['load_id'], "Azadpur")]
+    
+    assert len(database.get_driver_allocations(driver['driver_id'])) == 2
+    assert database.get_driver_allocated_loads("missing") is None
+
+
+def test_writes_publish_change_events(database):
+    """Every write path lands on the change feed in order"""
+    start = database.changes.sequence
+    load = _create_load(database)
+    database.accept_load(load['load_id'], "trip-1", "driver-1")
+    database.add_location_update("truck-1", 28.61, 77.20, 5.0)
+    
+    events = database.changes.since(start)
+    assert [(e.collection, e.operation) for e in events] == [
+        ("loads", "create"), ("loads", "update"), ("location_history", "create"), ("vehicle_positions", "upsert")
+    ]
+    assert events[1].record == database.get_load(load['load_id'])
+    assert database.changes.changed_since(events[-1].sequence, ["loads"]) is False
+
+
+def test_hot_collections_write_behind(database):
+    """Hot writes are readable at once; money-related writes reach the store before returning"""
+    load = _create_load(database)
+    assert database.get_load(load['load_id'])['status'] == "available"
+    
+    database.accept_load(load['load_id'], "trip-1", "driver-1")
+    assert database._store_get("loads", [load['load_id']])[0]['status'] == "assigned"
+    
+    database.update_load(load['load_id'], {"status": "picked_up"})
+    database.flush()
+    assert database._store_get("loads", [load['load_id']])[0]['status'] == "picked_up"
+    assert database.hot.stats()['pending'] == 0
+
+
+def test_archive_moves_terminal_records(database):
+    """Old delivered loads leave the live store but stay readable by id and in reporting queries"""
+    now = datetime.utcnow()
+    long_ago = (now - timedelta(days=45)).isoformat()
+    old = _create_load(database)
+    database.update_load(old['load_id'], {"status": "delivered", "delivered_at": long_ago})
+    recent = _create_load(database, pickup_address="Okhla")
+    database.update_load(recent['load_id'], {"status": "delivered", "delivered_at": now.isoformat()})
+    database.add_location_updates([
+        {"vehicle_id": "truck-1", "latitude": 28.61, "longitude": 77.20, "accuracy": 5.0, "recorded_at": long_ago}
+    ])
+    
+    archived = database.archive_terminal_records(older_than_days=30, now=now)
+    assert archived == {"loads": 1, "location_history": 1}
+    
+    assert database._store_get("loads", [old['load_id']]) == []
+    assert database.get_load(old['load_id'])['delivered_at'] == long_ago
+    delivered = {"status": "delivered"}
+    assert [l['load_id'] for l in database.find("loads", where=delivered)] == [recent['load_id']]
+    assert [l['load_id'] for l in database.find("loads", where=delivered, include_archived=True,
+                                                order_by="delivered_at")] == [old['load_id'], recent['load_id']]
+    assert database.get_location_history("truck-1") == []
+    assert [r['latitude'] for r in database.archive.scan("location_history")] == [28.61]
+    
+    assert database.archive_terminal_records(older_than_days=30, now=now) == {}
+    
+    # Readings written out of order are compacted; retention later deletes live and archived tracks
+    noon = (now - timedelta(days=1)).replace(hour=12, minute=0, second=0, microsecond=0)
+    for minutes in (10, 5):
+        database.add_location_updates([
+            {"vehicle_id": "truck-1", "latitude": 28.6, "longitude": 77.2, "accuracy": 5.0,
+             "recorded_at": noon + timedelta(minutes=minutes)}
+        ])
+    assert database.apply_track_retention(now=now) == {
+        "track_partitions_deleted": 0, "archived_track_months_deleted": 0, "track_partitions_compacted": 1
+    }
+    assert database.apply_track_retention(now=now + timedelta(days=200)) == {
+        "track_partitions_deleted": 1, "archived_track_months_deleted": 1, "track_partitions_compacted": 0
+    }
+    assert list(database.archive.scan("location_history")) == []
+    assert database.get_location_history("truck-1") == []
+
+
+def test_updates_compare_and_set_versions(database):
+    """Updates stamp a new version and refuse to apply over a changed record"""
+    load = _create_load(database)
+    assert load['version'] == 1
+    
+    updated = database.update_load(load['load_id'], {"price_offered": 16000}, expected={"version": 1})
+    assert updated['version'] == 2
+    with pytest.raises(ConflictError) as conflict:
+        database.update_load(load['load_id'], {"price_offered": 17000}, expected={"version": 1})
+    assert (conflict.value.field, conflict.value.actual) == ("version", 2)
+    assert database.get_load(load['load_id'])['price_offered'] == 16000
+    assert database.update_load("missing", {"status": "assigned"}) is None
+
+
+def test_concurrent_accepts_assign_a_load_once(database):
+    """Of several threads accepting the same load, exactly one wins"""
+    load = _create_load(database)
+    outcomes = []
+    
+    def accept(trip_id):
+        try:
+            database.accept_load(load['load_id'], trip_id, "driver-1")
+            outcomes.append(trip_id)
+        except ConflictError:
+            outcomes.append(None)
+    
+    threads = [threading.Thread(target=accept, args=(f"trip-{i}",)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    winners = [trip_id for trip_id in outcomes if trip_id]
+    assert len(winners) == 1 and len(outcomes) == 8
+    assert database.get_load(load['load_id'])['assigned_trip_id'] == winners[0]
+
+
+def test_load_point_index_follows_load_status(database):
+    """Spatial queries see new loads and drop assigned or deleted ones"""
+    near = _create_load(database, pickup_lat=28.70, pickup_lng=77.10)
+    far = _create_load(database, pickup_lat=19.07, pickup_lng=72.87)
+    
+    assert [l['load_id'] for l in database.loads_within(28.61, 77.20, 50)] == [near['load_id']]
+    assert [l['load_id'] for l in database.nearest_loads(19.0, 72.8, k=2)] == [far['load_id'], near['load_id']]
+    
+    later = _create_load(database, pickup_lat=28.65, pickup_lng=77.15)
+    assert [l['load_id'] for l in database.loads_within(28.61, 77.20, 50)] == [later['load_id'], near['load_id']]
+    assert {l['load_id'] for l in database.loads_in_box(26.0, 75.0, 27.0, 76.0, point="destination")} == {
+        near['load_id'], far['load_id'], later['load_id']
+    }
+    
+    database.accept_load(near['load_id'], "trip-1", "driver-1")
+    assert [l['load_id'] for l in database.loads_within(28.61, 77.20, 50)] == [later['load_id']]
+    
+    database.update_load(near['load_id'], {'status': 'available'})
+    assert len(database.loads_within(28.61, 77.20, 50)) == 2
+    
+    with pytest.raises(ValueError):
+        database.loads_within(28.61, 77.20, 50, point="origin")
+
+
+def test_corridor_query_prunes_off_route_loads(database):
+    """Only loads whose pickup and drop both sit near the Delhi -> Jaipur leg are returned"""
+    on_route = _create_load(database, pickup_lat=28.46, pickup_lng=77.03, destination_lat=27.55, destination_lng=76.63)
+    _create_load(database, pickup_lat=28.46, pickup_lng=77.03, destination_lat=19.07, destination_lng=72.87)
+    _create_load(database, pickup_lat=22.57, pickup_lng=88.36, destination_lat=26.91, destination_lng=75.78)
+    
+    corridor = database.loads_in_corridor(28.61, 77.20, 26.91, 75.78, 300)
+    assert [l['load_id'] for l in corridor] == [on_route['load_id']]
+    assert database.loads_in_corridor(28.61, 77.20, 26.91, 75.78, 100) == []
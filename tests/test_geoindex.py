@@ -0,0 +1,89 @@
+"""
+Tests for the geo grid index
+"""
+
+import math
+import random
+
+from storage.geoindex import GeoGridIndex, EARTH_RADIUS_KM
+
+
+def _distance(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * math.asin(math.sqrt(a))
+
+
+def _random_index(count, seed=7):
+    rng = random.Random(seed)
+    index = GeoGridIndex(cell_degrees=0.5)
+    points = {}
+    for i in range(count):
+        points[f"p{i}"] = (rng.uniform(-80, 80), rng.uniform(-180, 180))
+        index.put(f"p{i}", *points[f"p{i}"])
+    return index, points
+
+
+def test_radius_and_nearest_match_brute_force():
+    index, points = _random_index(3000)
+    rng = random.Random(11)
+    for _ in range(50):
+        lat, lng = rng.uniform(-89, 89), rng.uniform(-180, 180)
+        radius = rng.choice([50, 400, 2500])
+        expected = {pid for pid, (plat, plng) in points.items() if _distance(lat, lng, plat, plng) <= radius}
+        found = index.within(lat, lng, radius)
+        assert {pid for pid, _ in found} == expected
+        assert [d for _, d in found] == sorted(d for _, d in found)
+        
+        nearest = index.nearest(lat, lng, k=5)
+        brute = sorted(_distance(lat, lng, plat, plng) for plat, plng in points.values())[:5]
+        assert [round(d, 6) for _, d in nearest] == [round(d, 6) for d in brute]
+
+
+def test_radius_covers_antimeridian_and_poles():
+    index = GeoGridIndex(cell_degrees=1.0)
+    index.put("east", 10.0, 179.9)
+    index.put("west", 10.0, -179.9)
+    index.put("pole", 89.9, 0.0)
+    index.put("far-side", 89.9, 180.0)
+    
+    assert [pid for pid, _ in index.within(10.0, 179.95, 50)] in (["east", "west"], ["west", "east"])
+    assert {pid for pid, _ in index.within(89.95, 90.0, 50)} == {"pole", "far-side"}
+
+
+def test_box_query_and_incremental_updates():
+    index = GeoGridIndex(cell_degrees=1.0)
+    index.put("a", 28.70, 77.10)
+    index.put("b", 19.07, 72.87)
+    index.put("c", 10.0, 179.5)
+    
+    assert set(index.in_box(18.0, 70.0, 30.0, 80.0)) == {"a", "b"}
+    assert index.in_box(5.0, 170.0, 15.0, -170.0) == ["c"]
+    
+    index.put("a", 12.97, 77.59)
+    assert set(index.in_box(18.0, 70.0, 30.0, 80.0)) == {"b"}
+    index.remove("b")
+    index.remove("missing")
+    assert index.in_box(18.0, 70.0, 30.0, 80.0) == []
+    assert len(index) == 2 and "a" in index and "b" not in index
+    assert index.nearest(0.0, 0.0, k=10)[0][0] in ("a", "c") and len(index.nearest(0.0, 0.0, k=10)) == 2
+
+
+def test_ellipse_matches_brute_force():
+    index, points = _random_index(3000, seed=13)
+    rng = random.Random(17)
+    for _ in range(40):
+        a = (rng.uniform(-60, 60), rng.uniform(-180, 180))
+        b = (a[0] + rng.uniform(-15, 15), a[1] + rng.uniform(-15, 15))
+        direct = _distance(*a, *b)
+        max_length = direct + rng.choice([0, 100, 800])
+        
+        expected = {
+            pid for pid, p in points.items()
+            if _distance(*a, *p) + _distance(*p, *b) <= max_length
+        }
+        found = index.within_ellipse(*a, *b, max_length)
+        assert {pid for pid, _ in found} == expected
+        assert [length for _, length in found] == sorted(length for _, length in found)
+    
+    assert index.within_ellipse(0.0, 0.0, 0.0, 10.0, 100.0) == []
@@ -0,0 +1,84 @@
+"""
+Tests for the group commit writer
+"""
+
+import threading
+import time
+
+import pytest
+
+from storage.groupcommit import GroupCommitWriter
+
+
+class SlowStore:
+    """Records each applied batch; the first one blocks until released"""
+    
+    def __init__(self):
+        self.batches = []
+        self.release = threading.Event()
+    
+    def apply(self, writes):
+        if not self.batches:
+            self.batches.append(writes)
+            self.release.wait(5)
+            return
+        for _, _, ids, _, _ in writes:
+            if "bad" in ids:
+                raise ValueError("bad write")
+        self.batches.append(writes)
+
+
+def _submit_async(writer, record_id, errors=None):
+    def run():
+        try:
+            writer.submit("upsert", "loads", [record_id], [{"load_id": record_id}])
+        except ValueError as e:
+            errors.append((record_id, e))
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_concurrent_writes_share_a_commit():
+    store = SlowStore()
+    writer = GroupCommitWriter(store.apply)
+    first = _submit_async(writer, "load-0")
+    while not store.batches:
+        time.sleep(0.01)
+    
+    waiting = [_submit_async(writer, f"load-{i}") for i in range(1, 6)]
+    while writer.stats()['queued'] < 5:
+        time.sleep(0.01)
+    store.release.set()
+    for thread in [first] + waiting:
+        thread.join(5)
+    
+    assert len(store.batches) == 2
+    assert sorted(ids[0] for _, _, ids, _, _ in store.batches[1]) == [f"load-{i}" for i in range(1, 6)]
+    assert writer.stats() == {"commits": 2, "committed_writes": 6, "writes_per_commit": 3.0, "queued": 0}
+
+
+def test_failed_write_does_not_fail_its_batch():
+    store = SlowStore()
+    writer = GroupCommitWriter(store.apply)
+    first = _submit_async(writer, "load-0")
+    while not store.batches:
+        time.sleep(0.01)
+    
+    errors = []
+    waiting = [_submit_async(writer, record_id, errors) for record_id in ("load-1", "bad", "load-2")]
+    while writer.stats()['queued'] < 3:
+        time.sleep(0.01)
+    store.release.set()
+    for thread in [first] + waiting:
+        thread.join(5)
+    
+    assert [record_id for record_id, _ in errors] == ["bad"]
+    assert sorted(w[2][0] for batch in store.batches[1:] for w in batch) == ["load-1", "load-2"]
+
+
+def test_single_writer_sees_its_error():
+    writer = GroupCommitWriter(lambda writes: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        writer.submit("add", "loads", ["load-1"], [{}])
+    assert writer.stats()['committed_writes'] == 0
@@ -0,0 +1,83 @@
+"""
+Tests for the in-memory hot store
+"""
+
+import pytest
+
+from storage.hotstore import HotStore
+from storage.query import normalize_where
+
+
+class _Backing:
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+    
+    def persist(self, collection, ids, records, documents):
+        if self.fail:
+            raise IOError("disk full")
+        self.batches.append((collection, ids, [r['status'] for r in records], documents))
+
+
+def _store(backing, **options):
+    return HotStore(backing.persist, ["loads"], {"loads": ("status",)}, **options)
+
+
+def test_reads_come_from_memory_and_writes_coalesce():
+    backing = _Backing()
+    store = _store(backing)
+    store.load("loads", ["l1"], [{"load_id": "l1", "status": "available", "created_at": "1"}])
+    
+    store.write("loads", ["l2"], [{"load_id": "l2", "status": "available", "created_at": "2"}], ["a to b"])
+    store.write("loads", ["l2"], [{"load_id": "l2", "status": "assigned", "created_at": "2"}])
+    
+    assert store.get("loads", ["l2", "missing"])[0]['status'] == "assigned"
+    assert store.count("loads", normalize_where({"status": "available"})) == 1
+    assert [r['load_id'] for r in store.select("loads", [], order_by="-created_at")] == ["l2", "l1"]
+    assert backing.batches == []
+    
+    assert store.flush() == 1
+    assert backing.batches == [("loads", ["l2"], ["assigned"], ["a to b"])]
+    assert store.flush() == 0
+
+
+def test_durable_writes_and_failed_flush_retry():
+    backing = _Backing()
+    store = _store(backing)
+    
+    backing.fail = True
+    with pytest.raises(IOError):
+        store.write("loads", ["l1"], [{"load_id": "l1", "status": "available"}], ["x"], durable=True)
+    assert store.stats()['pending'] == 1 and store.stats()['failed_flushes'] == 1
+    assert store.stats()['last_flush_error'] == "OSError: disk full"
+    
+    backing.fail = False
+    store.write("loads", ["l2"], [{"load_id": "l2", "status": "assigned"}], ["y"], durable=True)
+    assert backing.batches == [("loads", ["l1", "l2"], ["available", "assigned"], ["x", "y"])]
+    assert store.stats()['last_flush_error'] is None
+
+
+def test_close_flushes_queued_writes():
+    backing = _Backing()
+    store = _store(backing, flush_interval=60)
+    store.start()
+    store.write("loads", ["l1"], [{"load_id": "l1", "status": "available"}], ["x"])
+    
+    store.close()
+    assert backing.batches == [("loads", ["l1"], ["available"], ["x"])]
+
+
+def test_filters_narrow_through_the_most_selective_index():
+    store = HotStore(_Backing().persist, ["allocations"], {"allocations": ("status", "vehicle_id")})
+    ids = [f"a{n}" for n in range(50)]
+    store.load("allocations", ids, [
+        {"vehicle_id": "truck-1" if n < 2 else f"truck-{n}", "status": "cancelled" if n == 1 else "active"}
+        for n in range(50)
+    ])
+    looked_up = []
+    lookup = store.indexes.lookup
+    store.indexes.lookup = lambda collection, field, value: looked_up.append(field) or lookup(collection, field, value)
+    
+    where = normalize_where({"status": "active", "vehicle_id": "truck-1"})
+    assert store.select("allocations", where) == [{"vehicle_id": "truck-1", "status": "active"}]
+    assert looked_up == ["vehicle_id"]
@@ -0,0 +1,146 @@
+"""
+Tests for the hub-to-hub distance table
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from config import settings
+from services.hub_table import HubDistanceTable
+from services.math_engine import math_engine
+from services.real_world_data import real_world_data
+from services.road_network import RoadNetwork
+
+# Town centres roughly 90-100 km apart, joined by highways
+TOWNS = [("Azadpur", 28.60, 77.20), ("Eastgate", 28.60, 78.20), ("Northgate", 29.40, 77.20)]
+STEP = 0.002
+
+
+def _towns_network(size=5, seed=5):
+    """A small street grid around each town centre and two-way highways between the centres"""
+    rng = random.Random(seed)
+    lats, lngs, edges, centres = [], [], [], []
+    for _, lat, lng in TOWNS:
+        first = len(lats)
+        for row in range(size):
+            for column in range(size):
+                lats.append(lat + (row - size // 2) * STEP)
+                lngs.append(lng + (column - size // 2) * STEP)
+        for row in range(size):
+            for column in range(size):
+                node = first + row * size + column
+                for neighbour in ((node + 1) if column + 1 < size else None, (node + size) if row + 1 < size else None):
+                    if neighbour is not None:
+                        # Lengths below the straight line are raised to it
+                        edges.append((node, neighbour, rng.uniform(0.2, 0.35)))
+                        edges.append((neighbour, node, rng.uniform(0.2, 0.35)))
+        centres.append(first + (size // 2) * size + size // 2)
+    for a, b in ((0, 1), (0, 2)):
+        edges.append((centres[a], centres[b], 120.0))
+        edges.append((centres[b], centres[a], 121.0))
+    return RoadNetwork.from_edges(lats, lngs, edges), centres
+
+
+def _hubs():
+    return [{"name": name, "city": name, "lat": lat, "lng": lng} for name, lat, lng in TOWNS]
+
+
+def _near(rng, town, spread=0.004):
+    _, lat, lng = TOWNS[town]
+    return lat + rng.uniform(-spread, spread), lng + rng.uniform(-spread, spread)
+
+
+@pytest.fixture(scope="module")
+def network():
+    return _towns_network()[0]
+
+
+@pytest.fixture
+def engine_table(network, monkeypatch):
+    """The table is opt-in and sits in front of a road network; enable both"""
+    monkeypatch.setattr(settings, "hub_snap_km", 0.5)
+    monkeypatch.setattr(real_world_data, "hubs", _hubs)
+    math_engine.set_distance_provider(network)
+    yield math_engine.hub_table
+    monkeypatch.undo()
+    math_engine.set_distance_provider(None)
+
+
+def test_hub_adjacent_queries_answered_within_bound(network):
+    table = HubDistanceTable.build(_hubs(), network, snap_km=0.5)
+    assert len(table) == 3 and len(table.member_nodes) > 3
+    
+    # Exact between the hubs' own road nodes
+    answer = table.lookup(28.60, 77.20, 28.60, 78.20)
+    assert (answer["from_hub"], answer["to_hub"], answer["error_bound_km"]) == ("Azadpur", "Eastgate", 0.0)
+    assert answer["distance_km"] == network.distance(28.60, 77.20, 28.60, 78.20)
+    
+    rng = random.Random(2)
+    answered = 0
+    for _ in range(200):
+        start, end = _near(rng, 0), _near(rng, rng.choice([1, 2]))
+        answer = table.lookup(*start, *end)
+        if answer is None:
+            continue
+        answered += 1
+        assert abs(answer["distance_km"] - network.distance(*start, *end)) <= answer["error_bound_km"] + 1e-9
+    assert answered > 100
+    
+    # Too close together for the bound, or on a node no hub owns: left to the network
+    start, end = _near(rng, 0), _near(rng, 0)
+    assert np.isnan(table.pairwise(np.array([start[0]]), np.array([start[1]]), np.array([end[0]]), np.array([end[1]]))[0])
+    assert table.lookup(28.60 + 2 * STEP, 77.20 + 2 * STEP, 28.60, 78.20) is None
+
+
+def test_engine_paths_match_scalar_with_hub_answers(engine_table, network):
+    assert engine_table is not None and engine_table.max_error_km > 0
+    rng = random.Random(7)
+    points = [_near(rng, town) for town in (0, 1, 2) for _ in range(6)] + [(19.07, 72.87)]
+    lats, lngs = np.array([p[0] for p in points]), np.array([p[1] for p in points])
+    
+    matrix = math_engine.distance_matrix((lats, lngs), (lats, lngs))
+    for i in range(len(lats)):
+        for j in range(len(lats)):
+            assert matrix[i, j] == math_engine._road_distance(lats[i], lngs[i], lats[j], lngs[j])
+    assert np.array_equal(math_engine.pairwise_distances((lats, lngs), (lats[::-1], lngs[::-1])),
+                          matrix[np.arange(len(lats)), np.arange(len(lats))[::-1]])
+    
+    # Table answers are used, and spatial prefilters stay wide enough for them
+    answered = ~np.isnan(engine_table.matrix(lats, lngs, lats, lngs))
+    exact = np.round(network.matrix(lats, lngs, lats, lngs), 2)
+    assert answered.any() and not np.array_equal(matrix[answered], exact[answered])
+    straight = np.array([[math_engine._haversine_road_distance(a, b, c, d) / 1.3
+                          for c, d in zip(lats, lngs)] for a, b in zip(lats, lngs)])
+    assert np.all(straight[answered] <= [math_engine.search_radius_km(km) for km in matrix[answered]])
+
+
+def test_table_persisted_and_reused(tmp_path, monkeypatch, network):
+    path = str(tmp_path / "hubs.npz")
+    monkeypatch.setattr(settings, "hub_table_path", path)
+    monkeypatch.setattr(settings, "hub_snap_km", 0.5)
+    monkeypatch.setattr(real_world_data, "hubs", _hubs)
+    try:
+        math_engine.set_distance_provider(network)
+        stored = HubDistanceTable.load(path, network)
+        assert stored.matches(_hubs(), f"{network.fingerprint()}/0.5")
+        assert not stored.matches(_hubs(), f"{_towns_network(seed=6)[0].fingerprint()}/0.5")
+        assert np.array_equal(stored.km, math_engine.hub_table.km)
+        
+        # A current stored table is read rather than measured again
+        stored.km[0, 1] += 1.0
+        stored.save(path)
+        math_engine.set_distance_provider(network)
+        assert math_engine.hub_table.km[0, 1] == stored.km[0, 1]
+    finally:
+        monkeypatch.undo()
+        math_engine.set_distance_provider(None)
+
+
+def test_table_unused_without_road_network(monkeypatch):
+    """Haversine estimates are cheaper than a table lookup"""
+    monkeypatch.setattr(settings, "hub_snap_km", 0.5)
+    math_engine.set_distance_provider(None)
+    assert math_engine.hub_table is None
+    assert math_engine.search_radius_km(100) == pytest.approx(100.005 / 1.3, abs=1e-5)
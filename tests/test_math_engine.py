@@ -0,0 +1,176 @@
+"""
+Tests for the vectorized distance functions of the math engine
+"""
+
+import numpy as np
+
+from models.domain import Coordinate
+from models.records import LoadTable
+from services.math_engine import math_engine
+
+
+def _random_points(rng, count):
+    return np.column_stack([rng.uniform(8, 35, count), rng.uniform(68, 97, count)])
+
+
+def _scalar(a, b):
+    return math_engine.calculate_distance(Coordinate(lat=a[0], lng=a[1]), Coordinate(lat=b[0], lng=b[1]))
+
+
+def test_distance_matrix_reproduces_scalar_distances():
+    rng = np.random.default_rng(7)
+    origins, destinations = _random_points(rng, 40), _random_points(rng, 60)
+    
+    matrix = math_engine.distance_matrix(origins, destinations)
+    
+    assert matrix.shape == (40, 60)
+    expected = [[_scalar(a, b) for b in destinations] for a in origins]
+    assert matrix.tolist() == expected
+
+
+def test_midpoint_distances_round_like_the_scalar_path():
+    """Points chosen so the unrounded distance sits on a rounding midpoint"""
+    rng = np.random.default_rng(11)
+    origin = (19.07, 72.87)
+    targets = _random_points(rng, 20000)
+    
+    lat1, lng1 = np.radians(origin)
+    lat2, lng2 = np.radians(targets[:, 0]), np.radians(targets[:, 1])
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    scaled = 6371.0 * 2 * np.arcsin(np.sqrt(a)) * 1.3 * 100
+    near_midpoint = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-3
+    targets = targets[near_midpoint]
+    
+    distances = math_engine.distances_from(origin, targets)
+    assert len(targets) > 0
+    assert distances.tolist() == [_scalar(origin, t) for t in targets]
+
+
+def test_distances_from_accepts_coordinates_pairs_and_load_tables():
+    table = LoadTable.from_records([
+        {"load_id": "load-1", "vendor_id": "v", "weight_kg": 1, "pickup_lat": 28.70, "pickup_lng": 77.10,
+         "destination_lat": 26.91, "destination_lng": 75.78, "price_offered": 1},
+        {"load_id": "load-2", "vendor_id": "v", "weight_kg": 1, "pickup_lat": 19.07, "pickup_lng": 72.87,
+         "destination_lat": 18.52, "destination_lng": 73.85, "price_offered": 1},
+    ])
+    point = Coordinate(lat=28.61, lng=77.20)
+    
+    from_table = math_engine.distances_from(point, table)
+    from_pairs = math_engine.distances_from((28.61, 77.20), (table.pickup_lat, table.pickup_lng))
+    
+    assert from_table.tolist() == from_pairs.tolist()
+    assert from_table.tolist() == [_scalar((28.61, 77.20), (28.70, 77.10)), _scalar((28.61, 77.20), (19.07, 72.87))]
+    assert math_engine.distances_from(point, np.empty((0, 2))).shape == (0,)
+
+
+def _random_loads(rng, count):
+    return LoadTable.from_records([
+        {"load_id": f"load-{i}", "vendor_id": "v", "weight_kg": 1,
+         "pickup_lat": rng.uniform(8, 35), "pickup_lng": rng.uniform(68, 97),
+         "destination_lat": rng.uniform(8, 35), "destination_lng": rng.uniform(68, 97),
+         "price_offered": round(rng.uniform(500, 50000), 2)}
+        for i in range(count)
+    ])
+
+
+def test_full_profitability_batch_matches_scalar():
+    rng = np.random.default_rng(3)
+    loads = _random_loads(rng, 300)
+    current, destination = Coordinate(lat=19.07, lng=72.87), Coordinate(lat=28.61, lng=77.20)
+    fuel_rates = rng.uniform(0.2, 0.5, len(loads))
+    
+    batch = math_engine.calculate_full_profitability_batch(current, destination, loads, fuel_consumption_rate=fuel_rates)
+    
+    for i in range(len(loads)):
+        load = loads.row(i)
+        scalar = math_engine.calculate_full_profitability(
+            current, destination,
+            Coordinate(lat=load.pickup_lat, lng=load.pickup_lng),
+            Coordinate(lat=load.destination_lat, lng=load.destination_lng),
+            load.price_offered, fuel_consumption_rate=fuel_rates[i]
+        )
+        assert {name: float(values[i]) for name, values in batch.items()} == scalar
+
+
+def test_route_metrics_and_profitability_batch_match_scalar():
+    """Same arithmetic as RouteOptimizerAgent.calculate_route_metrics and the financial analyzer tool"""
+    rng = np.random.default_rng(5)
+    loads = _random_loads(rng, 200)
+    current, destination = Coordinate(lat=22.57, lng=88.36), Coordinate(lat=13.08, lng=80.27)
+    
+    metrics = math_engine.calculate_route_metrics_batch(current, destination, loads)
+    profitability = math_engine.calculate_profitability_batch(
+        metrics["extra_distance_km"], metrics["extra_time_hours"], loads.price
+    )
+    
+    direct = math_engine.calculate_distance(current, destination)
+    direct_time = math_engine.calculate_estimated_time(direct)
+    for i in range(len(loads)):
+        load = loads.row(i)
+        pickup = Coordinate(lat=load.pickup_lat, lng=load.pickup_lng)
+        drop = Coordinate(lat=load.destination_lat, lng=load.destination_lng)
+        detour = (math_engine.calculate_distance(current, pickup) + math_engine.calculate_distance(pickup, drop)
+                  + math_engine.calculate_distance(drop, destination))
+        extra_time = math_engine.calculate_estimated_time(detour) - direct_time
+        assert metrics["detour_distance_km"][i] == detour
+        assert metrics["extra_distance_km"][i] == detour - direct
+        assert metrics["extra_time_hours"][i] == extra_time
+        
+        fuel_cost = math_engine.calculate_fuel_cost(detour - direct)
+        time_cost = math_engine.calculate_time_cost(extra_time)
+        net_profit = math_engine.calculate_net_profit(load.price_offered, fuel_cost, time_cost)
+        assert profitability["fuel_cost"][i] == fuel_cost
+        assert profitability["time_cost"][i] == time_cost
+        assert profitability["net_profit"][i] == net_profit
+        assert profitability["profitability_score"][i] == math_engine.calculate_profitability_score(net_profit, extra_time)
+
+
+def test_profitability_batch_scores_zero_time_as_zero():
+    result = math_engine.calculate_profitability_batch(np.array([0.0, 60.0]), np.array([0.0, 1.0]), np.array([100.0, 100.0]))
+    assert result["profitability_score"].tolist() == [0.0, 100.0 - 31.5 - 25.0]
+
+
+def test_corridor_length_bounds_every_matching_load():
+    """Loads within the detour limit always have both points inside the corridor"""
+    rng = np.random.default_rng(9)
+    loads = _random_loads(rng, 2000)
+    current, destination = (19.07, 72.87), (28.61, 77.20)
+    max_detour = 400.0
+    
+    extra = math_engine.calculate_route_metrics_batch(current, destination, loads)["extra_distance_km"]
+    matching = np.flatnonzero(extra <= max_detour)
+    assert matching.size
+    
+    def straight(point, lats, lngs):
+        return math_engine.distances_from(point, (lats, lngs)) / math_engine.ROAD_ADJUSTMENT_FACTOR
+    
+    bound = math_engine.corridor_length_km(current, destination, max_detour)
+    for lats, lngs in ((loads.pickup_lat, loads.pickup_lng), (loads.destination_lat, loads.destination_lng)):
+        lengths = straight(current, lats, lngs) + straight(destination, lats, lngs)
+        # Rounded road distances understate straight ones by at most 0.005 km each
+        assert np.all(lengths[matching] - 0.01 / math_engine.ROAD_ADJUSTMENT_FACTOR <= bound)
+
+
+def test_distance_caches_reuse_measurements():
+    math_engine.set_distance_provider(None)
+    before = math_engine.cache_stats()
+    
+    first = math_engine._road_distance(28.6139, 77.2090, 19.0760, 72.8777)
+    again = math_engine.calculate_distance(Coordinate(lat=28.6139, lng=77.2090), Coordinate(lat=19.0760, lng=72.8777))
+    assert first == again == math_engine._measure_road_distance(28.6139, 77.2090, 19.0760, 72.8777)
+    assert math_engine.cache_stats()['distances']['hits'] == before['distances']['hits'] + 1
+    
+    loads = _random_loads(np.random.default_rng(21), 50)
+    expected = math_engine.pairwise_distances(
+        (loads.pickup_lat, loads.pickup_lng), (loads.destination_lat, loads.destination_lng)
+    )
+    assert np.array_equal(math_engine.load_leg_distances(loads), expected)
+    hits = math_engine.cache_stats()['load_legs']['hits']
+    assert np.array_equal(math_engine.load_leg_distances(loads), expected)
+    assert math_engine.cache_stats()['load_legs']['hits'] == hits + 50
+    
+    # A load whose pickup moved is measured again
+    loads.pickup_lat[0] += 1.0
+    assert math_engine.load_leg_distances(loads)[0] == math_engine._road_distance(
+        loads.pickup_lat[0], loads.pickup_lng[0], loads.destination_lat[0], loads.destination_lng[0]
+    )
@@ -0,0 +1,56 @@
+"""
+Tests for the db.find() query compiler and pagination cursors
+"""
+
+import pytest
+
+from storage.query import (
+    normalize_where, compile_where, matches, sort_records,
+    sort_key, encode_cursor, decode_cursor
+)
+
+
+def test_compile_pushes_equality_and_numeric_ranges():
+    conditions = normalize_where({
+        "driver_id": "d1",
+        "amount": {"$gte": 10},
+        "timestamp": {"$prefix": "2024-01-05"}
+    })
+    where, residual = compile_where(conditions)
+    
+    assert where == {"$and": [{"driver_id": {"$eq": "d1"}}, {"amount": {"$gte": 10}}]}
+    assert residual == [("timestamp", "$prefix", "2024-01-05")]
+
+
+def test_string_ranges_stay_residual():
+    where, residual = compile_where(normalize_where({"created_at": {"$gt": "2024-01-01"}}))
+    
+    assert where is None
+    assert matches({"created_at": "2024-02-01"}, residual)
+    assert not matches({"created_at": "2023-12-31"}, residual)
+    assert not matches({}, residual)
+
+
+def test_unknown_operator_rejected():
+    with pytest.raises(ValueError):
+        normalize_where({"status": {"$regex": "act.*"}})
+
+
+def test_sort_records_multiple_keys_missing_last():
+    records = [
+        {"id": 1, "status": "a", "price": 5},
+        {"id": 2, "status": "b", "price": 9},
+        {"id": 3, "status": "a", "price": 7},
+        {"id": 4, "status": "a"},
+    ]
+    ordered = sort_records(records, ["status", "-price"])
+    assert [r["id"] for r in ordered] == [3, 1, 4, 2]
+
+
+def test_cursor_round_trip():
+    key = sort_key("2024-05-01T10:00:00", "load-1")
+    assert decode_cursor(encode_cursor(key)) == key
+    assert sort_key(None, "a") > sort_key("z", "b")
+    
+    with pytest.raises(ValueError):
+        decode_cursor("bm90IGpzb24")
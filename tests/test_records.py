@@ -0,0 +1,73 @@
+"""
+Tests for the compact load and truck records
+"""
+
+import numpy as np
+import pytest
+
+from models.domain import Coordinate
+from models.records import LatLng, LoadTable, LoadRecord, TruckRecord, STATUS_CODES, lat_lng
+from services.math_engine import math_engine
+
+
+def _load(load_id, pickup_lat, pickup_lng, status="available"):
+    return {
+        "load_id": load_id, "vendor_id": "vendor-1", "weight_kg": 1000, "status": status,
+        "pickup_lat": pickup_lat, "pickup_lng": pickup_lng, "pickup_address": f"{load_id} pickup",
+        "destination_lat": 19.07, "destination_lng": 72.87, "destination_address": "Mumbai",
+        "price_offered": 15000, "currency": "INR", "created_at": "2024-03-01T10:00:00"
+    }
+
+
+def test_load_table_columns_and_subsets():
+    table = LoadTable.from_records([
+        _load("a", 28.70, 77.10), _load("b", 26.91, 75.78, "assigned"), _load("c", 12.97, 77.59)
+    ])
+    
+    assert len(table) == 3
+    assert table.pickup_lat.dtype == np.float64
+    assert list(table.status) == [STATUS_CODES["available"], STATUS_CODES["assigned"], STATUS_CODES["available"]]
+    
+    available = table.take(table.status == STATUS_CODES["available"])
+    assert available.ids == ["a", "c"]
+    
+    row = table.row(1)
+    assert isinstance(row, LoadRecord) and row.status == "assigned"
+    assert row.to_match(12.5)['pickup_location'] == {"lat": 26.91, "lng": 75.78, "address": "b pickup"}
+    assert not hasattr(row, "__dict__")
+    
+    empty = LoadTable.from_records([])
+    assert len(empty) == 0 and empty.price.shape == (0,)
+
+
+def test_vectorized_distances_match_scalar_formula():
+    table = LoadTable.from_records([_load(str(i), 8 + i * 0.37, 68 + i * 0.41) for i in range(60)])
+    origin = Coordinate(lat=28.61, lng=77.20)
+    
+    distances = math_engine.distances_from(origin, table)
+    expected = [
+        math_engine.calculate_distance(origin, Coordinate(lat=lat, lng=lng))
+        for lat, lng in zip(table.pickup_lat, table.pickup_lng)
+    ]
+    assert distances == pytest.approx(expected, abs=0.011)
+
+
+def test_truck_record_defaults():
+    truck = TruckRecord.from_metadata({"truck_id": "t1", "owner_id": "o1"})
+    assert (truck.license_plate, truck.status, truck.fuel_consumption_rate) == ("Unknown", "idle", 0.35)
+
+
+def test_lat_lng_points_interchangeable_with_coordinates():
+    point = LatLng(19.076, 72.8777, "Mumbai")
+    assert tuple(point) == (19.076, 72.8777)
+    assert point == LatLng(19.076, 72.8777, "Mumbai") != LatLng(19.076, 72.8777)
+    assert not hasattr(point, "__dict__")
+    
+    coordinate = Coordinate(lat=19.076, lng=72.8777)
+    for form in (point, coordinate, (19.076, 72.8777), {"lat": 19.076, "lng": 72.8777}, [19.076, 72.8777]):
+        assert lat_lng(form) == (19.076, 72.8777)
+    
+    delhi = Coordinate(lat=28.6139, lng=77.2090)
+    expected = math_engine.calculate_distance(coordinate, delhi)
+    assert math_engine.calculate_distance(point, (28.6139, 77.2090)) == expected
+    assert math_engine.calculate_distance({"lat": 19.076, "lng": 72.8777}, LatLng(28.6139, 77.2090)) == expected
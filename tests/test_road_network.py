@@ -0,0 +1,134 @@
+"""
+Tests for the road network distance provider
+"""
+
+import heapq
+import math
+import random
+
+import numpy as np
+import pytest
+
+from services.math_engine import math_engine
+from services.road_network import RoadNetwork, load_road_network
+
+
+def _grid_network(size=8, seed=3):
+    """Square street grid around Delhi with random lengths and some one-way streets"""
+    rng = random.Random(seed)
+    lats, lngs, edges = [], [], []
+    for row in range(size):
+        for column in range(size):
+            lats.append(28.5 + row * 0.02)
+            lngs.append(77.0 + column * 0.02)
+    for row in range(size):
+        for column in range(size):
+            node = row * size + column
+            for neighbour in ((node + 1) if column + 1 < size else None, (node + size) if row + 1 < size else None):
+                if neighbour is None:
+                    continue
+                km = rng.uniform(2.3, 4.0)
+                oneway = rng.random() < 0.2
+                edges.append((node, neighbour, km))
+                if not oneway:
+                    edges.append((neighbour, node, km * rng.uniform(1.0, 1.2)))
+    return lats, lngs, edges
+
+
+def _dijkstra(node_count, edges, source):
+    adjacency = [[] for _ in range(node_count)]
+    for u, v, km in edges:
+        adjacency[u].append((v, km))
+    distances = [math.inf] * node_count
+    distances[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        km, u = heapq.heappop(heap)
+        if km > distances[u]:
+            continue
+        for v, length in adjacency[u]:
+            if km + length < distances[v]:
+                distances[v] = km + length
+                heapq.heappush(heap, (km + length, v))
+    return distances
+
+
+@pytest.fixture(scope="module")
+def grid():
+    lats, lngs, edges = _grid_network()
+    return lats, lngs, edges, RoadNetwork.from_edges(lats, lngs, edges, max_snap_km=2.0)
+
+
+def test_contracted_distances_match_dijkstra(grid):
+    lats, lngs, edges, network = grid
+    lats, lngs = np.array(lats), np.array(lngs)
+    matrix = network.matrix(lats, lngs, lats, lngs)
+    
+    for source in range(len(lats)):
+        expected = _dijkstra(len(lats), edges, source)
+        for target in range(len(lats)):
+            if math.isinf(expected[target]):
+                assert np.isnan(matrix[source, target])
+            else:
+                assert matrix[source, target] == pytest.approx(expected[target], abs=1e-9)
+    
+    pairs = np.random.default_rng(1).integers(0, len(lats), size=(200, 2))
+    pairwise = network.pairwise(lats[pairs[:, 0]], lngs[pairs[:, 0]], lats[pairs[:, 1]], lngs[pairs[:, 1]])
+    assert np.array_equal(pairwise, matrix[pairs[:, 0], pairs[:, 1]], equal_nan=True)
+
+
+def test_snapping_and_unroutable_points(grid):
+    lats, lngs, _, network = grid
+    node, km = network.snap(lats[9] + 0.001, lngs[9])
+    assert node == 9 and km == pytest.approx(0.111, abs=0.001)
+    assert network.snap(20.0, 70.0) is None
+    
+    routed = network.distance(lats[0] + 0.001, lngs[0], lats[10], lngs[10])
+    assert routed == pytest.approx(km + network.distance(lats[0], lngs[0], lats[10], lngs[10]))
+    assert network.distance(lats[0], lngs[0], 20.0, 70.0) is None
+
+
+def test_save_load_and_osm_extract(tmp_path, grid):
+    lats, lngs, _, network = grid
+    path = str(tmp_path / "network.npz")
+    network.save(path)
+    loaded = load_road_network(path, max_snap_km=2.0)
+    points = np.array(lats[::5]), np.array(lngs[::5])
+    assert np.array_equal(loaded.matrix(*points, *points), network.matrix(*points, *points), equal_nan=True)
+    
+    osm = tmp_path / "extract.osm"
+    osm.write_text("""<?xml version="1.0"?>
+<osm version="0.6">
+  <node id="1" lat="28.60" lon="77.20"/>
+  <node id="2" lat="28.61" lon="77.20"/>
+  <node id="3" lat="28.61" lon="77.21"/>
+  <node id="4" lat="28.70" lon="77.30"/>
+  <way id="10"><nd ref="1"/><nd ref="2"/><nd ref="3"/><tag k="highway" v="primary"/></way>
+  <way id="11"><nd ref="3"/><nd ref="1"/><tag k="highway" v="residential"/><tag k="oneway" v="yes"/></way>
+  <way id="12"><nd ref="3"/><nd ref="4"/><tag k="highway" v="footway"/></way>
+</osm>
+""")
+    extract = load_road_network(str(osm))
+    assert len(extract) == 3
+    # 1 -> 3 has to go round through 2; 3 -> 1 takes the one-way street back
+    assert extract.distance(28.60, 77.20, 28.61, 77.21) > extract.distance(28.61, 77.21, 28.60, 77.20)
+
+
+def test_math_engine_uses_provider_with_haversine_fallback(grid):
+    lats, lngs, _, network = grid
+    haversine = math_engine.distances_from((lats[0], lngs[0]), (np.array([lats[63], 19.07]), np.array([lngs[63], 72.87])))
+    math_engine.set_distance_provider(network)
+    try:
+        origins = np.column_stack([lats[::3] + [19.07], lngs[::3] + [72.87]])
+        matrix = math_engine.distance_matrix(origins, origins)
+        for i, (lat1, lng1) in enumerate(origins):
+            for j, (lat2, lng2) in enumerate(origins):
+                assert matrix[i, j] == math_engine._road_distance(lat1, lng1, lat2, lng2)
+        assert np.array_equal(math_engine.pairwise_distances(origins, origins[::-1]), matrix[np.arange(len(origins)), np.arange(len(origins))[::-1]])
+        
+        routed = math_engine.distances_from((lats[0], lngs[0]), (np.array([lats[63], 19.07]), np.array([lngs[63], 72.87])))
+        assert routed[0] == round(network.distance(lats[0], lngs[0], lats[63], lngs[63]), 2) != haversine[0]
+        assert routed[1] == haversine[1]
+        assert math_engine.search_radius_km(100) > 100 / math_engine.ROAD_ADJUSTMENT_FACTOR + 1
+    finally:
+        math_engine.set_distance_provider(None)
@@ -0,0 +1,60 @@
+"""
+Tests for the SQLite storage backend
+"""
+
+import pytest
+
+from storage.sqlite_backend import SQLiteDatabase
+
+
+@pytest.fixture
+def database(tmp_path):
+    db = SQLiteDatabase(
+        database_path=str(tmp_path / "test.db"),
+        track_directory=str(tmp_path / "tracks")
+    )
+    yield db
+    db.close()
+
+
+def test_wal_mode_and_typed_columns(database):
+    assert database._connection().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    
+    notification = database.create_notification("driver-1", "allocation", "Title", "Body")
+    stored = database.get_notification(notification['notification_id'])
+    assert stored['is_read'] is False
+    assert stored == notification
+
+
+def test_unknown_fields_round_trip_through_extra(database):
+    truck = database.create_truck("owner-1", "DL-01")
+    database.update_truck(truck['truck_id'], {"odometer_km": 1200, "tags": "reefer"})
+    
+    assert database.get_truck(truck['truck_id'])['odometer_km'] == 1200
+    database.cache.clear()
+    assert database.get_truck(truck['truck_id'])['tags'] == "reefer"
+    assert [t['truck_id'] for t in database.find("trucks", where={"odometer_km": {"$gte": 1000}})] == [truck['truck_id']]
+
+
+def test_filters_use_composite_indexes(database):
+    plan = database._connection().execute(
+        'EXPLAIN QUERY PLAN SELECT id FROM "loads" WHERE "status" = ? ORDER BY "created_at"',
+        ["available"]
+    ).fetchall()
+    assert "idx_loads_status_created_at" in " ".join(row[-1] for row in plan)
+
+
+def test_operators_match_python_semantics(database):
+    for status in ("idle", "allocated", "deadheading"):
+        database.update_truck(database.create_truck("owner-1", status)['truck_id'], {"status": status})
+    
+    plates = lambda where: sorted(t['license_plate'] for t in database.find("trucks", where=where))
+    assert plates({"status": {"$nin": ["allocated", "deadheading"]}}) == ["idle"]
+    assert plates({"status": {"$in": []}}) == []
+    assert plates({"status": {"$ne": "idle"}}) == ["allocated", "deadheading"]
+    assert plates({"license_plate": {"$prefix": "dead"}}) == ["deadheading"]
+    assert database.count_by_field("trucks", "owner_id", "owner-1") == 3
+    
+    newest_first, cursor = database.page("trucks", order_by="-created_at", limit=2)
+    rest, end = database.page("trucks", order_by="-created_at", limit=2, cursor=cursor)
+    assert len(newest_first) == 2 and len(rest) == 1 and end is None
@@ -0,0 +1,155 @@
+"""
+Tests for the storage server and its client
+"""
+
+import os
+import socket
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from services.scheduler_lock import SchedulerLock
+from storage.base import ConflictError
+from storage.changefeed import ChangeFeedGap
+from storage.client import RemoteDatabase
+from storage.server import StorageServer
+from storage.wire import recv_frame, send_frame
+from storage.sqlite_backend import SQLiteDatabase
+
+
+def _start_server(tmp_path, socket_path):
+    database = SQLiteDatabase(
+        database_path=str(tmp_path / "sqlite" / "test.db"),
+        track_directory=str(tmp_path / "tracks"),
+        archive_directory=str(tmp_path / "archive")
+    )
+    server = StorageServer(database, socket_path)
+    server.start()
+    return server
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return str(tmp_path / "storage.sock")
+
+
+@pytest.fixture
+def server(tmp_path, socket_path):
+    server = _start_server(tmp_path, socket_path)
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def client(server, socket_path):
+    client = RemoteDatabase(socket_path, pool_size=2, timeout=5)
+    yield client
+    client.close()
+
+
+def test_calls_round_trip(client):
+    """Writes and reads through the client behave like the local database"""
+    load = client.create_load(
+        vendor_id="vendor-1", weight_kg=1000, pickup_lat=28.70, pickup_lng=77.10,
+        pickup_address="Azadpur", destination_lat=26.91, destination_lng=75.78,
+        destination_address="Jaipur", price_offered=15000
+    )
+    
+    assert client.get_load(load['load_id']) == load
+    assert [l['load_id'] for l in client.find("loads", where={"status": "available"})] == [load['load_id']]
+    assert client.changes.sequence == 1
+    assert [e.record_id for e in client.changes.since(0)] == [load['load_id']]
+
+
+def test_server_exceptions_reach_the_client(client):
+    with pytest.raises(ValueError):
+        client.find("loads", where={"status": {"$regex": "a.*"}})
+    with pytest.raises(ChangeFeedGap):
+        client.changes.since(-5)
+    
+    load = client.create_load(
+        vendor_id="vendor-1", weight_kg=1000, pickup_lat=28.70, pickup_lng=77.10,
+        pickup_address="Azadpur", destination_lat=26.91, destination_lng=75.78,
+        destination_address="Jaipur", price_offered=15000
+    )
+    client.accept_load(load['load_id'], "trip-1", "driver-1")
+    with pytest.raises(ConflictError) as conflict:
+        client.accept_load(load['load_id'], "trip-2", "driver-2")
+    assert conflict.value.actual == "assigned"
+
+
+def test_private_and_blocked_methods_are_refused(client):
+    with pytest.raises(AttributeError):
+        client._call("_store_clear", (("loads",),), {})
+    with pytest.raises(AttributeError):
+        client._call("close", (), {})
+    with pytest.raises(AttributeError):
+        client._call("tracks.root.upper", (), {})
+
+
+def test_pooled_connections_survive_server_restart(tmp_path, socket_path):
+    server = _start_server(tmp_path, socket_path)
+    client = RemoteDatabase(socket_path, pool_size=2, timeout=5)
+    try:
+        assert client.get_unread_count("driver-1") == 0
+        server.stop()
+        server = _start_server(tmp_path, socket_path)
+        assert client.get_unread_count("driver-1") == 0
+    finally:
+        client.close()
+        server.stop()
+
+
+def test_requests_are_not_resent_after_the_server_received_them(socket_path):
+    """A write whose response is lost raises instead of running twice"""
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(socket_path)
+    listener.listen(1)
+    received = []
+    
+    def serve():
+        connection, _ = listener.accept()
+        received.append(recv_frame(connection))
+        send_frame(connection, (True, 0))
+        # Read the second request, then drop the connection without answering
+        received.append(recv_frame(connection))
+        connection.close()
+    
+    thread = threading.Thread(target=serve, daemon=True)
+    thread.start()
+    client = RemoteDatabase(socket_path, pool_size=1, timeout=5)
+    try:
+        assert client.get_unread_count("driver-1") == 0
+        with pytest.raises(ConnectionError):
+            client.create_load(vendor_id="vendor-1", weight_kg=1000)
+        thread.join(timeout=5)
+        assert [request[0] for request in received] == ["get_unread_count", "create_load"]
+    finally:
+        client.close()
+        listener.close()
+
+
+def test_server_import_does_not_open_global_database(tmp_path):
+    """The storage server opens its own database; importing create_database must not open another"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, CHROMA_PERSIST_DIRECTORY=str(tmp_path / "chroma"), STORAGE_SERVER_SOCKET="")
+    check = (
+        "import db_chromadb\n"
+        "from db_chromadb import create_database\n"
+        "assert 'db' not in vars(db_chromadb)\n"
+        "from db_chromadb import db\n"
+        "assert db is db_chromadb.db\n"
+    )
+    subprocess.run([sys.executable, "-c", check], cwd=root, env=env, check=True)
+
+
+def test_scheduler_lock_admits_one_holder(tmp_path):
+    path = str(tmp_path / "scheduler.lock")
+    first, second = SchedulerLock(path), SchedulerLock(path)
+    
+    assert first.acquire() is True
+    assert first.acquire() is True
+    assert second.acquire() is False
+    assert second.holder() is not None
@@ -0,0 +1,63 @@
+"""
+Tests for the columnar GPS track store
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from storage.timeseries import TrackStore, to_epoch_ms
+
+
+def test_append_and_range_scan(tmp_path):
+    store = TrackStore(str(tmp_path))
+    base = datetime(2024, 5, 1, 23, 59, 0)
+    for minute in range(4):
+        store.append("truck-1", 28.0 + minute, 77.0, 5.0, base + timedelta(minutes=minute))
+    
+    track = store.read("truck-1")
+    assert track["lat"].tolist() == [28.0, 29.0, 30.0, 31.0]
+    assert sorted(p for p in store._partitions("truck-1")) == ["20240501", "20240502"]
+    
+    window = store.read("truck-1", start=base + timedelta(minutes=1), end=base + timedelta(minutes=3))
+    assert window["lat"].tolist() == [29.0, 30.0]
+    assert window["t"].dtype == np.int64
+
+
+def test_out_of_order_readings_compacted(tmp_path):
+    store = TrackStore(str(tmp_path))
+    t0 = datetime(2024, 5, 1, 12, 0, 0)
+    store.append("truck-1", 1.0, 1.0, 1.0, t0 + timedelta(seconds=10))
+    store.append("truck-1", 2.0, 2.0, 2.0, t0)
+    store.append("truck-1", 3.0, 3.0, 3.0, t0)
+    
+    assert store.read("truck-1")["t"].tolist() == sorted(store.read("truck-1")["t"].tolist())
+    assert store.compact() == 1
+    
+    track = store.read_partition("truck-1", "20240501")
+    assert track["t"].tolist() == [to_epoch_ms(t0), to_epoch_ms(t0 + timedelta(seconds=10))]
+    assert track["lat"].tolist() == [3.0, 1.0]
+    assert store.compact() == 0
+
+
+def test_retention_drops_old_partitions(tmp_path):
+    store = TrackStore(str(tmp_path))
+    now = datetime(2024, 5, 20, 8, 0, 0)
+    store.append("truck-1", 1.0, 1.0, 1.0, now - timedelta(days=30))
+    store.append("truck-1", 2.0, 2.0, 2.0, now)
+    
+    store.retention_days = 7
+    assert store.apply_retention(now) == 1
+    assert store.read("truck-1")["lat"].tolist() == [2.0]
+
+
+def test_interrupted_append_is_realigned(tmp_path):
+    store = TrackStore(str(tmp_path))
+    t0 = datetime(2024, 5, 1, 12, 0, 0)
+    store.append("truck-1", 1.0, 1.0, 1.0, t0)
+    partition = tmp_path / "truck-1" / "20240501"
+    with open(partition / "t.i8", "ab") as f:
+        f.write(np.array([123], dtype="<i8").tobytes())
+    
+    store.append("truck-1", 2.0, 2.0, 2.0, t0 + timedelta(seconds=1))
+    assert store.read("truck-1")["lat"].tolist() == [1.0, 2.0]